@@ -0,0 +1,80 @@
+
+"""
+Compares the overhead of monitoring calls of a function with an `Instrumenter` (enabled
+and disabled) with calling `eval` manually at the call site. Run from the repository root:
+
+    python benchmarks/bench_instrument.py --calls 200000
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pycontract_core import Monitor, AlwaysState, initial, set_debug
+from pycontract_instrument import Instrumenter, Call, Return, HAS_SYS_MONITORING
+
+
+class Calls(Monitor):
+    @initial
+    class Always(AlwaysState):
+        def transition(self, event):
+            pass
+
+
+def work(x: int, y: int) -> int:
+    return x + y
+
+
+def run_plain(calls: int) -> float:
+    begin = time.perf_counter()
+    for nr in range(calls):
+        work(nr, 1)
+    return time.perf_counter() - begin
+
+
+def run_manual(calls: int) -> float:
+    monitor = Calls()
+    begin = time.perf_counter()
+    for nr in range(calls):
+        monitor.eval(Call('work', {'x': nr, 'y': 1}))
+        value = work(nr, 1)
+        monitor.eval(Return('work', value))
+    return time.perf_counter() - begin
+
+
+def run_instrumented(calls: int, enabled: bool) -> float:
+    monitor = Calls()
+    instrumenter = Instrumenter(monitor)
+    function = instrumenter.instrument(work)
+    if enabled:
+        instrumenter.enable()
+    begin = time.perf_counter()
+    for nr in range(calls):
+        function(nr, 1)
+    instrumenter.flush()
+    seconds = time.perf_counter() - begin
+    instrumenter.disable()
+    monitor.option_print_summary = False
+    instrumenter.end()
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures the overhead of instrumentation.')
+    parser.add_argument('--calls', type=int, default=200000, help='number of calls')
+    options = parser.parse_args()
+    set_debug(False)
+    plain = run_plain(options.calls)
+    print(f'sys.monitoring available: {HAS_SYS_MONITORING}')
+    for (name, seconds) in [('no monitoring', plain),
+                            ('manual eval', run_manual(options.calls)),
+                            ('instrumented, enabled', run_instrumented(options.calls, True)),
+                            ('instrumented, disabled', run_instrumented(options.calls, False))]:
+        print(f'{name:24} {seconds:8.3f} s {1e9 * (seconds - plain) / options.calls:10.0f} ns overhead per call')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+
+"""
+Compares handing over events from a producer process to the monitor process through
+a `multiprocessing.Queue` (one `put` per event, as in test14) and through a `SharedRing`.
+Run from the repository root:
+
+    python benchmarks/bench_shm_vs_queue.py --events 200000
+"""
+
+import os
+import sys
+import time
+import argparse
+from multiprocessing import Process, Queue
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pycontract_shm import SharedRing, RingSource
+
+
+def mk_event(nr: int) -> dict:
+    return {'name': 'command', 'cmd': f'C{nr % 1000}', 'nr': nr, 'kind': 'FSW'}
+
+
+def queue_producer(queue: Queue, count: int):
+    for nr in range(count):
+        queue.put(mk_event(nr))
+    queue.put(None)
+
+
+def ring_producer(name: str, count: int, batch_size: int):
+    ring = SharedRing(name, create=False)
+    for start in range(0, count, batch_size):
+        ring.put_many(mk_event(nr) for nr in range(start, min(start + batch_size, count)))
+    ring.finish()
+    ring.close()
+
+
+def bench_queue(count: int) -> float:
+    queue = Queue(maxsize=65536)
+    process = Process(target=queue_producer, args=(queue, count))
+    begin = time.perf_counter()
+    process.start()
+    received = 0
+    while queue.get() is not None:
+        received += 1
+    seconds = time.perf_counter() - begin
+    process.join()
+    assert received == count
+    return seconds
+
+
+def bench_ring(count: int, batch_size: int) -> float:
+    ring = SharedRing(capacity=65536, record_size=128)
+    process = Process(target=ring_producer, args=(ring.name, count, batch_size))
+    begin = time.perf_counter()
+    process.start()
+    received = 0
+    for batch in RingSource(ring, batch_size).batches():
+        received += len(batch)
+    seconds = time.perf_counter() - begin
+    process.join()
+    ring.unlink()
+    assert received == count
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares multiprocessing.Queue with SharedRing.')
+    parser.add_argument('--events', type=int, default=200000, help='number of events handed over')
+    parser.add_argument('--batch-size', type=int, default=1000, help='batch size for the ring')
+    options = parser.parse_args()
+    for (name, seconds) in [('multiprocessing.Queue', bench_queue(options.events)),
+                            ('SharedRing', bench_ring(options.events, options.batch_size))]:
+        print(f'{name:22} {seconds:8.3f} s {options.events / seconds:12.0f} events/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+
+"""
+Runs the benchmark suite, reporting for each workload the events per second, the peak
+resident set size of the process, and the peak number of live states, as JSON.
+Each workload is run in a separate process, such that peak memory is measured per workload.
+Run from the repository root:
+
+    python benchmarks/run.py --output baseline.json
+    python benchmarks/run.py --compare baseline.json --threshold 0.1
+
+In comparison mode a workload regresses if its events per second decreased, or its
+peak memory or peak number of states increased, by more than the threshold (a fraction).
+The exit status is 1 if some workload regressed.
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import subprocess
+import contextlib
+from typing import List, Dict, Optional
+
+from workloads import WORKLOADS, Workload
+from pycontract_core import __version__, set_debug
+
+
+def count_states(monitor: object) -> Optional[int]:
+    """
+    Counts the live states of a monitor, including the states of its sub-monitors.
+    :param monitor: the monitor.
+    :return: the number of states, or None if the monitor is not a PyContract monitor.
+    """
+    if not hasattr(monitor, 'states'):
+        return None
+    count = len(monitor.states) + sum(len(states) for states in monitor.states_indexed.values())
+    return count + sum(count_states(sub_monitor) for sub_monitor in monitor.monitors)
+
+
+def measure_time(workload: Workload, repeat: int) -> float:
+    """
+    Measures the time it takes to monitor the events of a workload, the best of several runs.
+    :param workload: the workload.
+    :param repeat: the number of runs.
+    :return: the time of the fastest run in seconds.
+    """
+    best = None
+    for _ in range(repeat):
+        monitor = workload.monitor_factory()
+        monitor.option_print_summary = False
+        begin = time.perf_counter()
+        for event in workload.events:
+            monitor.eval(event)
+        monitor.end()
+        seconds = time.perf_counter() - begin
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def measure_states(workload: Workload, sample_every: int) -> Optional[int]:
+    """
+    Measures the peak number of live states while monitoring the events of a workload,
+    counting the states after every `sample_every` events. Run separately from the time
+    measurements, since counting states takes time.
+    :param workload: the workload.
+    :param sample_every: the number of events between two counts.
+    :return: the peak number of states, or None if the monitor is not a PyContract monitor.
+    """
+    monitor = workload.monitor_factory()
+    monitor.option_print_summary = False
+    peak = count_states(monitor)
+    if peak is None:
+        return None
+    for (event_nr, event) in enumerate(workload.events, 1):
+        monitor.eval(event)
+        if event_nr % sample_every == 0:
+            peak = max(peak, count_states(monitor))
+    monitor.end()
+    return peak
+
+
+def run_workload(name: str, scale: float, repeat: int, sample_every: int) -> Dict[str, object]:
+    """
+    Runs one workload. Called in the worker process.
+    :param name: the name of the workload.
+    :param scale: the scale factor of the workload.
+    :param repeat: the number of timed runs.
+    :param sample_every: the number of events between two counts of the states.
+    :return: the measurements.
+    """
+    set_debug(False)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        workload = WORKLOADS[name](scale)
+        seconds = measure_time(workload, repeat)
+        peak_states = measure_states(workload, sample_every)
+    events = len(workload.events)
+    return {
+        'events': events,
+        'seconds': seconds,
+        'events_per_second': events / seconds,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'peak_states': peak_states
+    }
+
+
+def run_suite(names: List[str], scale: float, repeat: int, sample_every: int) -> Dict[str, object]:
+    """
+    Runs workloads, each in a separate process.
+    :param names: the names of the workloads.
+    :param scale: the scale factor of the workloads.
+    :param repeat: the number of timed runs of each workload.
+    :param sample_every: the number of events between two counts of the states.
+    :return: the report.
+    """
+    results = {}
+    for name in names:
+        command = [sys.executable, os.path.abspath(__file__), '--worker', name, '--scale', str(scale),
+                   '--repeat', str(repeat), '--sample-every', str(sample_every)]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        results[name] = json.loads(output.strip().splitlines()[-1])
+        result = results[name]
+        print(f"{name:20} {result['events']:9} events {result['events_per_second']:12.0f} events/s "
+              f"{result['peak_rss_kb']:9} KB {result['peak_states']} states", file=sys.stderr)
+    return {
+        'pycontract': __version__,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'scale': scale,
+        'results': results
+    }
+
+
+def compare(baseline: Dict[str, object], report: Dict[str, object], threshold: float) -> List[str]:
+    """
+    Compares a report with a baseline report.
+    :param baseline: the baseline report.
+    :param report: the new report.
+    :param threshold: the relative change regarded as a regression, for example 0.1 for 10%.
+    :return: descriptions of the regressions.
+    """
+    regressions = []
+    for (name, result) in report['results'].items():
+        if name not in baseline['results']:
+            continue
+        base = baseline['results'][name]
+        if result['events_per_second'] < base['events_per_second'] * (1 - threshold):
+            regressions.append(f"{name}: events/s {base['events_per_second']:.0f} -> {result['events_per_second']:.0f}")
+        for metric in ['peak_rss_kb', 'peak_states']:
+            if base[metric] is not None and result[metric] is not None and \
+                    result[metric] > base[metric] * (1 + threshold):
+                regressions.append(f'{name}: {metric} {base[metric]} -> {result[metric]}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs the PyContract benchmark suite.')
+    parser.add_argument('--workloads', nargs='*', default=list(WORKLOADS), choices=list(WORKLOADS),
+                        help='the workloads to run, by default all')
+    parser.add_argument('--scale', type=float, default=1.0, help='scale factor of the workload sizes')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per workload, the best is reported')
+    parser.add_argument('--sample-every', type=int, default=10, help='events between counts of states')
+    parser.add_argument('--output', help='file to write the JSON report to, by default standard output')
+    parser.add_argument('--compare', metavar='BASELINE', help='baseline JSON report to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative change regarded as a regression')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    options = parser.parse_args()
+    if options.worker is not None:
+        print(json.dumps(run_workload(options.worker, options.scale, options.repeat, options.sample_every)))
+        return
+    report = run_suite(options.workloads, options.scale, options.repeat, options.sample_every)
+    if options.output is not None:
+        with open(options.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if options.compare is not None:
+        with open(options.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, options.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print('no regressions', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
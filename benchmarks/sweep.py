@@ -0,0 +1,151 @@
+
+"""
+Characterizes how the cost of a monitor grows with the number of commands executing in
+parallel and with the length of the trace. For each point of a grid of (parallel sessions,
+repetitions) a trace is generated with the test12 trace generator, the monitor is run on it,
+and the cost per event and the average number of live states are measured. The cost per
+event is then fitted as a power of the number of live states: cost = a * states^b.
+An exponent b close to 1 (or above) means that every event is checked against every live
+state, in which case the monitor should be sliced with `key()`. Run from the repository root:
+
+    python benchmarks/sweep.py --monitor test.test12_vpt_2022.test12:M4
+    python benchmarks/sweep.py --sessions 1 10 100 --repeats 10 100 --output sweep.json
+
+The monitor must accept the events of the test12 logs.
+"""
+
+import os
+import sys
+import math
+import json
+import time
+import argparse
+import importlib
+import contextlib
+from typing import List, Dict, Tuple, Callable
+
+from workloads import command_log
+from run import count_states
+from pycontract_core import set_debug
+
+
+def load_monitor_factory(spec: str) -> Callable[[], object]:
+    """
+    Loads a monitor class given as `module:name`.
+    :param spec: the module and the name of the class.
+    :return: the monitor class.
+    """
+    (module, name) = spec.split(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def measure(monitor_factory: Callable[[], object], events: List[object], sample_every: int) -> Tuple[float, float]:
+    """
+    Measures the cost per event and the average number of live states of monitoring a trace.
+    The states are counted in a separate run, since counting states takes time.
+    :param monitor_factory: function creating a fresh monitor.
+    :param events: the events.
+    :param sample_every: the number of events between two counts of the states.
+    :return: the cost per event in seconds, and the average number of live states.
+    """
+    monitor = monitor_factory()
+    monitor.option_print_summary = False
+    begin = time.perf_counter()
+    for event in events:
+        monitor.eval(event)
+    monitor.end()
+    cost = (time.perf_counter() - begin) / len(events)
+    monitor = monitor_factory()
+    monitor.option_print_summary = False
+    counts = []
+    for (event_nr, event) in enumerate(events, 1):
+        monitor.eval(event)
+        if event_nr % sample_every == 0:
+            counts.append(count_states(monitor))
+    monitor.end()
+    return cost, sum(counts) / len(counts) if counts else 0.0
+
+
+def fit_power(points: List[Tuple[float, float]]) -> Tuple[float, float]:
+    """
+    Fits y = a * x^b to points by least squares on log(y) = log(a) + b * log(x).
+    Points with x below 1 are ignored.
+    :param points: the (x, y) points.
+    :return: the coefficient a and the exponent b.
+    """
+    logs = [(math.log(x), math.log(y)) for (x, y) in points if x >= 1 and y > 0]
+    assert len({x for (x, _) in logs}) >= 2, 'at least two different numbers of live states are needed'
+    mean_x = sum(x for (x, _) in logs) / len(logs)
+    mean_y = sum(y for (_, y) in logs) / len(logs)
+    b = sum((x - mean_x) * (y - mean_y) for (x, y) in logs) / sum((x - mean_x) ** 2 for (x, _) in logs)
+    return math.exp(mean_y - b * mean_x), b
+
+
+def classify(exponent: float, threshold: float) -> str:
+    """
+    Classifies the growth of the cost per event in the number of live states.
+    :param exponent: the fitted exponent.
+    :param threshold: the exponent from which growth is regarded as linear.
+    :return: the classification.
+    """
+    if exponent >= threshold:
+        return 'linear or worse: consider slicing the monitor with key()'
+    if exponent >= 0.2:
+        return 'sublinear'
+    return 'constant'
+
+
+def sweep(monitor_factory: Callable[[], object], sessions: List[int], repeats: List[int],
+          sample_every: int) -> List[Dict[str, float]]:
+    """
+    Runs a monitor on a trace for each combination of sessions and repetitions.
+    :param monitor_factory: function creating a fresh monitor.
+    :param sessions: the numbers of commands executing in parallel.
+    :param repeats: the numbers of repetitions.
+    :param sample_every: the number of events between two counts of the states.
+    :return: a measurement for each combination.
+    """
+    points = []
+    for session_count in sessions:
+        for repeat in repeats:
+            events = command_log(session_count, repeat)
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                (cost, states) = measure(monitor_factory, events, sample_every)
+            point = {'sessions': session_count, 'repeats': repeat, 'events': len(events),
+                     'cost_us': cost * 1e6, 'live_states': states}
+            print(f"{session_count:9} {repeat:8} {len(events):9} {point['cost_us']:12.2f} {states:12.1f}",
+                  file=sys.stderr)
+            points.append(point)
+    return points
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures how the cost of a monitor grows with its live states.')
+    parser.add_argument('--monitor', default='test.test12_vpt_2022.test12:M4',
+                        help='the monitor class as module:name, by default the test12 monitor')
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 5, 20, 50, 100],
+                        help='numbers of commands executing in parallel')
+    parser.add_argument('--repeats', type=int, nargs='+', default=[20, 80],
+                        help='numbers of times the parallel commands are repeated')
+    parser.add_argument('--sample-every', type=int, default=10, help='events between counts of states')
+    parser.add_argument('--threshold', type=float, default=0.8,
+                        help='exponent from which the cost is regarded as growing linearly')
+    parser.add_argument('--output', help='file to write the JSON report to')
+    options = parser.parse_args()
+    set_debug(False)
+    monitor_factory = load_monitor_factory(options.monitor)
+    print(f"{'sessions':>9} {'repeats':>8} {'events':>9} {'us/event':>12} {'states':>12}", file=sys.stderr)
+    points = sweep(monitor_factory, options.sessions, options.repeats, options.sample_every)
+    (coefficient, exponent) = fit_power([(point['live_states'], point['cost_us']) for point in points])
+    verdict = classify(exponent, options.threshold)
+    print(f'cost per event = {coefficient:.3f} us * states^{exponent:.2f}: {verdict}')
+    if options.output is not None:
+        with open(options.output, 'w') as f:
+            json.dump({'monitor': options.monitor, 'points': points, 'coefficient_us': coefficient,
+                       'exponent': exponent, 'verdict': verdict}, f, indent=2)
+    if exponent >= options.threshold:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
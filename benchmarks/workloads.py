@@ -0,0 +1,206 @@
+
+"""
+Workloads of the benchmark suite. Each workload is a function taking a scale factor and
+returning a `Workload`: a function creating a fresh monitor and the list of events to
+submit to it. Events are created before measuring, such that only monitoring is measured.
+Workloads are based on the tests: the command logs of test12 (generated with its
+trace generator), the lock file of test10, the auction of test4, the dictionary,
+dataclass and plain Python variants of the monitor of test22, and a monitor
+using `exists` and past time state lookups.
+"""
+
+import os
+import sys
+import tempfile
+import contextlib
+from typing import List, Dict, Callable
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from pycontract_core import Monitor, HotState, AlwaysState, data, initial, error, ok
+from pycontract_csv import CSVReader
+
+
+class Workload:
+    """
+    A monitor factory and the events to submit to the monitors it creates.
+    """
+    def __init__(self, monitor_factory: Callable[[], object], events: List[object]):
+        """
+        :param monitor_factory: function creating a fresh monitor, with `eval` and `end` methods.
+        :param events: the events.
+        """
+        self.monitor_factory = monitor_factory
+        self.events = events
+
+
+def read_csv(file: str, converter: Callable[[List[str]], object]) -> List[object]:
+    """
+    Reads the events of a CSV file.
+    :param file: the CSV file.
+    :param converter: function converting a row into an event, or None.
+    :return: the events.
+    """
+    csv_reader = CSVReader(file, converter)
+    events = [event for event in csv_reader if event is not None]
+    csv_reader.close()
+    return events
+
+
+def command_log(commands: int, repeat: int) -> List[object]:
+    """
+    Generates a test12 log with its trace generator, with `repeat` sections of `commands`
+    commands executing in parallel, and reads its events.
+    :param commands: the number of commands executing in parallel.
+    :param repeat: the number of sections.
+    :return: the events.
+    """
+    from test.test12_vpt_2022 import trace_generator
+    from test.test12_vpt_2022.test12 import converter
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            with contextlib.redirect_stdout(None):
+                trace_generator.log(commands, repeat)
+            return read_csv(f'log-{commands}-{repeat}.csv', converter)
+        finally:
+            os.chdir(cwd)
+
+
+def vpt_sequential(scale: float) -> Workload:
+    from test.test12_vpt_2022.test12 import M4
+    return Workload(M4, command_log(1, max(1, int(5000 * scale))))
+
+
+def vpt_parallel(scale: float) -> Workload:
+    from test.test12_vpt_2022.test12 import M4
+    return Workload(M4, command_log(20, max(1, int(250 * scale))))
+
+
+def locks(scale: float) -> Workload:
+    from test.test10_many_locks.test10 import AcquireRelease, converter
+    events = read_csv(os.path.join(ROOT, 'test', 'test10_many_locks', 'lock_file.csv'), converter)
+    return Workload(AcquireRelease, events * max(1, int(scale)))
+
+
+def auction(scale: float) -> Workload:
+    from test.test4_auction.test4 import Auction, List as Listing, Bid, Sell
+    events = []
+    items = max(1, int(1000 * scale))
+    for block in range(0, items, 100):
+        block_items = [f'item{nr}' for nr in range(block, min(block + 100, items))]
+        for item in block_items:
+            events.append(Listing(item, 50))
+        for amount in range(10, 110, 10):
+            for item in block_items:
+                events.append(Bid(item, amount))
+        for item in block_items:
+            events.append(Sell(item))
+    return Workload(Auction, events)
+
+
+def command_events(scale: float) -> List[Dict[str, object]]:
+    """
+    Generates events for the test22 monitors: tasks dispatched, replied to and completed,
+    50 tasks at a time.
+    :param scale: the scale factor.
+    :return: the events as dictionaries, as parsed from JSON.
+    """
+    events = []
+    tasks = max(1, int(1000 * scale))
+    for block in range(0, tasks, 50):
+        block_tasks = range(block, min(block + 50, tasks))
+        for kind in ['dispatch', 'reply', 'complete']:
+            for task in block_tasks:
+                events.append({'id': kind, 'task_id': task, 'cmd_nr': 1, 'cmd_type': 'START'})
+    return events
+
+
+def daut_dictionaries(scale: float) -> Workload:
+    from test.test22_daut.test22_dictionaries import CommandMonitor
+    return Workload(CommandMonitor, command_events(scale))
+
+
+def daut_dataclasses(scale: float) -> Workload:
+    from test.test22_daut.test22_dataclasses import CommandMonitor, parse_json_event
+    return Workload(CommandMonitor, [parse_json_event(event) for event in command_events(scale)])
+
+
+def daut_plain_python(scale: float) -> Workload:
+    from test.test22_daut.test22_plainpython import CommandMonitor
+
+    class PlainMonitor(CommandMonitor):
+        def eval(self, event):
+            self.event_nr += 1
+            self.check(event)
+
+    return Workload(PlainMonitor, command_events(scale))
+
+
+@data
+class Acquire:
+    thread: str
+    lock: int
+
+
+@data
+class Release:
+    thread: str
+    lock: int
+
+
+class LockHistory(Monitor):
+    """
+    A lock may only be acquired if no thread holds it (checked with `exists`), and only be
+    released by the thread holding it (checked by looking up the state, a past time
+    property). Neither check is indexed, so both scan all states.
+    """
+
+    @initial
+    class Always(AlwaysState):
+        def transition(self, event):
+            match event:
+                case Acquire(thread, lock):
+                    if self.exists(lambda state: isinstance(state, LockHistory.Locked) and state.lock == lock):
+                        return error(f'lock {lock} acquired while held')
+                    return LockHistory.Locked(thread, lock)
+                case Release(thread, lock) if not self.monitor.contains_state(LockHistory.Locked(thread, lock)):
+                    return error(f'{thread} releases lock {lock} not held')
+
+    @data
+    class Locked(HotState):
+        thread: str
+        lock: int
+
+        def transition(self, event):
+            match event:
+                case Release(self.thread, self.lock):
+                    return ok
+
+
+def exists_past(scale: float) -> Workload:
+    events = []
+    rounds = max(1, int(100 * scale))
+    for round_nr in range(rounds):
+        for lock in range(50):
+            events.append(Acquire(f'thread{lock % 5}', lock))
+        for lock in range(50):
+            events.append(Release(f'thread{lock % 5}', lock))
+    return Workload(LockHistory, events)
+
+
+"""
+All workloads, by name.
+"""
+WORKLOADS: Dict[str, Callable[[float], Workload]] = {
+    'vpt-sequential': vpt_sequential,
+    'vpt-parallel': vpt_parallel,
+    'locks': locks,
+    'auction': auction,
+    'daut-dictionaries': daut_dictionaries,
+    'daut-dataclasses': daut_dataclasses,
+    'daut-plain-python': daut_plain_python,
+    'exists-past': exists_past
+}
@@ -1,9 +1,28 @@
 
 from pycontract_core import \
-    Monitor, Event, State, HotState, NextState, HotNextState, AlwaysState, Message, \
+    __version__, Monitor, Event, State, HotState, NextState, HotNextState, AlwaysState, Message, Relevance, \
     data, initial, ok, error, info, exhaustive, done, \
-    set_debug, set_debug_gc, set_debug_progress
+    set_debug, set_debug_states, set_debug_gc, set_debug_progress
 from pycontract_plantuml import visualize
 from pycontract_csv import CSVReader, CSVSource
+from pycontract_json import JSONLSource, JSONSource
+from pycontract_sqlite import SQLiteSource
+from pycontract_merge import MergeSource
+from pycontract_prefetch import PrefetchSource
+from pycontract_index import SliceIndex
+from pycontract_batch import verify_partitioned, verify_files
+from pycontract_cache import ResultCache
+from pycontract_async import AsyncMonitor
+from pycontract_server import EventServer
+from pycontract_shm import SharedRing, RingSource
+from pycontract_logging import MonitorLogHandler
+from pycontract_instrument import Instrumenter
+from pycontract_profile import Profiler
+from pycontract_coverage import Coverage
+from pycontract_stats import StatsSampler, PrometheusExporter
+from pycontract_recorder import StateRecorder
+from pycontract_memory import MemoryReporter
+from pycontract_latency import LatencyHistogram, LatencyTimer
+from pycontract_trace import Tracer, TraceFilter
 
 
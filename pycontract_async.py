@@ -0,0 +1,223 @@
+
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import List, Optional, Union, AsyncIterable
+from pycontract_core import Monitor, Message, Event
+from pycontract_latency import LatencyTimer
+
+"""
+Marks the end of the events in the queue of an `AsyncMonitor`.
+"""
+END = object()
+
+
+class AsyncMonitor:
+    '''
+    Wraps a monitor for use from asyncio code, such that evaluating events does not
+    block the event loop. Events are put in a bounded queue, and evaluated in batches
+    in an executor (by default a single thread) by a background task. When the queue
+    is full, `submit` waits until there is room, slowing down the producer (backpressure).
+    Example of use:
+
+        async def main():
+            async with AsyncMonitor(CommandExecution(), max_queue=10000) as monitor:
+                async for event in telemetry():
+                    await monitor.submit(event)
+            print(monitor.messages)
+
+    Events can also be ingested from an async iterator or an `asyncio.Queue`:
+
+        await monitor.ingest(telemetry())
+        messages = await monitor.end()
+
+    The monitor itself is only accessed by one batch at a time, in the order events were submitted.
+    With a `LatencyTimer`, the time each event waits between `submit` and its evaluation is recorded.
+    '''
+
+    def __init__(self, monitor: Monitor, max_queue: int = 10000, batch_size: int = 100,
+                 executor: Optional[Executor] = None, latency: Optional[LatencyTimer] = None):
+        '''
+        :param monitor: the monitor to submit events to.
+        :param max_queue: the maximal number of events waiting to be evaluated.
+        :param batch_size: the maximal number of events evaluated in one call in the executor.
+        :param executor: the executor to evaluate events in, by default a single thread
+        owned by this object.
+        :param latency: the timer recording the time events wait in the queue, or None.
+
+        event_count: the number of events submitted.
+        batch_count: the number of batches evaluated.
+        submit_blocked: seconds `submit` has waited for room in the queue.
+        messages: the messages reported, available after `end()`.
+        '''
+        self.monitor = monitor
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.own_executor = executor is None
+        self.executor = ThreadPoolExecutor(max_workers=1) if executor is None else executor
+        self.latency = latency
+        self.queue: Optional[asyncio.Queue] = None
+        self.worker: Optional[asyncio.Task] = None
+        self.failure: Optional[BaseException] = None
+        self.ended = False
+        self.event_count = 0
+        self.batch_count = 0
+        self.submit_blocked: float = 0.0
+        self.messages: Optional[List[Message]] = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            await self.end()
+        else:
+            await self.cancel()
+
+    def start(self):
+        '''
+        Starts the background task evaluating events. Called by `__aenter__`, or by
+        the first call of `submit`. Must be called from within a running event loop.
+        '''
+        if self.worker is None:
+            self.queue = asyncio.Queue(maxsize=self.max_queue)
+            self.worker = asyncio.get_running_loop().create_task(self.evaluate())
+
+    async def evaluate(self):
+        '''
+        Run by the background task: takes batches of events from the queue and
+        evaluates them in the executor.
+        '''
+        loop = asyncio.get_running_loop()
+        finished = False
+        while not finished:
+            batch = []
+            event = await self.queue.get()
+            while event is not END:
+                batch.append(event)
+                if len(batch) == self.batch_size or self.queue.empty():
+                    break
+                event = self.queue.get_nowait()
+            finished = event is END
+            if batch and self.failure is None:
+                try:
+                    await loop.run_in_executor(self.executor, self.evaluate_batch, batch)
+                    self.batch_count += 1
+                except Exception as e:
+                    self.failure = e
+            for _ in range(len(batch) + finished):
+                self.queue.task_done()
+
+    def evaluate_batch(self, batch: List[Event]):
+        '''
+        Evaluates a batch of events in the executor. With a `LatencyTimer`, the events are
+        paired with the time they were submitted, and their wait is recorded.
+        :param batch: the events.
+        '''
+        if self.latency is None:
+            self.monitor.eval_many(batch)
+        else:
+            for (submitted, event) in batch:
+                self.latency.record_wait(submitted)
+                self.monitor.eval(event)
+
+    def check_failure(self):
+        '''
+        Raises the exception raised by the monitor, if any.
+        '''
+        if self.failure is not None:
+            raise self.failure
+
+    async def submit(self, event: Event):
+        '''
+        Submits an event. Waits if the queue is full.
+        :param event: the event.
+        '''
+        assert not self.ended, 'event submitted after end()'
+        self.check_failure()
+        self.start()
+        if self.latency is not None:
+            event = (time.monotonic_ns(), event)
+        if self.queue.full():
+            begin = time.perf_counter()
+            await self.queue.put(event)
+            self.submit_blocked += time.perf_counter() - begin
+        else:
+            self.queue.put_nowait(event)
+        self.event_count += 1
+
+    async def ingest(self, source: Union[AsyncIterable[Event], asyncio.Queue]):
+        '''
+        Submits all events from an async iterator, or from an `asyncio.Queue` until
+        None is taken from the queue. Each item taken from the queue, including None, is
+        marked as done once submitted, such that producers can wait with `source.join()`.
+        :param source: the async iterator or queue.
+        '''
+        if isinstance(source, asyncio.Queue):
+            while (event := await source.get()) is not None:
+                try:
+                    await self.submit(event)
+                finally:
+                    source.task_done()
+            source.task_done()
+        else:
+            async for event in source:
+                await self.submit(event)
+
+    async def drain(self):
+        '''
+        Waits until all events submitted so far have been evaluated.
+        '''
+        if self.queue is not None:
+            await self.queue.join()
+        self.check_failure()
+
+    async def end(self) -> List[Message]:
+        '''
+        Waits until all submitted events have been evaluated, and then calls `end()` on
+        the monitor in the executor.
+        :return: the messages reported by the monitor.
+        '''
+        if self.messages is not None:
+            return self.messages
+        self.ended = True
+        self.start()
+        await self.queue.put(END)
+        await self.worker
+        try:
+            self.check_failure()
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.monitor.end)
+            self.messages = self.monitor.get_all_messages()
+        finally:
+            self.shutdown()
+        return self.messages
+
+    async def cancel(self):
+        '''
+        Stops evaluating events, without calling `end()` on the monitor.
+        '''
+        self.ended = True
+        if self.worker is not None:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+        self.shutdown()
+
+    def shutdown(self):
+        '''
+        Shuts down the executor, if owned by this object.
+        '''
+        if self.own_executor:
+            self.executor.shutdown(wait=False)
+
+    def report(self) -> str:
+        '''
+        Returns a report of the number of events and batches evaluated, and of the time
+        producers have waited for room in the queue.
+        :return: the report.
+        '''
+        return (f'{self.event_count} events in {self.batch_count} batches, '
+                f'submit blocked {self.submit_blocked:.3f} s')
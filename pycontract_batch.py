@@ -0,0 +1,390 @@
+
+import os
+import json
+import time
+import pickle
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Callable, Iterable, Iterator, Tuple, Optional
+from pycontract_core import Monitor, Message
+from pycontract_csv import CSVSource
+from pycontract_cache import ResultCache, hash_monitor_source, hash_reader
+
+
+def partition_trace(events: Iterable[object], key: Callable[[object], object], buckets: int,
+                    directory: str) -> List[str]:
+    """
+    Partitions a trace into bucket files (spill files) by the hash of the key of each event.
+    Events with no key (key None) are written to all buckets. Each event is stored
+    together with its event number, such that messages reported when verifying a bucket
+    have the same event numbers as when verifying the whole trace.
+    :param events: the trace, for example a `CSVSource`. Events must be picklable.
+    :param key: function returning the key of an event, usually the `key` method of a monitor.
+    :param buckets: the number of buckets.
+    :param directory: the directory in which to create the bucket files.
+    :return: the names of the bucket files.
+    """
+    files = [os.path.join(directory, f'bucket-{nr}.pickle') for nr in range(buckets)]
+    streams = [open(file, 'wb') for file in files]
+    try:
+        picklers = [pickle.Pickler(stream, pickle.HIGHEST_PROTOCOL) for stream in streams]
+        event_nr = 0
+        for event in events:
+            event_nr += 1
+            index = key(event)
+            if index is None:
+                for pickler in picklers:
+                    pickler.dump((event_nr, event))
+                    pickler.clear_memo()
+            else:
+                pickler = picklers[hash(index) % buckets]
+                pickler.dump((event_nr, event))
+                pickler.clear_memo()
+    finally:
+        for stream in streams:
+            stream.close()
+    return files
+
+
+def read_bucket(file: str) -> Iterable[Tuple[int, object]]:
+    """
+    Reads the events of a bucket file one by one.
+    :param file: the bucket file.
+    :return: iterator over (event number, event) pairs.
+    """
+    with open(file, 'rb') as stream:
+        unpickler = pickle.Unpickler(stream)
+        while True:
+            try:
+                yield unpickler.load()
+            except EOFError:
+                return
+
+
+class MessageOrigins:
+    """
+    Records, for each message reported by a monitor and its sub-monitors, whether it may
+    also be reported in other buckets. A main state vector only evaluates events without a key,
+    which are verified in all buckets, so its messages are reported in every bucket. A slice
+    exists in one bucket only, so its messages are distinct from those of other buckets, even
+    if their texts are the same. Errors about hot states at the end are reported once per
+    distinct state over all state vectors, as `end()` takes the union of the vectors, and are
+    hence also merged across buckets. The object is attached as the tracer of the monitors,
+    being told which state vector is evaluated, and replaces their `add_message` method.
+    """
+    def __init__(self, monitor: Monitor):
+        """
+        :param monitor: the monitor.
+        """
+        self.monitors: List[Monitor] = []
+        self.main = False
+        self.messages: List[Tuple[bool, Message]] = []
+        self.attach(monitor)
+
+    def attach(self, monitor: Monitor):
+        """
+        Attaches to a monitor and its sub-monitors (recursively).
+        :param monitor: the monitor.
+        """
+        self.monitors.append(monitor)
+        monitor.tracer = self
+        add_message = monitor.add_message
+
+        def record_message(message: Message):
+            add_message(message)
+            self.messages.append((self.main or message.kind == 'end', message))
+        monitor.add_message = record_message
+        for sub_monitor in monitor.monitors:
+            self.attach(sub_monitor)
+
+    def traces(self, monitor: Monitor, key: Optional[object]) -> bool:
+        """
+        Called by a monitor before evaluating the states of a state vector.
+        :param monitor: the monitor.
+        :param key: the key of the slice, None for the main state vector.
+        :return: False, no transitions are recorded.
+        """
+        self.main = key is None
+        return False
+
+
+def verify_bucket(monitor_factory: Callable[[], Monitor], file: str) -> List[Tuple[bool, Message]]:
+    """
+    Verifies the events of a bucket file with a fresh monitor. Run in a worker process.
+    :param monitor_factory: function creating the monitor.
+    :param file: the bucket file.
+    :return: the messages reported by the monitor, each paired with True if it may also be
+    reported in other buckets (see `MessageOrigins`).
+    """
+    monitor = monitor_factory()
+    monitor.option_print_summary = False
+    origins = MessageOrigins(monitor)
+    for (event_nr, event) in read_bucket(file):
+        monitor.set_event_count(event_nr - 1)
+        monitor.eval(event)
+    monitor.end()
+    return origins.messages
+
+
+def merge_messages(bucket_messages: List[List[Tuple[bool, Message]]]) -> List[Message]:
+    """
+    Merges the messages reported for each bucket. Messages reported by a main state vector
+    are reported in all buckets, since events without a key are verified in all buckets.
+    Such a message reported n times in one bucket is only reported n times in the result,
+    even if it also occurs in other buckets, and likewise for errors at the end. Messages
+    reported by slices during monitoring are all kept.
+    :param bucket_messages: the messages of each bucket, each paired with True if it may
+    also be reported in other buckets.
+    :return: the merged messages.
+    """
+    result: List[Message] = []
+    counts: Counter = Counter()
+    for messages in bucket_messages:
+        bucket_counts: Counter = Counter()
+        for (shared, message) in messages:
+            if not shared:
+                result.append(message)
+                continue
+            bucket_counts[message.text] += 1
+            if bucket_counts[message.text] > counts[message.text]:
+                counts[message.text] += 1
+                result.append(message)
+    return result
+
+
+def verify_partitioned(monitor_factory: Callable[[], Monitor], events: Iterable[object],
+                       buckets: int = 8, workers: int = None, directory: str = None) -> List[Message]:
+    """
+    Verifies a trace with an indexed monitor (one defining the `key` method) in two phases.
+    First the trace is read once and partitioned into bucket files on disk, by the hash of the
+    key of each event. Then each bucket is verified in a process pool, by its own monitor. Since
+    only one bucket at a time is held by a worker, and events are read from the bucket file as they
+    are evaluated, traces much larger than the memory can be verified.
+    This is only sound for monitors where slices are independent: no state may depend on
+    events with other keys. Events without a key are verified in all buckets.
+    :param monitor_factory: function creating a fresh monitor. Must be picklable, for example
+    a monitor class or a top-level function, and so must the events and messages.
+    :param events: the trace.
+    :param buckets: the number of buckets.
+    :param workers: the number of worker processes, by default the number of processors.
+    :param directory: directory for the bucket files, by default a temporary directory which is
+    deleted afterwards.
+    :return: the messages reported for all buckets.
+    """
+    with tempfile.TemporaryDirectory(dir=directory) as bucket_directory:
+        files = partition_trace(events, monitor_factory().key, buckets, bucket_directory)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            bucket_messages = list(executor.map(verify_bucket, [monitor_factory] * buckets, files))
+    return merge_messages(bucket_messages)
+
+
+class FileResult:
+    """
+    The result of verifying one file with `verify_files`.
+    """
+    def __init__(self, file: str, messages: List[str], event_count: int, seconds: float,
+                 failure: Optional[str] = None, cached: bool = False):
+        """
+        :param file: the verified file.
+        :param messages: the texts of the messages reported by the monitor.
+        :param event_count: the number of events submitted to the monitor.
+        :param seconds: the time it took to verify the file.
+        :param failure: the exception raised, if verification failed.
+        :param cached: True if the result was found in a `ResultCache` instead of verifying the file.
+        """
+        self.file = file
+        self.messages = messages
+        self.event_count = event_count
+        self.seconds = seconds
+        self.failure = failure
+        self.cached = cached
+
+    def verdict(self) -> str:
+        """
+        Returns the verdict for the file.
+        :return: 'FAILED' if verification failed, 'ERRORS' if messages were reported, otherwise 'OK'.
+        """
+        if self.failure is not None:
+            return 'FAILED'
+        elif self.messages:
+            return 'ERRORS'
+        else:
+            return 'OK'
+
+    def __str__(self) -> str:
+        result = f'{self.verdict():6} {self.file}: {len(self.messages)} messages, ' \
+                 f'{self.event_count} events, {self.seconds:.3f} s'
+        if self.cached:
+            result += ' (cached)'
+        if self.failure is not None:
+            result += f'\n       {self.failure}'
+        return result
+
+
+class Report:
+    """
+    The aggregated report of verifying several files with `verify_files`.
+    """
+    def __init__(self, results: List[FileResult], seconds: float):
+        """
+        :param results: the results for each file, in the order they finished.
+        :param seconds: the total (wall clock) time it took to verify the files.
+        """
+        self.results = results
+        self.seconds = seconds
+
+    def get_message_count(self) -> int:
+        """
+        Returns the total number of messages reported.
+        :return: the number of messages reported for all files.
+        """
+        return sum(len(result.messages) for result in self.results)
+
+    def errors_found(self) -> bool:
+        """
+        Returns True if messages were reported for some file, or verification of some file failed.
+        :return: True if errors have been found.
+        """
+        return any(result.verdict() != 'OK' for result in self.results)
+
+    def __str__(self) -> str:
+        result = ''
+        for file_result in sorted(self.results, key=lambda r: r.file):
+            result += f'{file_result}\n'
+        failed = len([r for r in self.results if r.failure is not None])
+        cached = len([r for r in self.results if r.cached])
+        events = sum(r.event_count for r in self.results)
+        result += f'{len(self.results)} files, {cached} cached, {failed} failed, {events} events, ' \
+                  f'{self.get_message_count()} messages, {self.seconds:.3f} s'
+        return result
+
+    def write_json(self, file: str):
+        """
+        Writes the report to a JSON file.
+        :param file: the name of the JSON file.
+        """
+        report = {
+            'seconds': self.seconds,
+            'files': [
+                {
+                    'file': r.file,
+                    'verdict': r.verdict(),
+                    'events': r.event_count,
+                    'messages': r.messages,
+                    'seconds': r.seconds,
+                    'cached': r.cached,
+                    'failure': r.failure
+                } for r in self.results
+            ]
+        }
+        with open(file, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+def read_csv_file(file: str) -> Iterable[object]:
+    """
+    Default reader used by `verify_files`: reads a CSV file with a header line,
+    returning each row as a dictionary.
+    :param file: the CSV file.
+    :return: iterator over the rows.
+    """
+    with CSVSource(file) as csv_reader:
+        yield from csv_reader
+
+
+def verify_file(monitor_factory: Callable[[], Monitor], reader: Callable[[str], Iterable[object]],
+                file: str) -> FileResult:
+    """
+    Verifies one file with a fresh monitor. Run in a worker process.
+    :param monitor_factory: function creating the monitor.
+    :param reader: function returning the events of a file. None events are not submitted.
+    :param file: the file.
+    :return: the result.
+    """
+    begin = time.perf_counter()
+    monitor = None
+    try:
+        monitor = monitor_factory()
+        monitor.option_print_summary = False
+        for event in reader(file):
+            if event is not None:
+                monitor.eval(event)
+        monitor.end()
+        failure = None
+    except Exception as e:
+        failure = f'{type(e).__name__}: {e}'
+    if monitor is None:
+        return FileResult(file, [], 0, time.perf_counter() - begin, failure)
+    return FileResult(file, monitor.get_all_message_texts(), monitor.event_count,
+                      time.perf_counter() - begin, failure)
+
+
+def iter_verify_files(monitor_factory: Callable[[], Monitor], files: List[str], workers: int = None,
+                      reader: Callable[[str], Iterable[object]] = read_csv_file,
+                      cache: Optional[ResultCache] = None) -> Iterator[FileResult]:
+    """
+    Verifies files in a process pool, each with a fresh monitor, returning the results
+    as verification of each file finishes. Results found in the cache are returned first.
+    :param monitor_factory: function creating a fresh monitor. Must be picklable, for example
+    a monitor class or a top-level function.
+    :param files: the files to verify.
+    :param workers: the number of worker processes, by default the number of processors.
+    :param reader: function returning the events of a file, must be picklable. By default
+    files are read with `CSVSource`.
+    :param cache: when not None, files with a result in the cache are not verified, and the
+    results of files verified without failure are stored in the cache.
+    :return: iterator over the results of each file, in the order they finish.
+    """
+    pending = files
+    if cache is not None:
+        monitor_hash = hash_monitor_source(monitor_factory)
+        reader_hash = hash_reader(reader)
+        monitor_name = getattr(monitor_factory, '__qualname__', repr(monitor_factory))
+        pending = []
+        for file in files:
+            entry = cache.get(file, monitor_hash, reader_hash)
+            if entry is None:
+                pending.append(file)
+            else:
+                yield FileResult(file, entry['messages'], entry['event_count'], entry['seconds'], cached=True)
+    if not pending:
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(verify_file, monitor_factory, reader, file) for file in pending]
+        for future in as_completed(futures):
+            result = future.result()
+            if cache is not None and result.failure is None:
+                cache.put(result.file, monitor_hash, monitor_name, result.messages,
+                          result.event_count, result.seconds, reader_hash)
+            yield result
+
+
+def verify_files(monitor_factory: Callable[[], Monitor], files: List[str], workers: int = None,
+                 reader: Callable[[str], Iterable[object]] = read_csv_file, verbose: bool = True,
+                 cache: Optional[ResultCache] = None) -> Report:
+    """
+    Verifies files in a process pool, each with a fresh monitor, as for example daily logs.
+    The verdict of each file is printed as soon as it is known. Example of use:
+
+        report = verify_files(CommandExecution, glob.glob('logs/*.csv'), workers=8)
+        print(report)
+
+    :param monitor_factory: function creating a fresh monitor. Must be picklable, for example
+    a monitor class or a top-level function.
+    :param files: the files to verify.
+    :param workers: the number of worker processes, by default the number of processors.
+    :param reader: function returning the events of a file, must be picklable. By default
+    files are read with `CSVSource`.
+    :param verbose: when True the verdict of each file is printed when it is known.
+    :param cache: when not None, files with a result in the cache are not verified again,
+    see `ResultCache`.
+    :return: the aggregated report.
+    """
+    begin = time.perf_counter()
+    results = []
+    for result in iter_verify_files(monitor_factory, files, workers, reader, cache):
+        if verbose:
+            print(result)
+        results.append(result)
+    return Report(results, time.perf_counter() - begin)
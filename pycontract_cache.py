@@ -0,0 +1,305 @@
+
+import os
+import sys
+import json
+import time
+import inspect
+import hashlib
+import argparse
+from typing import Optional, List, Dict, Callable
+from pycontract_core import Monitor, is_state_class, __version__
+
+
+def hash_file_contents(file: str) -> str:
+    """
+    Computes the SHA-256 hash of the contents of a file, reading it in blocks.
+    :param file: the file.
+    :return: the hash as a hexadecimal string.
+    """
+    digest = hashlib.sha256()
+    with open(file, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def monitor_modules(monitor_factory: Callable[[], Monitor]) -> list:
+    """
+    Collects the modules a monitor depends on: the module defining the factory, and the
+    modules defining the classes of the monitor created by it, of its sub-monitors, and
+    of their state classes, including base classes outside of PyContract itself.
+    :param monitor_factory: function creating the monitor, for example the monitor class.
+    :return: the modules, sorted by name.
+    """
+    modules = {}
+    module = inspect.getmodule(monitor_factory)
+    if module is not None:
+        modules[module.__name__] = module
+    if isinstance(monitor_factory, type) and not issubclass(monitor_factory, Monitor):
+        return [modules[name] for name in sorted(modules)]
+    try:
+        monitor = monitor_factory()
+    except Exception:
+        monitor = None
+    classes = []
+    pending = [monitor] if isinstance(monitor, Monitor) else []
+    while pending:
+        current = pending.pop()
+        classes.extend(type(current).__mro__)
+        for (_, state_class) in inspect.getmembers(current, predicate=is_state_class):
+            classes.extend(state_class.__mro__)
+        pending.extend(current.monitors)
+    for cls in classes:
+        module = inspect.getmodule(cls)
+        if module is not None and module.__name__ not in ('builtins', 'pycontract_core'):
+            modules[module.__name__] = module
+    return [modules[name] for name in sorted(modules)]
+
+
+def hash_monitor_source(monitor_factory: Callable[[], Monitor]) -> str:
+    """
+    Computes the SHA-256 hash of the source code of the modules defining a monitor, its
+    factory, its sub-monitors and their state classes, such that cached results are
+    invalidated when the monitor, or anything else in those modules, changes. If the
+    source of a module is not available its name is hashed instead.
+    :param monitor_factory: function creating the monitor, for example the monitor class.
+    :return: the hash as a hexadecimal string.
+    """
+    digest = hashlib.sha256()
+    digest.update(f'{getattr(monitor_factory, "__module__", None)}.'
+                  f'{getattr(monitor_factory, "__qualname__", repr(monitor_factory))}'.encode())
+    for module in monitor_modules(monitor_factory):
+        try:
+            source = inspect.getsource(module)
+        except (OSError, TypeError):
+            source = module.__name__
+        digest.update(module.__name__.encode())
+        digest.update(source.encode())
+    return digest.hexdigest()
+
+
+def hash_reader(reader: Callable) -> str:
+    """
+    Computes the SHA-256 hash identifying a function reading the events of a log: its
+    qualified name and the source code of the module defining it, such that cached
+    results are invalidated when another reader is used, or when the reader changes.
+    :param reader: the reader.
+    :return: the hash as a hexadecimal string.
+    """
+    name = f"{getattr(reader, '__module__', None)}.{getattr(reader, '__qualname__', repr(reader))}"
+    try:
+        source = inspect.getsource(inspect.getmodule(reader))
+    except (OSError, TypeError):
+        source = ''
+    return hashlib.sha256((name + '\n' + source).encode()).hexdigest()
+
+
+class ResultCache:
+    '''
+    An on-disk cache of verification results, such that logs that have not changed
+    are not re-verified by a monitor that has not changed. A result is stored for each
+    combination of log file, log fingerprint, monitor source, reader and PyContract version.
+    The log fingerprint is its size and modification time, or a hash of its contents
+    if `content_hash` is True. Example of use:
+
+        cache = ResultCache('.pycontract_cache')
+        report = verify_files(CommandExecution, glob.glob('logs/*.csv'), cache=cache)
+
+    Each result is stored as a JSON file in the cache directory, and contains the messages
+    reported, including errors for hot states at the end of the log. The cache can be
+    inspected and pruned from the command line:
+
+        python pycontract_cache.py list
+        python pycontract_cache.py prune --older-than 30
+        python pycontract_cache.py clear
+    '''
+
+    def __init__(self, directory: str = '.pycontract_cache', content_hash: bool = False):
+        '''
+        :param directory: the cache directory, created if it does not exist.
+        :param content_hash: when True logs are identified by a hash of their contents,
+        otherwise by their size and modification time.
+        '''
+        self.directory = directory
+        self.content_hash = content_hash
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def file_fingerprint(self, file: str) -> str:
+        '''
+        Returns the fingerprint of a log file.
+        :param file: the log file.
+        :return: the fingerprint.
+        '''
+        if self.content_hash:
+            return hash_file_contents(file)
+        stat = os.stat(file)
+        return f'{stat.st_size}-{stat.st_mtime_ns}'
+
+    def key(self, file: str, fingerprint: str, monitor_hash: str, reader_hash: str = '') -> str:
+        '''
+        Returns the key of a result.
+        :param file: the log file.
+        :param fingerprint: the fingerprint of the log file.
+        :param monitor_hash: the hash of the monitor source.
+        :param reader_hash: the hash of the reader, see `hash_reader`.
+        :return: the key, which is also the name of the result file in the cache directory.
+        '''
+        text = json.dumps([os.path.abspath(file), fingerprint, monitor_hash, reader_hash, __version__])
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def entry_file(self, key: str) -> str:
+        '''
+        Returns the name of the file storing a result.
+        :param key: the key of the result.
+        :return: the file name.
+        '''
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, file: str, monitor_hash: str, reader_hash: str = '') -> Optional[Dict[str, object]]:
+        '''
+        Looks up the result of verifying a log file.
+        :param file: the log file.
+        :param monitor_hash: the hash of the monitor source, see `hash_monitor_source`.
+        :param reader_hash: the hash of the reader, see `hash_reader`.
+        :return: the result, or None if not cached (or if the log file does not exist).
+        '''
+        try:
+            key = self.key(file, self.file_fingerprint(file), monitor_hash, reader_hash)
+            with open(self.entry_file(key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, file: str, monitor_hash: str, monitor_name: str, messages: List[str],
+            event_count: int, seconds: float, reader_hash: str = ''):
+        '''
+        Stores the result of verifying a log file. The result is written to a temporary
+        file which is then renamed, such that concurrent readers never see a partial result.
+        :param file: the log file.
+        :param monitor_hash: the hash of the monitor source, see `hash_monitor_source`.
+        :param monitor_name: the name of the monitor, for inspection of the cache.
+        :param messages: the texts of the messages reported.
+        :param event_count: the number of events verified.
+        :param seconds: the time verification took.
+        :param reader_hash: the hash of the reader, see `hash_reader`.
+        '''
+        fingerprint = self.file_fingerprint(file)
+        entry = {
+            'file': os.path.abspath(file),
+            'fingerprint': fingerprint,
+            'content_hash': self.content_hash,
+            'monitor': monitor_name,
+            'monitor_hash': monitor_hash,
+            'reader_hash': reader_hash,
+            'version': __version__,
+            'messages': messages,
+            'event_count': event_count,
+            'seconds': seconds,
+            'created': time.time()
+        }
+        entry_file = self.entry_file(self.key(file, fingerprint, monitor_hash, reader_hash))
+        temporary_file = f'{entry_file}.{os.getpid()}.tmp'
+        with open(temporary_file, 'w') as f:
+            json.dump(entry, f)
+        os.replace(temporary_file, entry_file)
+
+    def entries(self) -> List[Dict[str, object]]:
+        '''
+        Returns all results in the cache, each extended with the name of its result file
+        under the key 'entry_file'.
+        :return: the results.
+        '''
+        result = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith('.json'):
+                entry_file = os.path.join(self.directory, name)
+                try:
+                    with open(entry_file) as f:
+                        entry = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                entry['entry_file'] = entry_file
+                result.append(entry)
+        return result
+
+    def is_stale(self, entry: Dict[str, object]) -> bool:
+        '''
+        Returns True if a result can never be hit again: the log file no longer exists,
+        has changed, or the result was produced by another version of PyContract.
+        Changes to the monitor cannot be detected without the monitor, use
+        the age of results to prune those.
+        :param entry: the result.
+        :return: True if the result is stale.
+        '''
+        if entry['version'] != __version__:
+            return True
+        try:
+            if entry['content_hash']:
+                fingerprint = hash_file_contents(entry['file'])
+            else:
+                stat = os.stat(entry['file'])
+                fingerprint = f'{stat.st_size}-{stat.st_mtime_ns}'
+        except OSError:
+            return True
+        return fingerprint != entry['fingerprint']
+
+    def prune(self, older_than: Optional[float] = None) -> int:
+        '''
+        Removes stale results, and results older than a given number of days.
+        :param older_than: when not None, results created more than this number of days ago are removed.
+        :return: the number of results removed.
+        '''
+        removed = 0
+        now = time.time()
+        for entry in self.entries():
+            too_old = older_than is not None and now - entry['created'] > older_than * 86400
+            if too_old or self.is_stale(entry):
+                os.remove(entry['entry_file'])
+                removed += 1
+        return removed
+
+    def clear(self) -> int:
+        '''
+        Removes all results.
+        :return: the number of results removed.
+        '''
+        entries = self.entries()
+        for entry in entries:
+            os.remove(entry['entry_file'])
+        return len(entries)
+
+
+def main(arguments: List[str]):
+    """
+    Command line interface for inspecting and pruning a result cache.
+    :param arguments: the command line arguments.
+    """
+    parser = argparse.ArgumentParser(prog='pycontract_cache', description='Inspects and prunes a PyContract result cache.')
+    parser.add_argument('--directory', default='.pycontract_cache', help='the cache directory')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help='lists the cached results')
+    prune_parser = commands.add_parser('prune', help='removes stale results')
+    prune_parser.add_argument('--older-than', type=float, default=None, metavar='DAYS',
+                              help='also removes results created more than DAYS days ago')
+    commands.add_parser('clear', help='removes all results')
+    options = parser.parse_args(arguments)
+    cache = ResultCache(options.directory)
+    if options.command == 'list':
+        for entry in cache.entries():
+            stale = ' (stale)' if cache.is_stale(entry) else ''
+            created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['created']))
+            print(f"{created} {entry['monitor']} {entry['file']}: {len(entry['messages'])} messages, "
+                  f"{entry['event_count']} events{stale}")
+    elif options.command == 'prune':
+        print(f'{cache.prune(options.older_than)} results removed')
+    else:
+        print(f'{cache.clear()} results removed')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
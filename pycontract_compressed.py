@@ -0,0 +1,137 @@
+
+import io
+import gzip
+import bz2
+import lzma
+import queue
+import threading
+from typing import Optional, List, Dict, Callable, TextIO
+
+"""
+Functions opening compressed files, indexed by file suffix.
+"""
+DECOMPRESSORS: Dict[str, Callable] = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+    '.lzma': lzma.open
+}
+
+
+def get_decompressor(file: str) -> Optional[Callable]:
+    """
+    Returns the function for opening a compressed file, based on its suffix.
+    :param file: the name of the file.
+    :return: the function opening the file, or None if the file is not compressed.
+    """
+    for (suffix, decompressor) in DECOMPRESSORS.items():
+        if file.endswith(suffix):
+            return decompressor
+    return None
+
+
+def put_chunk(chunks: queue.Queue, stopped: threading.Event, chunk: bytes):
+    """
+    Puts a chunk into the queue of a `BackgroundDecompressor`, waiting while the queue
+    is full unless the stream is closed.
+    :param chunks: the queue.
+    :param stopped: set when the stream is closed.
+    :param chunk: the chunk.
+    """
+    while not stopped.is_set():
+        try:
+            chunks.put(chunk, timeout=0.1)
+            return
+        except queue.Full:
+            pass
+
+
+def decompress(file: str, decompressor: Callable, chunk_size: int, chunks: queue.Queue,
+               stopped: threading.Event, errors: List[BaseException]):
+    """
+    Run by the background thread of a `BackgroundDecompressor`: decompresses the file chunk
+    by chunk. An empty chunk signals the end of the file, or an error, which is re-raised in
+    the reading thread. The thread does not refer to the stream, such that a stream dropped
+    without being closed is garbage collected, which closes it and stops the thread.
+    :param file: the name of the compressed file.
+    :param decompressor: the function opening the compressed file.
+    :param chunk_size: the number of decompressed bytes in each chunk.
+    :param chunks: the queue the chunks are put into.
+    :param stopped: set when the stream is closed.
+    :param errors: the list the error raised while decompressing, if any, is added to.
+    """
+    try:
+        with decompressor(file, 'rb') as compressed_file:
+            while not stopped.is_set():
+                chunk = compressed_file.read(chunk_size)
+                put_chunk(chunks, stopped, chunk)
+                if not chunk:
+                    return
+    except BaseException as e:
+        errors.append(e)
+        put_chunk(chunks, stopped, b'')
+
+
+class BackgroundDecompressor(io.RawIOBase):
+    """
+    A binary stream delivering the decompressed contents of a compressed file.
+    The decompression is performed by a background thread, which puts chunks of
+    decompressed data into a bounded queue. The decompression libraries release the
+    global interpreter lock while decompressing, so decompression can overlap with
+    the parsing of the data and the evaluation of monitors in the main thread.
+    """
+
+    def __init__(self, file: str, decompressor: Callable, chunk_size: int = 1 << 20, buffered_chunks: int = 8):
+        """
+        :param file: the name of the compressed file.
+        :param decompressor: the function opening the compressed file, e.g. `gzip.open`.
+        :param chunk_size: the number of decompressed bytes in each chunk.
+        :param buffered_chunks: the maximal number of chunks decompressed ahead.
+        """
+        super().__init__()
+        self.file = file
+        self.chunks: queue.Queue = queue.Queue(maxsize=buffered_chunks)
+        self.pending: memoryview = memoryview(b'')
+        self.exhausted: bool = False
+        self.errors: List[BaseException] = []
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(
+            target=decompress, args=(file, decompressor, chunk_size, self.chunks, self.stopped, self.errors), daemon=True)
+        self.thread.start()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self.pending:
+            if self.exhausted:
+                return 0
+            chunk = self.chunks.get()
+            if not chunk:
+                self.exhausted = True
+                if self.errors:
+                    raise self.errors[0]
+                return 0
+            self.pending = memoryview(chunk)
+        length = min(len(buffer), len(self.pending))
+        buffer[:length] = self.pending[:length]
+        self.pending = self.pending[length:]
+        return length
+
+    def close(self):
+        self.stopped.set()
+        super().close()
+
+
+def open_log(file: str, newline: Optional[str] = None) -> TextIO:
+    """
+    Opens a log file for reading text. Files ending in .gz, .bz2, .xz or .lzma are
+    decompressed on the fly by a background thread. Other files are opened as plain text files.
+    :param file: the name of the file.
+    :param newline: controls line endings as for the built-in `open` function.
+    :return: the opened text stream.
+    """
+    decompressor = get_decompressor(file)
+    if decompressor is None:
+        return open(file, newline=newline)
+    return io.TextIOWrapper(io.BufferedReader(BackgroundDecompressor(file, decompressor)), newline=newline)
@@ -5,9 +5,15 @@ import copy
 import inspect
 from abc import ABC
 from dataclasses import dataclass
-from typing import List, Set, Callable, Optional, Dict
+from typing import List, Set, Callable, Optional, Dict, Iterable
 import pyfiglet
 
+"""
+The version of PyContract. Part of the key of cached verification results,
+such that results are not reused across versions. Must agree with the version in README.md.
+"""
+__version__ = '1.2'
+
 
 def print_banner(text: str):
     '''
@@ -41,6 +47,10 @@ class Debug:
     """
     DEBUG: bool = False
     """
+    When set, and `DEBUG` is set, the states of each monitor will be printed after each event.
+    """
+    DEBUG_STATES: bool = False
+    """
     When set garbage collected states will be printed.
     This can be used to study how garbage collection works.
     """
@@ -68,12 +78,26 @@ def set_debug(value: bool):
     """
     Sets the debug flag. When True, for each submitted event will be printed:
     1. the event number and event
+    2. for each state evaluated, the monitor, the slice key (if any), and the resulting states
+    The cost is proportional to the number of states evaluated. The states of each monitor
+    are in addition printed after each event with `set_debug_states(True)`.
+    :param value: when True debugging information is printed.
+    """
+    Debug.DEBUG = value
+
+
+def set_debug_states(value: bool):
+    """
+    Sets the debug states flag. When True, and the debug flag is set with `set_debug(True)`,
+    for each submitted event will be printed:
+    1. the event number and event
     2. for each monitor:
        2.1 internal transitions in the monitor
        2.2 final set of states of the monitor
-    :param value: when True debugging information is printed.
+    Printing all states after each event is only practical for short traces.
+    :param value: when True the states are printed.
     """
-    Debug.DEBUG = value
+    Debug.DEBUG_STATES = value
 
 
 def set_debug_gc(value: bool):
@@ -622,14 +646,159 @@ class Message:
     with calls of the `error` method or information is generated with
     with calls of the `info` method.
     """
-    def __init__(self, text: str, data: object):
+    def __init__(self, text: str, data: object, kind: str = 'info'):
+        """
+        :param text: the message.
+        :param data: the data object.
+        :param kind: 'error' for errors, 'end' for errors reported at the end of monitoring,
+            and 'info' for information.
+        """
         self.text = text
         self.data = data
+        self.kind = kind
 
     def __str__(self):
         return self.text
 
 
+def column_value(row: object, column: object) -> object:
+    """
+    Returns the value of a column in a row or event. The row can be a dictionary
+    (indexed by column names), a list (indexed by column positions), or an object,
+    in which case the column is the name of an attribute.
+    :param row: the row or event.
+    :param column: the column name or position.
+    :return: the value of the column, or None if the row has no such column.
+    """
+    if isinstance(row, dict):
+        return row.get(column)
+    elif isinstance(row, list):
+        if isinstance(column, int) and column < len(row):
+            return row[column]
+        return None
+    elif isinstance(column, str):
+        return getattr(row, column, None)
+    else:
+        return None
+
+
+def restore_methods(obj: object, names: List[str], wrappers: List[Callable], replaced: List[Optional[Callable]]):
+    """
+    Restores methods of an object that were replaced by wrappers assigned as instance attributes,
+    as done by `StateRecorder`, `MemoryReporter`, `LatencyTimer` and `Profiler`. Wrappers of the
+    same method must be removed in the reverse order of installing them: restoring a method that
+    has since been wrapped again would discard the later wrapper, so nothing is restored then.
+    :param obj: the object.
+    :param names: the names of the methods.
+    :param wrappers: the wrappers installed, one per name.
+    :param replaced: the instance attributes replaced by the wrappers, None where there was none.
+    """
+    for (name, wrapper) in zip(names, wrappers):
+        if obj.__dict__.get(name) != wrapper:
+            raise RuntimeError(f'{name} of {type(obj).__name__} has been wrapped again, detach that wrapper first')
+    for (name, method) in zip(names, replaced):
+        if method is None:
+            delattr(obj, name)
+        else:
+            setattr(obj, name, method)
+
+
+class Relevance:
+    """
+    A static declaration of which events a monitor is interested in, stated
+    as event classes and/or values of discriminator columns. An event is relevant
+    if it is an instance of one of the classes or if one of the columns has one of
+    the declared values. Readers use it to skip rows before events are constructed.
+    """
+    def __init__(self, classes: Optional[List[type]] = None, values: Optional[Dict[object, List[object]]] = None):
+        """
+        :param classes: the relevant event classes.
+        :param values: maps column names (or positions) to the relevant values of that column.
+        """
+        self.classes: Set[type] = set(classes) if classes else set()
+        self.values: Dict[object, Set[object]] = {}
+        if values:
+            for (column, column_values) in values.items():
+                self.values[column] = set(column_values)
+        self.class_tuple = tuple(self.classes)
+        self.has_positions = any(isinstance(column, int) for column in self.values)
+
+    def union(self, other: "Relevance") -> "Relevance":
+        """
+        Returns the union of two relevance declarations.
+        :param other: the other relevance declaration.
+        :return: the relevance declaration admitting events admitted by either.
+        """
+        values = {column: column_values.copy() for (column, column_values) in self.values.items()}
+        for (column, column_values) in other.values.items():
+            values.setdefault(column, set()).update(column_values)
+        return Relevance(list(self.classes | other.classes), values)
+
+    def on_columns(self, column_names: List[str]) -> "Relevance":
+        """
+        Returns a relevance declaration where column names are replaced by their
+        positions in a row. Used by readers to check rows before turning them into dictionaries.
+        Columns not in `column_names` are dropped since no row can match them.
+        :param column_names: the names of the columns of the rows.
+        :return: the relevance declaration with column positions.
+        """
+        values = {}
+        for (column, column_values) in self.values.items():
+            if isinstance(column, int):
+                values[column] = column_values
+            elif column in column_names:
+                values[column_names.index(column)] = column_values
+        return Relevance(list(self.classes), values)
+
+    def admits_value(self, row: object) -> bool:
+        """
+        Returns True if one of the declared columns has one of its declared values in a row.
+        :param row: the row or event.
+        :return: True iff. the row has a relevant column value.
+        """
+        for (column, column_values) in self.values.items():
+            try:
+                if column_value(row, column) in column_values:
+                    return True
+            except TypeError:  # unhashable value
+                pass
+        return False
+
+    def admits_event(self, event: "Event") -> bool:
+        """
+        Returns True if an event is relevant. Column positions only apply to rows (lists), which
+        readers check before conversion. An event that is not a list, such as a dictionary or an
+        object converted from a row, cannot be checked against them, and is hence admitted if
+        columns are declared by position.
+        :param event: the event.
+        :return: True iff. the event is an instance of a relevant class or has a relevant column value.
+        """
+        if self.class_tuple and isinstance(event, self.class_tuple):
+            return True
+        if self.has_positions and not isinstance(event, list):
+            return True
+        return self.admits_value(event)
+
+    def admits_row(self, row: object, classify: Optional[Callable[[object], Optional[type]]] = None) -> bool:
+        """
+        Returns True if a row read by a reader may give rise to a relevant event.
+        Event classes can only be checked if a `classify` function is provided, which
+        returns the class of event a row will be converted to. If classes are declared
+        but no `classify` function is provided, the row is conservatively admitted.
+        :param row: the row.
+        :param classify: optional function returning the event class of a row.
+        :return: True iff. the row can be converted into a relevant event.
+        """
+        if self.admits_value(row):
+            return True
+        if self.classes:
+            if classify is None:
+                return True
+            event_class = classify(row)
+            return event_class is not None and issubclass(event_class, self.class_tuple)
+        return False
+
+
 class Monitor:
     """
     Any user defined monitor class must extend this class. It defines a monitor.
@@ -656,6 +825,25 @@ class Monitor:
           When True, state and event will be printed on transition errors.
         option_print_summary:
           When True, a summary of the analysis is printed for the top monitor.
+        relevance:
+          The events this monitor declares to be relevant, or None if all events are.
+        parent:
+          The monitor this monitor is a sub-monitor of, None for the top monitor.
+        state_count:
+          The number of states of this monitor and its sub-monitors (recursively), including
+          the states in slices. Maintained incrementally, such that it can be polled after each event.
+        message_count:
+          The number of messages reported by this monitor and its sub-monitors (recursively).
+          Maintained incrementally. Messages must be reported with `add_message` to be counted.
+        class_counts:
+          The number of states of this monitor (not its sub-monitors) per state class, including
+          the states in slices. Maintained incrementally, see `states_per_class()`.
+        kind_counts:
+          The number of messages reported by this monitor (not its sub-monitors) per kind
+          ('error', 'end', and 'info'). Maintained incrementally by `add_message`, see `stats()`.
+        tracer:
+          The object recording the transitions taken by this monitor (see `pycontract_trace.Tracer`),
+          or None. Called for each state vector evaluated, and for each state evaluated in it.
         """
         self.monitors: List[Monitor] = []
         self.is_top_monitor: bool = True
@@ -665,6 +853,13 @@ class Monitor:
         self.event_count: int = 0
         self.option_show_state_event: bool = True
         self.option_print_summary: bool = True
+        self.relevance: Optional[Relevance] = self.declared_relevance()
+        self.parent: Optional[Monitor] = None
+        self.state_count: int = 0
+        self.message_count: int = 0
+        self.class_counts: Dict[type, int] = {}
+        self.kind_counts: Dict[str, int] = {}
+        self.tracer: Optional[object] = None
         # Create always state if outermost transitions exist
         outer_transitions = inspect.getmembers(self, predicate=is_transition_method)
         if len(outer_transitions) > 0:
@@ -685,16 +880,19 @@ class Monitor:
             if not initial_state_found:
                 (name, the_first_class) = state_classes[0]
                 self.add_state_to_state_vector(self.states, the_first_class())
+        self.update_state_counts(set([]), self.states)
 
     def set_event_count(self, initial_value: int):
         """
         Sets the initial value of `event_count` to a different value than 0.
         This is used for example when processing CSV files, where there is a header
         row, which should be counted as an 'event' so that `event_count` will
-        correspond to row number in the CSV file.
+        correspond to row number in the CSV file. The value is also set in sub-monitors.
         :param initial_value: the initial value of `event_count`.
         """
         self.event_count = initial_value
+        for monitor in self.monitors:
+            monitor.set_event_count(initial_value)
 
     def get_monitor_name(self) -> str:
         """
@@ -722,16 +920,99 @@ class Monitor:
         """
         for monitor in monitors:
             monitor.is_top_monitor = False
+            monitor.parent = self
             self.monitors.append(monitor)
+            self.update_counts(monitor.state_count, monitor.message_count)
+
+    def update_counts(self, states: int, messages: int):
+        """
+        Adds to the number of states and messages of this monitor and of the monitors
+        it is a sub-monitor of (recursively).
+        :param states: the change in the number of states.
+        :param messages: the change in the number of messages.
+        """
+        monitor = self
+        while monitor is not None:
+            monitor.state_count += states
+            monitor.message_count += messages
+            monitor = monitor.parent
+
+    def update_state_counts(self, old_states: Set[State], new_states: Set[State]):
+        """
+        Updates the number of states, in total and per state class, when a state vector
+        of this monitor is replaced. Takes time proportional to the size of the two vectors.
+        :param old_states: the states of the replaced state vector, empty for a new slice.
+        :param new_states: the states of the new state vector.
+        """
+        class_counts = self.class_counts
+        for state in old_states:
+            class_counts[type(state)] -= 1
+        for state in new_states:
+            state_class = type(state)
+            class_counts[state_class] = class_counts.get(state_class, 0) + 1
+        self.update_counts(len(new_states) - len(old_states), 0)
+
+    def relevant_event_classes(self) -> Optional[List[type]]:
+        """
+        Returns the event classes this monitor is interested in. Returns None
+        by default, meaning that relevance is not declared by class. Can be
+        overridden by the user.
+        :return: the relevant event classes, or None.
+        """
+        return None
+
+    def relevant_values(self) -> Optional[Dict[object, List[object]]]:
+        """
+        Returns the values of discriminator columns this monitor is interested in,
+        as a map from column names (or positions for rows that are lists) to values,
+        for example: `{'name': ['command', 'dispatch']}`. Returns None by default,
+        meaning that relevance is not declared by value. Can be overridden by the user.
+        :return: the relevant column values, or None.
+        """
+        return None
+
+    def declared_relevance(self) -> Optional[Relevance]:
+        """
+        Returns the relevance declared by this monitor (not including sub-monitors)
+        by overriding `relevant_event_classes` and/or `relevant_values`.
+        :return: the declared relevance, or None if nothing is declared.
+        """
+        classes = self.relevant_event_classes()
+        values = self.relevant_values()
+        if classes is None and values is None:
+            return None
+        return Relevance(classes, values)
+
+    def get_relevance(self) -> Optional[Relevance]:
+        """
+        Returns the relevance of this monitor including its sub-monitors (recursively),
+        which is the union of their declared relevance. A monitor that has no states
+        of its own, and only serves to group sub-monitors, need not declare relevance itself.
+        The result is passed to readers so they can skip irrelevant rows early.
+        :return: the combined relevance, or None if some monitor considers all events relevant.
+        """
+        result = self.relevance
+        if result is None:
+            if self.monitors and not self.states and type(self).eval is Monitor.eval:
+                result = Relevance()
+            else:
+                return None
+        for monitor in self.monitors:
+            relevance = monitor.get_relevance()
+            if relevance is None:
+                return None
+            result = result.union(relevance)
+        return result
 
     def is_relevant(self, event: Event) -> bool:
         """
         Returns True if the event should be monitored. By default all submitted events
-        are monitored. This method is meant to be overridden by the user.
+        are monitored, unless relevance has been declared with `relevant_event_classes`
+        or `relevant_values`. This method is meant to be overridden by the user.
         :param event: the incoming event.
         :return: True if the event should be monitored.
         """
-        return True
+        return self.relevance is None or self.relevance.admits_event(event)
 
     def eval(self, event: Event):
         """
@@ -745,39 +1026,60 @@ class Monitor:
         if Debug.DEBUG_PROGRESS and self.is_top_monitor and self.event_count % Debug.DEBUG_PROGRESS == 0:
             debug(f'---------------------> {self.event_count}')
         if Debug.DEBUG and self.is_top_monitor:
-            debug_frame("=", f'Event {self.event_count} {event}')
+            if Debug.DEBUG_STATES:
+                debug_frame("=", f'Event {self.event_count} {event}')
+            else:
+                debug(f'Event {self.event_count} {event}')
         for monitor in self.monitors:
             monitor.eval(event)
-        if Debug.DEBUG:
+        if Debug.DEBUG and Debug.DEBUG_STATES:
             debug_frame("#", f'Monitor {self.get_monitor_name()}')
         if self.is_relevant(event):
             index = self.key(event)
             if index is None:
                 new_states = self.eval_states(event, self.states)
                 if new_states is not None:
+                    self.update_state_counts(self.states, new_states)
                     self.states = new_states
                 for (idx, states) in self.states_indexed.items():
-                    new_states = self.eval_states(event, states)
+                    new_states = self.eval_states(event, states, idx)
                     if new_states is not None:
+                        self.update_state_counts(states, new_states)
                         self.states_indexed[idx] = new_states
             else:
                 if index in self.states_indexed:
                     states = self.states_indexed[index]
+                    old_states = states
                 else:
                     states = self.states
-                new_states = self.eval_states(event, states)
+                    old_states = set([])
+                new_states = self.eval_states(event, states, index)
                 if new_states is not None:
+                    self.update_state_counts(old_states, new_states)
                     self.states_indexed[index] = new_states
-        if Debug.DEBUG:
+        if Debug.DEBUG and Debug.DEBUG_STATES:
             debug(f'\n{self}')
 
-    def eval_states(self, event: Event, states: Set[State]) -> Optional[Set[State]]:
+    def eval_many(self, events: Iterable[Event]):
+        """
+        Submits a batch of events to the monitor, in order. Used when events are
+        handed over in batches, for example from another thread.
+        :param events: the events.
+        """
+        for event in events:
+            self.eval(event)
+
+    def eval_states(self, event: Event, states: Set[State], key: Optional[object] = None) -> Optional[Set[State]]:
         """
         Evaluates an event on each state in a set of states.
         :param event: the event to evaluate.
         :param states: the set of states to evaluate it on.
+        :param key: the key of the slice the states belong to, None for the main state vector.
         :return: the resulting set of states. None is returned if no transitions fired.
         """
+        tracer = self.tracer
+        if tracer is not None and not tracer.traces(self, key):
+            tracer = None
         transition_triggered = False
         states_to_remove = set([])
         states_to_add = set([])
@@ -785,7 +1087,13 @@ class Monitor:
         for source_state in states:
             resulting_states = source_state.eval(event)
             if Debug.DEBUG:
-                debug(f'{source_state} results in {mk_string("[",", ","]", resulting_states)}')
+                if Debug.DEBUG_STATES:
+                    debug(f'{source_state} results in {mk_string("[",", ","]", resulting_states)}')
+                else:
+                    suffix = '' if key is None else f'[{key!r}]'
+                    debug(f'  {self.get_monitor_name()}{suffix}: {source_state} results in {mk_string("[",", ","]", resulting_states)}')
+            if tracer is not None:
+                tracer.record(self, key, source_state, resulting_states)
             transition_triggered = True
             states_to_remove.add(source_state)
             for target_state in resulting_states:
@@ -874,7 +1182,7 @@ class Monitor:
             text += f'    state {state}\n'
             text += f'    event {self.event_count} {event}\n'
         text += f'    {error_state.text}'
-        self.messages.append(Message(text, error_state.data))
+        self.add_message(Message(text, error_state.data, 'error'))
         print(text)
 
     def report_transition_information(self, state: State, event: Event, info_state: InfoState):
@@ -887,7 +1195,7 @@ class Monitor:
         """
         text = f'--- message from {self.get_monitor_name()}:\n'
         text += f'    {info_state.text}'
-        self.messages.append(Message(text, info_state.data))
+        self.add_message(Message(text, info_state.data))
         print(text)
 
     def report_end_error(self, text: str):
@@ -898,7 +1206,7 @@ class Monitor:
         """
         message = f'*** error at end in {self.get_monitor_name()}:\n'
         message += f'    {text}'
-        self.messages.append(Message(message, None))
+        self.add_message(Message(message, None, 'end'))
         print(message)
 
     def report_error(self, text: str, obj: object = None):
@@ -909,7 +1217,7 @@ class Monitor:
         """
         message = f'*** error in {self.get_monitor_name()}:\n'
         message += f'    {text}'
-        self.messages.append(Message(message, obj))
+        self.add_message(Message(message, obj, 'error'))
         print(message)
 
     def report_information(self, text: str, obj: object = None):
@@ -920,9 +1228,19 @@ class Monitor:
         """
         message = f'--- message from {self.get_monitor_name()}:\n'
         message += f'    {text}'
-        self.messages.append(Message(message, obj))
+        self.add_message(Message(message, obj))
         print(message)
 
+    def add_message(self, message: Message):
+        """
+        Records a message, and counts it in this monitor and the monitors it
+        is a sub-monitor of.
+        :param message: the message.
+        """
+        self.messages.append(message)
+        self.kind_counts[message.kind] = self.kind_counts.get(message.kind, 0) + 1
+        self.update_counts(0, 1)
+
     def exists(self, predicate: Callable[[State], bool]) -> bool:
         """
         Returns True if there exists a state s in the monitor's state vector, for
@@ -930,7 +1248,9 @@ class Monitor:
         :param predicate: the predicate to apply to states in the state vector.
         :return: True if a state exists in the state vector for which the predicate is True.
         """
-        return any(predicate(state) for state in self.get_all_states())
+        if any(predicate(state) for state in self.states):
+            return True
+        return any(predicate(state) for states in list(self.states_indexed.values()) for state in states)
 
     def contains_state(self, state: State) -> bool:
         """
@@ -939,7 +1259,7 @@ class Monitor:
         :param state: the state to check membership for.
         :return: True if the state is in the state vector.
         """
-        return state in self.get_all_states()
+        return state in self.states or any(state in states for states in self.states_indexed.values())
 
     def get_all_states(self) -> Set[State]:
         """
@@ -948,21 +1268,19 @@ class Monitor:
         :return: all states of the monitor.
         """
         result = self.states.copy()
-        for (index, states) in self.states_indexed.items():
-            result = result.union(states)
+        for states in self.states_indexed.values():
+            result.update(states)
         return result
 
     def get_message_count(self) -> int:
         """
         Returns the number of messages reported by the monitor. It is the sum
         of the messages reported by this monitor plus the messages reported by
-        sub-monitors (recursively).
+        sub-monitors (recursively). The number is maintained incrementally, so this
+        takes constant time.
         :return: the number of messages reported.
         """
-        result = len(self.messages)
-        for monitor in self.monitors:
-            result += monitor.get_message_count()
-        return result
+        return self.message_count
 
     def get_all_message_texts(self) -> List[str]:
         """
@@ -978,23 +1296,82 @@ class Monitor:
         (recursively). Each message is represented by a `Message` object.
         :return: the messages recorded by this monitor.
         """
-        result = self.messages.copy()
-        for monitor in self.monitors:
-            result += monitor.get_all_messages()
+        result = []
+        self.collect_messages(result)
         return result
 
+    def collect_messages(self, result: List[Message]):
+        """
+        Appends the messages recorded by this monitor and its sub-monitors (recursively) to a list.
+        :param result: the list.
+        """
+        result.extend(self.messages)
+        for monitor in self.monitors:
+            monitor.collect_messages(result)
+
     def number_of_states(self) -> int:
         """
-        Returns number of states stored.
+        Returns number of states stored, including those of sub-monitors (recursively).
+        The number is maintained incrementally, so this takes constant time.
         :return: number of states stored.
         """
-        result = len(self.states)
-        for (idx, states) in self.states_indexed.items():
-            result += len(states)
+        return self.state_count
+
+    def states_per_class(self) -> Dict[str, int]:
+        """
+        Returns the number of states per state class (named `monitor.state`, as in `stats()`) of
+        this monitor and its sub-monitors (recursively), including the states in slices. The numbers
+        are maintained incrementally, so this takes time proportional to the number of monitors and
+        state classes, not to the number of states.
+        :return: the number of states per state class, for classes with states.
+        """
+        result = {}
+        self.add_states_per_class(result)
+        return result
+
+    def add_states_per_class(self, result: Dict[str, int]):
+        """
+        Adds the number of states per state class of this monitor and its sub-monitors
+        to the numbers being collected by `states_per_class()`.
+        :param result: the numbers collected so far.
+        """
+        for (state_class, count) in list(self.class_counts.items()):
+            if count > 0:
+                name = f'{self.get_monitor_name()}.{state_class.__name__}'
+                result[name] = result.get(name, 0) + count
         for monitor in self.monitors:
-            result += monitor.number_of_states()
+            monitor.add_states_per_class(result)
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Returns a snapshot of statistics about the monitor, aggregated over its sub-monitors
+        (recursively): the number of events processed, the number of live states in total and
+        per state class (named `monitor.state`, as in `states_per_class()`), the number of slices,
+        and the number of messages per kind ('error', 'end', and 'info'). The statistics are built
+        from the counters maintained incrementally, so this takes time proportional to the number
+        of monitors and state classes, not to the number of states or messages. The snapshot is
+        taken without locking, and may be taken by another thread than the one evaluating events.
+        :return: the statistics.
+        """
+        result = {'monitor': self.get_monitor_name(), 'events': self.event_count, 'states': self.state_count,
+                  'states_per_class': self.states_per_class(), 'slices': 0,
+                  'messages': {'error': 0, 'end': 0, 'info': 0}}
+        self.add_stats(result)
         return result
 
+    def add_stats(self, result: Dict[str, object]):
+        """
+        Adds the numbers of slices and of messages per kind of this monitor and its sub-monitors
+        to the statistics being collected by `stats()`.
+        :param result: the statistics collected so far.
+        """
+        result['slices'] += len(self.states_indexed)
+        messages = result['messages']
+        for (kind, count) in list(self.kind_counts.items()):
+            messages[kind] = messages.get(kind, 0) + count
+        for monitor in self.monitors:
+            monitor.add_stats(result)
+
     def errors_found(self) -> bool:
         """
         Returns True if errors have been found.
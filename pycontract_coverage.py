@@ -0,0 +1,168 @@
+
+import os
+import ast
+import inspect
+import textwrap
+from typing import List, Dict, Set, Tuple, Callable, Optional
+from pycontract_core import is_state_class
+
+"""
+Template of the function creating an instrumented transition function. The transition
+function is defined inside it, such that it refers to the coverage object through a
+closure variable, and not through a global variable of the monitor's module.
+"""
+MAKER_TEMPLATE = 'def __make__(__coverage__):\n    return transition\n'
+
+
+class Coverage:
+    '''
+    Records how often each transition of the monitors of given classes fires, for showing
+    the counts on the PlantUML diagrams generated by `visualize`. The transition functions
+    are rewritten: before each statement from which `visualize` draws an arrow (a return
+    statement, or the last statement of a path through the if and match statements of the
+    function), a call is inserted counting that the statement was reached. Example of use:
+
+        coverage = Coverage(Auction)
+        coverage.install()  # before creating the monitors
+        Auction().verify(trace)
+        coverage.uninstall()
+        visualize('auction.py', png=True, coverage=coverage)
+
+    In the diagram each arrow is labeled with its count in brackets, hot arrows (fired at
+    least `hot_fraction` times as often as the most frequent arrow of the monitor) are red,
+    and arrows never fired are grey and dashed. Transition functions that are decorated, or
+    that refer to variables of enclosing functions, are not rewritten, and their arrows are
+    shown without counts.
+    '''
+
+    def __init__(self, *monitor_classes: type, hot_fraction: float = 0.5):
+        '''
+        :param monitor_classes: the monitor classes whose transitions are counted.
+        :param hot_fraction: the fraction of the highest count from which a transition is hot.
+
+        counts: maps (file, state name, line) to the number of times the statement at that line
+        of the transition function of the state was reached.
+        '''
+        self.monitor_classes = monitor_classes
+        self.hot_fraction = hot_fraction
+        self.counts: Dict[Tuple[str, str, int], int] = {}
+        self.installed: List[Tuple[type, Callable]] = []
+        self.rewritten: Set[Tuple[str, str]] = set()
+
+    def hit(self, file: str, state: str, line: int):
+        '''
+        Counts that a transition fired. Called from the rewritten transition functions.
+        :param file: the file containing the transition function.
+        :param state: the name of the state.
+        :param line: the line of the statement reached.
+        '''
+        key = (file, state, line)
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def count(self, file: str, state: str, line: int) -> Optional[int]:
+        '''
+        Returns how often a transition fired.
+        :param file: the file containing the transition function.
+        :param state: the name of the state, `__Always__` for transitions defined in the monitor itself.
+        :param line: the line of the statement from which the transition is drawn.
+        :return: the count, or None if the transition function was not rewritten.
+        '''
+        file = os.path.realpath(file)
+        if (file, state) not in self.rewritten:
+            return None
+        return self.counts.get((file, state, line), 0)
+
+    def transition_functions(self, monitor_class: type) -> List[Tuple[type, str, Callable]]:
+        '''
+        Returns the transition functions defined in a monitor class and its state classes.
+        :param monitor_class: the monitor class.
+        :return: triples (class defining the function, state name, function).
+        '''
+        result = []
+        if 'transition' in monitor_class.__dict__:
+            result.append((monitor_class, '__Always__', monitor_class.__dict__['transition']))
+        for (_, state_class) in inspect.getmembers(monitor_class, predicate=is_state_class):
+            if 'transition' in state_class.__dict__:
+                result.append((state_class, state_class.__name__, state_class.__dict__['transition']))
+        return result
+
+    def install(self):
+        '''
+        Rewrites the transition functions of the monitor classes. Must be called before the
+        monitors are created, since monitors with a transition function defined in the
+        monitor class itself copy that function when created.
+        '''
+        for monitor_class in self.monitor_classes:
+            for (owner, state, function) in self.transition_functions(monitor_class):
+                if (owner, function) in self.installed:
+                    continue
+                instrumented = self.instrument_function(function, state)
+                if instrumented is not None:
+                    self.installed.append((owner, function))
+                    self.rewritten.add((os.path.realpath(function.__code__.co_filename), state))
+                    owner.transition = instrumented
+
+    def uninstall(self):
+        '''
+        Restores the original transition functions. The counts are kept.
+        '''
+        for (owner, function) in reversed(self.installed):
+            owner.transition = function
+        self.installed = []
+
+    def instrument_function(self, function: Callable, state: str) -> Optional[Callable]:
+        '''
+        Rewrites a transition function such that it counts the transitions fired.
+        :param function: the transition function.
+        :param state: the name of the state the function belongs to.
+        :return: the rewritten function, or None if it cannot be rewritten.
+        '''
+        if not inspect.isfunction(function) or function.__code__.co_freevars:
+            return None
+        try:
+            source = inspect.getsource(function)
+        except (OSError, TypeError):
+            return None
+        definition = ast.parse(textwrap.dedent(source)).body[0]
+        if not isinstance(definition, ast.FunctionDef) or definition.name != 'transition' or definition.decorator_list:
+            return None
+        ast.increment_lineno(definition, function.__code__.co_firstlineno - 1)
+        file = os.path.realpath(function.__code__.co_filename)
+        self.insert_hits(definition.body, file, state)
+        module = ast.parse(MAKER_TEMPLATE)
+        module.body[0].body.insert(0, definition)
+        ast.fix_missing_locations(module)
+        namespace = {}
+        exec(compile(module, function.__code__.co_filename, 'exec'), function.__globals__, namespace)
+        instrumented = namespace['__make__'](self)
+        instrumented.__qualname__ = function.__qualname__
+        instrumented.__defaults__ = function.__defaults__
+        return instrumented
+
+    def insert_hits(self, stmts: List[ast.stmt], file: str, state: str):
+        '''
+        Inserts calls of `hit` before the statements from which `visualize` draws arrows,
+        following the same paths through if and match statements.
+        :param stmts: the statements of a block.
+        :param file: the file containing the transition function.
+        :param state: the name of the state.
+        '''
+        if not stmts:
+            return
+        stmt = stmts[-1]
+        if isinstance(stmt, ast.If):
+            self.insert_hits(stmt.body, file, state)
+            self.insert_hits(stmt.orelse, file, state)
+        elif isinstance(stmt, ast.Match):
+            for match_case in stmt.cases:
+                self.insert_hits(match_case.body, file, state)
+        else:
+            hit = ast.parse(f'__coverage__.hit({file!r}, {state!r}, {stmt.lineno})').body[0]
+            ast.increment_lineno(hit, stmt.lineno - 1)
+            stmts.insert(len(stmts) - 1, hit)
+
+    def __str__(self) -> str:
+        lines = ['', 'Transition coverage:', '']
+        for ((file, state, line), count) in sorted(self.counts.items()):
+            lines.append(f'{os.path.basename(file)}:{line} {state}: {count}')
+        return '\n'.join(lines)
@@ -1,6 +1,8 @@
 import csv
-from typing import Optional, List, Callable
+from typing import Optional, List, Dict, Callable
 import pandas as pd
+from pycontract_core import Relevance
+from pycontract_compressed import open_log
 # import xlrd
 
 class CSVReader:
@@ -13,33 +15,55 @@ class CSVReader:
         for event in csv:
             ...
     """
-    def __init__(self, file: str, converter: Callable[[List[str]], object], skip: int = 0):
+    def __init__(self, file: str, converter: Callable[[List[str]], object], skip: int = 0,
+                 relevance: Optional[Relevance] = None,
+                 classify: Optional[Callable[[List[str]], Optional[type]]] = None,
+                 column_names: Optional[List[str]] = None):
         """
         The file is the csv file to read, assumed to consist of lines,
-        each comma separated.
+        each comma separated. Files compressed with gzip (.gz), bzip2 (.bz2)
+        or xz (.xz, .lzma) are decompressed on the fly.
 
         :param file: the csv file.
         :param converter: a function that converts one line into an event
         processed by the monitor.
         :param skip: number of lines in CSV file to skip initially (headers usually).
+        :param relevance: when not None, lines that cannot give rise to relevant events
+        are skipped before being converted. Usually obtained with `monitor.get_relevance()`.
+        Column values are identified by position in the line. Columns declared by name are
+        mapped to positions with `column_names`, and a `ValueError` is raised if they are not given.
+        :param classify: optional function returning the event class a line will be
+        converted to, allowing lines to be skipped based on relevant event classes.
+        :param column_names: the names of the columns of the lines, used to map relevant
+        columns declared by name to positions.
 
         line_count: the number of lines read from CSV file.
         """
+        if relevance is not None:
+            if column_names is not None:
+                relevance = relevance.on_columns(column_names)
+            elif any(not isinstance(column, int) for column in relevance.values):
+                raise ValueError(f'{file}: relevance declares columns by name, column_names must be given')
         self.file = file
-        self.csv_file = open(file)
+        self.csv_file = open_log(file)
         self.csv_reader = csv.reader(self.csv_file)
         self.converter = converter
+        self.relevance = relevance
+        self.classify = classify
         self.line_count = 0
         for x in range(skip):
-            self.__next__()
+            self.line_count += 1
+            self.csv_reader.__next__()
 
     def __iter__(self):
         return self
 
     def __next__(self):
-        self.line_count += 1
-        next = self.csv_reader.__next__()
-        return self.converter(next)
+        while True:
+            self.line_count += 1
+            next = self.csv_reader.__next__()
+            if self.relevance is None or self.relevance.admits_row(next, self.classify):
+                return self.converter(next)
 
     def close(self):
         self.csv_file.close()
@@ -80,13 +104,23 @@ class CSVSource:
     Alternative (newer) class for reading CSV file.
     '''
 
-    def __init__(self, file: str):
+    def __init__(self, file: str, relevance: Optional[Relevance] = None,
+                 classify: Optional[Callable[[List[str]], Optional[type]]] = None):
         '''
-        :param file: name of CSV or XLS file to be read from.
+        :param file: name of CSV or XLS file to be read from. CSV files compressed with
+        gzip (.gz), bzip2 (.bz2) or xz (.xz, .lzma) are decompressed on the fly.
+        :param relevance: when not None, rows that cannot give rise to relevant events
+        are skipped before being turned into dictionaries. Usually obtained with
+        `monitor.get_relevance()`.
+        :param classify: optional function returning the event class a row (as a list
+        of strings) will be converted to, allowing rows to be skipped based on relevant event classes.
         '''
         self.file = get_csv_filename(file)
-        self.csv_file = open(self.file)
+        self.csv_file = open_log(self.file)
         self.csv_reader = None
+        self.relevance = relevance
+        self.classify = classify
+        self.fieldnames: Optional[List[str]] = None
         self.line_count = 0
 
     def column_names(self) -> Optional[List[str]]:
@@ -100,7 +134,14 @@ class CSVSource:
 
     def __enter__(self):
         names = self.column_names()
-        if names is None:
+        if self.relevance is not None:
+            # rows are read as lists and only turned into dictionaries if relevant.
+            self.csv_reader = csv.reader(self.csv_file)
+            if names is None:
+                names = next(self.csv_reader, [])
+            self.fieldnames = names
+            self.relevance = self.relevance.on_columns(names)
+        elif names is None:
             self.csv_reader = csv.DictReader(self.csv_file)
         else:
             self.csv_reader = csv.DictReader(self.csv_file, fieldnames=names)
@@ -113,9 +154,30 @@ class CSVSource:
         return self
 
     def __next__(self):
-        self.line_count += 1
-        if self.line_count % 100000 == 0:
-            print(f'- {self.line_count}')
-        the_next = self.csv_reader.__next__()
-        return the_next
+        while True:
+            self.line_count += 1
+            if self.line_count % 100000 == 0:
+                print(f'- {self.line_count}')
+            the_next = self.csv_reader.__next__()
+            if self.relevance is None:
+                return the_next
+            if the_next and self.relevance.admits_row(the_next, self.classify):
+                return self.mk_dict(the_next)
+
+    def mk_dict(self, row: List[str]) -> Dict[Optional[str], object]:
+        '''
+        Turns a row into a dictionary indexed by the column names,
+        the same way as `csv.DictReader` does.
+        :param row: the row to convert.
+        :return: the dictionary.
+        '''
+        result = dict(zip(self.fieldnames, row))
+        nr_of_names = len(self.fieldnames)
+        nr_of_values = len(row)
+        if nr_of_names < nr_of_values:
+            result[None] = row[nr_of_names:]
+        elif nr_of_names > nr_of_values:
+            for name in self.fieldnames[nr_of_values:]:
+                result[name] = None
+        return result
 
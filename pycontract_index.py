@@ -0,0 +1,208 @@
+
+import io
+import os
+import csv
+import json
+import heapq
+import struct
+from array import array
+from typing import Optional, List, Dict, Callable, Iterator, Tuple, BinaryIO
+from pycontract_core import Monitor
+
+
+def read_record(log: BinaryIO) -> bytes:
+    """
+    Reads one record of a CSV file, which spans several lines if a quoted field contains
+    line breaks. A record is complete when it contains an even number of quote characters,
+    since quote characters inside quoted fields are doubled.
+    :param log: the file, positioned at the start of a record.
+    :return: the record, including its line breaks, empty at end of file.
+    """
+    record = log.readline()
+    while record.count(b'"') % 2 == 1:
+        line = log.readline()
+        if not line:
+            break
+        record += line
+    return record
+
+
+def parse_line(line: bytes) -> List[str]:
+    """
+    Parses a single record of a CSV file.
+    :param line: the record as read from the file with `read_record`.
+    :return: the list of comma separated values, empty for an empty line.
+    """
+    return next(csv.reader(io.StringIO(line.decode(), newline='')), [])
+
+
+class SliceIndex:
+    '''
+    A sidecar index for a CSV log file, mapping each slice key (as returned by the
+    `key` method of a monitor) to the byte offsets of the rows of that slice.
+    It allows re-verifying a single slice, for example to debug an error reported
+    for one lock among millions of rows, without processing the entire log.
+    Example of use:
+
+        index = SliceIndex('log.csv', converter)
+        index.build(AcquireRelease())     # once, one pass over the log
+        set_debug(True)
+        index.replay_slice('LOCK_27', AcquireRelease())
+
+    The index is stored in the file `log.csv.idx`. Rows are indexed by CSV record, such
+    that quoted fields containing line breaks are handled as by `csv.reader`. Rows with no key (key None) are
+    sent to all slices, and are hence replayed together with any slice.
+    Event numbers are preserved: the event numbers in messages reported during a replay
+    are the same as when monitoring the whole log, assuming rows converted to None are
+    not submitted to the monitor.
+    '''
+
+    def __init__(self, file: str, converter: Callable[[object], object], header: bool = False,
+                 index_file: Optional[str] = None):
+        '''
+        :param file: the CSV log file.
+        :param converter: function converting a row into an event, or None if the row is
+        not an event. A row is a list of strings, or a dictionary if `header` is True.
+        :param header: True if the first line of the file contains column names.
+        :param index_file: the name of the sidecar file, by default the log file name followed by `.idx`.
+        '''
+        self.file = file
+        self.converter = converter
+        self.header = header
+        self.index_file = index_file if index_file is not None else f'{file}.idx'
+        self.fieldnames: Optional[List[str]] = None
+        self.contents: Optional[Dict[str, object]] = None
+
+    def convert(self, line: bytes) -> object:
+        '''
+        Converts a record of the log into an event.
+        :param line: the record.
+        :return: the event, or None if the record is not an event.
+        '''
+        row = parse_line(line)
+        if not row:
+            return None
+        if self.fieldnames is not None:
+            return self.converter(dict(zip(self.fieldnames, row)))
+        return self.converter(row)
+
+    def build(self, monitor: Monitor):
+        '''
+        Builds the index in one pass over the log, using the `key` method of the monitor.
+        The monitor is only used for computing keys, no events are submitted to it.
+        :param monitor: the monitor defining the slices.
+        '''
+        slices: Dict[str, array] = {}
+        unkeyed = array('q')
+        with open(self.file, 'rb') as log:
+            offset = 0
+            event_nr = 0
+            if self.header:
+                line = read_record(log)
+                offset += len(line)
+                self.fieldnames = parse_line(line)
+            while line := read_record(log):
+                event = self.convert(line)
+                if event is not None:
+                    event_nr += 1
+                    key = monitor.key(event)
+                    if key is None:
+                        rows = unkeyed
+                    else:
+                        rows = slices.setdefault(repr(key), array('q'))
+                    rows.append(offset)
+                    rows.append(event_nr)
+                offset += len(line)
+        table: Dict[str, Tuple[int, int]] = {}
+        with open(self.index_file, 'wb') as index:
+            for (key, rows) in slices.items():
+                table[key] = (index.tell(), len(rows))
+                rows.tofile(index)
+            unkeyed_position = (index.tell(), len(unkeyed))
+            unkeyed.tofile(index)
+            contents_position = index.tell()
+            stat = os.stat(self.file)
+            self.contents = {
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'fieldnames': self.fieldnames,
+                'events': event_nr,
+                'unkeyed': unkeyed_position,
+                'slices': table
+            }
+            index.write(json.dumps(self.contents).encode())
+            index.write(struct.pack('<q', contents_position))
+
+    def load(self) -> Dict[str, object]:
+        '''
+        Loads the table of contents of the index, which is stored at the end of the index
+        file. The table of contents maps each key to the position of its rows in the index file.
+        Raises `ValueError` if the log has changed since the index was built.
+        :return: the table of contents.
+        '''
+        if self.contents is None:
+            with open(self.index_file, 'rb') as index:
+                index.seek(-8, os.SEEK_END)
+                (contents_position,) = struct.unpack('<q', index.read(8))
+                end = index.tell() - 8
+                index.seek(contents_position)
+                contents = json.loads(index.read(end - contents_position))
+            stat = os.stat(self.file)
+            if (contents['size'], contents['mtime']) != (stat.st_size, stat.st_mtime):
+                raise ValueError(f'index {self.index_file} is out of date, rebuild it')
+            self.contents = contents
+            self.fieldnames = contents['fieldnames']
+        return self.contents
+
+    def keys(self) -> List[str]:
+        '''
+        Returns the keys of all slices in the index, each represented by its `repr`.
+        :return: the keys.
+        '''
+        return list(self.load()['slices'].keys())
+
+    def read_rows(self, position: Tuple[int, int]) -> array:
+        '''
+        Reads the rows of one slice from the index file.
+        :param position: the position in the index file and the number of values stored.
+        :return: the row offsets interleaved with event numbers.
+        '''
+        (start, length) = position
+        rows = array('q')
+        with open(self.index_file, 'rb') as index:
+            index.seek(start)
+            rows.fromfile(index, length)
+        return rows
+
+    def slice_events(self, key: object) -> Iterator[Tuple[int, object]]:
+        '''
+        Returns the events of a slice, including the unkeyed events, in the order they
+        occur in the log, each paired with its event number.
+        :param key: the key of the slice.
+        :return: iterator over (event number, event) pairs.
+        '''
+        contents = self.load()
+        slices = contents['slices']
+        rows = self.read_rows(slices[repr(key)]) if repr(key) in slices else array('q')
+        unkeyed = self.read_rows(contents['unkeyed'])
+        keyed_pairs = zip(rows[0::2], rows[1::2])
+        unkeyed_pairs = zip(unkeyed[0::2], unkeyed[1::2])
+        with open(self.file, 'rb') as log:
+            for (offset, event_nr) in heapq.merge(keyed_pairs, unkeyed_pairs):
+                log.seek(offset)
+                yield event_nr, self.convert(read_record(log))
+
+    def replay_slice(self, key: object, monitor: Monitor, end: bool = True) -> Monitor:
+        '''
+        Submits the events of one slice, and the unkeyed events, to a fresh monitor.
+        :param key: the key of the slice, as returned by the `key` method of the monitor.
+        :param monitor: the fresh monitor to submit the events to.
+        :param end: when True `end()` is called on the monitor after the last event.
+        :return: the monitor.
+        '''
+        for (event_nr, event) in self.slice_events(key):
+            monitor.set_event_count(event_nr - 1)
+            monitor.eval(event)
+        if end:
+            monitor.end()
+        return monitor
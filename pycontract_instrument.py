@@ -0,0 +1,265 @@
+
+import sys
+import inspect
+import functools
+import threading
+from types import CodeType
+from typing import List, Dict, Callable, Optional
+from pycontract_core import Monitor, data
+
+"""
+True if the `sys.monitoring` API (PEP 669, Python 3.12+) is available. Otherwise
+instrumented functions are wrapped, which has a higher overhead.
+"""
+HAS_SYS_MONITORING = hasattr(sys, 'monitoring')
+
+"""
+The `sys.monitoring` tool identifiers tried by an `Instrumenter`, in order: first the ones
+not reserved for a tool kind, then those reserved for debuggers (0), coverage tools (1),
+profilers (2) and optimizers (5), only if the others are taken.
+"""
+TOOL_IDS = [3, 4, 0, 1, 2, 5]
+
+
+@data
+class Call:
+    """
+    Event emitted when an instrumented function is called.
+    """
+    function: str
+    arguments: Dict[str, object]
+
+
+@data
+class Return:
+    """
+    Event emitted when an instrumented function returns (not when it raises an exception).
+    """
+    function: str
+    value: object
+
+
+def argument_names(code: CodeType) -> List[str]:
+    """
+    Returns the names of the parameters of a function, in order, including
+    *args and **kwargs parameters.
+    :param code: the code object of the function.
+    :return: the parameter names.
+    """
+    count = code.co_argcount + code.co_kwonlyargcount
+    count += bool(code.co_flags & inspect.CO_VARARGS) + bool(code.co_flags & inspect.CO_VARKEYWORDS)
+    return list(code.co_varnames[:count])
+
+
+class Instrumenter:
+    '''
+    Instruments chosen functions and methods such that each call and return is submitted
+    to a monitor as a `Call` and a `Return` event, with the arguments and the return value,
+    without modifying the call sites. Example of use:
+
+        instrumenter = Instrumenter(LockOrder())
+
+        @instrumenter.instrument
+        def acquire(thread, lock): ...
+
+        instrumenter.instrument_class(Scheduler)
+        instrumenter.enable()
+        ...
+        instrumenter.end()
+
+    The `sys.monitoring` tool identifier claimed by the instrumenter is only released by
+    `end()`, so an instrumenter can also be used as a context manager, calling `end()` on exit:
+
+        with Instrumenter(LockOrder()) as instrumenter:
+            ...
+
+    With Python 3.12+ the `sys.monitoring` API is used: `PY_START` and `PY_RETURN` events are
+    enabled locally, only for the code objects of the instrumented functions, which are not
+    modified. When monitoring is disabled the local events are switched off, and calling an
+    instrumented function costs nothing extra. With older versions each instrumented function
+    is wrapped by a function checking whether monitoring is enabled.
+
+    Events are collected in a buffer, which is submitted to the monitor with `Monitor.eval_many`
+    when `batch_size` events have been collected, and by `flush()`. The monitor hence evaluates
+    events with a delay, in the thread calling the instrumented function that fills the buffer.
+    Threads calling instrumented functions add events to the buffer, and submit it, under a lock,
+    such that no event is lost and the monitor is called by one thread at a time.
+    '''
+
+    def __init__(self, monitor: Monitor, batch_size: int = 1000):
+        '''
+        :param monitor: the monitor to submit the events to.
+        :param batch_size: the number of events collected before submitting them to the monitor.
+
+        event_count: the number of events emitted.
+        '''
+        self.monitor = monitor
+        self.batch_size = batch_size
+        self.buffer: List[object] = []
+        self.lock = threading.RLock()
+        self.flushing = False
+        self.enabled = False
+        self.event_count = 0
+        self.names: Dict[CodeType, str] = {}
+        self.arguments: Dict[CodeType, List[str]] = {}
+        self.tool_id: Optional[int] = None
+        if HAS_SYS_MONITORING:
+            self.tool_id = self.acquire_tool_id()
+            events = sys.monitoring.events
+            sys.monitoring.register_callback(self.tool_id, events.PY_START, self.on_start)
+            sys.monitoring.register_callback(self.tool_id, events.PY_RETURN, self.on_return)
+
+    @staticmethod
+    def acquire_tool_id() -> int:
+        '''
+        Claims a free `sys.monitoring` tool identifier, see `TOOL_IDS`.
+        :return: the tool identifier.
+        '''
+        for tool_id in TOOL_IDS:
+            if sys.monitoring.get_tool(tool_id) is None:
+                sys.monitoring.use_tool_id(tool_id, 'pycontract')
+                return tool_id
+        assert False, 'no free sys.monitoring tool identifier'
+
+    def instrument(self, function: Callable) -> Callable:
+        '''
+        Instruments a function. Can be used as a decorator.
+        :param function: the function.
+        :return: the function itself with Python 3.12+, otherwise a wrapper, which must be used
+        instead of the function.
+        '''
+        code = function.__code__
+        name = function.__qualname__
+        self.names[code] = name
+        self.arguments[code] = argument_names(code)
+        if HAS_SYS_MONITORING:
+            if self.enabled:
+                sys.monitoring.set_local_events(self.tool_id, code, self.local_events())
+            return function
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return function(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            self.emit(Call(name, dict(bound.arguments)))
+            value = function(*args, **kwargs)
+            self.emit(Return(name, value))
+            return value
+        return wrapper
+
+    def instrument_class(self, cls: type, names: Optional[List[str]] = None):
+        '''
+        Instruments methods of a class, by default all functions defined in the class body.
+        With Python versions before 3.12, the methods are replaced by wrappers.
+        :param cls: the class.
+        :param names: the names of the methods to instrument.
+        '''
+        if names is None:
+            names = [name for (name, value) in vars(cls).items() if inspect.isfunction(value)]
+        for name in names:
+            instrumented = self.instrument(vars(cls)[name])
+            if not HAS_SYS_MONITORING:
+                setattr(cls, name, instrumented)
+
+    @staticmethod
+    def local_events() -> int:
+        '''
+        Returns the `sys.monitoring` events enabled for instrumented code objects.
+        :return: the event set.
+        '''
+        return sys.monitoring.events.PY_START | sys.monitoring.events.PY_RETURN
+
+    def enable(self):
+        '''
+        Enables monitoring of the instrumented functions.
+        '''
+        self.enabled = True
+        if HAS_SYS_MONITORING:
+            for code in self.names:
+                sys.monitoring.set_local_events(self.tool_id, code, self.local_events())
+
+    def disable(self):
+        '''
+        Disables monitoring of the instrumented functions. Events already
+        collected remain in the buffer.
+        '''
+        self.enabled = False
+        if HAS_SYS_MONITORING:
+            for code in self.names:
+                sys.monitoring.set_local_events(self.tool_id, code, 0)
+
+    def on_start(self, code: CodeType, offset: int):
+        '''
+        Callback for the `PY_START` event.
+        :param code: the code object of the called function.
+        :param offset: the instruction offset.
+        '''
+        if code in self.names:
+            frame_locals = sys._getframe(1).f_locals
+            self.emit(Call(self.names[code], {name: frame_locals[name] for name in self.arguments[code]}))
+
+    def on_return(self, code: CodeType, offset: int, value: object):
+        '''
+        Callback for the `PY_RETURN` event.
+        :param code: the code object of the returning function.
+        :param offset: the instruction offset.
+        :param value: the return value.
+        '''
+        if code in self.names:
+            self.emit(Return(self.names[code], value))
+
+    def emit(self, event: object):
+        '''
+        Adds an event to the buffer, and submits the buffer to the monitor when full, unless the
+        event is emitted by an instrumented function called while submitting events.
+        :param event: the event.
+        '''
+        with self.lock:
+            self.event_count += 1
+            self.buffer.append(event)
+            if len(self.buffer) >= self.batch_size and not self.flushing:
+                self.flush()
+
+    def flush(self):
+        '''
+        Submits the events in the buffer to the monitor.
+        '''
+        with self.lock:
+            self.flushing = True
+            try:
+                while self.buffer:
+                    (batch, self.buffer) = (self.buffer, [])
+                    self.monitor.eval_many(batch)
+            finally:
+                self.flushing = False
+
+    def end(self):
+        '''
+        Disables monitoring, submits the remaining events, calls `end()` on the monitor,
+        and releases the `sys.monitoring` tool identifier, also if the monitor raises an exception.
+        '''
+        try:
+            self.disable()
+            self.flush()
+            self.monitor.end()
+        finally:
+            self.release_tool_id()
+
+    def release_tool_id(self):
+        '''
+        Releases the `sys.monitoring` tool identifier, if claimed and not yet released.
+        '''
+        if HAS_SYS_MONITORING and self.tool_id is not None:
+            sys.monitoring.register_callback(self.tool_id, sys.monitoring.events.PY_START, None)
+            sys.monitoring.register_callback(self.tool_id, sys.monitoring.events.PY_RETURN, None)
+            sys.monitoring.free_tool_id(self.tool_id)
+            self.tool_id = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.end()
@@ -0,0 +1,195 @@
+
+import json
+from typing import Optional, List, Dict, TextIO
+from pycontract_compressed import open_log
+
+
+JsonObj = Dict[str, object]
+
+
+def project(obj: object, fields: Optional[List[str]]) -> object:
+    """
+    Restricts a JSON object to a list of fields. Only the keys in `fields` that
+    occur in the object are kept. Values that are not JSON objects (dictionaries),
+    and all values when `fields` is None, are returned unchanged.
+    :param obj: the JSON value to project.
+    :param fields: the keys to keep, or None if all keys should be kept.
+    :return: the projected JSON value.
+    """
+    if fields is None or not isinstance(obj, dict):
+        return obj
+    return {field: obj[field] for field in fields if field in obj}
+
+
+class JSONLSource:
+    '''
+    Class for reading a JSON-Lines file, where each non-empty line contains one
+    JSON value, usually an object, representing an event. The file is read
+    lazily, one line at a time, so arbitrarily large files can be processed.
+    Example of use:
+
+        with JSONLSource('file.jsonl', fields=['id', 'task_id']) as source:
+            for event in source:
+                ...
+    '''
+
+    def __init__(self, file: str, fields: Optional[List[str]] = None):
+        '''
+        :param file: name of JSON-Lines file to be read from, possibly compressed
+        (.gz, .bz2, .xz, .lzma).
+        :param fields: when not None, only these keys are kept in the events
+        (dictionaries) returned.
+        '''
+        self.file = file
+        self.fields = fields
+        self.json_file: TextIO = open_log(self.file)
+        self.decoder = json.JSONDecoder()
+        self.line_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.json_file.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        for line in self.json_file:
+            if line.strip():
+                self.line_count += 1
+                if self.line_count % 100000 == 0:
+                    print(f'- {self.line_count}')
+                return project(self.decoder.decode(line), self.fields)
+        raise StopIteration
+
+    def close(self):
+        self.json_file.close()
+
+
+class JSONSource:
+    '''
+    Class for reading a JSON file containing a top-level array of events,
+    such as:
+
+        [
+          {"id": "dispatch", "task_id": 1, "cmd_nr": 1},
+          {"id": "reply", "task_id": 1, "cmd_nr": 1},
+          ...
+        ]
+
+    In contrast to `json.load`, the array is not loaded into memory as a whole.
+    The file is read in chunks, and the elements of the array are decoded one by
+    one as the source is iterated over. Example of use:
+
+        with JSONSource('file.json') as source:
+            for event in source:
+                ...
+    '''
+
+    def __init__(self, file: str, fields: Optional[List[str]] = None, chunk_size: int = 65536):
+        '''
+        :param file: name of JSON file to be read from, possibly compressed
+        (.gz, .bz2, .xz, .lzma).
+        :param fields: when not None, only these keys are kept in the events
+        (dictionaries) returned.
+        :param chunk_size: the number of characters read from the file at a time.
+        '''
+        self.file = file
+        self.fields = fields
+        self.chunk_size = chunk_size
+        self.json_file: TextIO = open_log(self.file)
+        self.decoder = json.JSONDecoder()
+        self.buffer: str = ''
+        self.position: int = 0
+        self.eof: bool = False
+        self.started: bool = False
+        self.finished: bool = False
+        self.line_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.json_file.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.started:
+            self.started = True
+            if self.next_char() != '[':
+                raise ValueError(f'{self.file}: JSON array expected')
+            self.position += 1
+        if self.finished:
+            raise StopIteration
+        char = self.next_char()
+        if char == ']':
+            self.finished = True
+            raise StopIteration
+        if self.line_count > 0:
+            if char is None:
+                raise ValueError(f'{self.file}: unterminated JSON array')
+            if char != ',':
+                raise ValueError(f'{self.file}: , or ] expected after element {self.line_count}')
+            self.position += 1
+            char = self.next_char()
+        if char is None:
+            raise ValueError(f'{self.file}: unterminated JSON array')
+        if char in ',]':
+            raise ValueError(f'{self.file}: JSON value expected after element {self.line_count}')
+        event = self.decode_value()
+        self.line_count += 1
+        if self.line_count % 100000 == 0:
+            print(f'- {self.line_count}')
+        return project(event, self.fields)
+
+    def next_char(self) -> Optional[str]:
+        '''
+        Skips white space and returns the next character in the buffer,
+        reading more from the file if needed. The character is not consumed.
+        :return: the next non white space character, or None at end of file.
+        '''
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.read_chunk():
+                return None
+
+    def decode_value(self) -> object:
+        '''
+        Decodes the JSON value starting at the current position of the buffer,
+        reading more chunks from the file until the value is complete.
+        :return: the decoded value.
+        '''
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # a value ending at the buffer end (e.g. a number) may continue in the next chunk.
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.read_chunk()
+
+    def read_chunk(self) -> bool:
+        '''
+        Reads the next chunk from the file into the buffer, dropping the part
+        of the buffer already consumed.
+        :return: False if the end of the file has been reached.
+        '''
+        chunk = self.json_file.read(self.chunk_size)
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        if not chunk:
+            self.eof = True
+        return bool(chunk)
+
+    def close(self):
+        self.json_file.close()
@@ -0,0 +1,202 @@
+
+import time
+from array import array
+from typing import Dict
+from pycontract_core import Monitor, Event, restore_methods
+
+"""
+The percentiles reported for latency histograms.
+"""
+PERCENTILES = [50, 99, 99.9]
+
+
+class LatencyHistogram:
+    '''
+    Histogram of latencies in nanoseconds, with logarithmic buckets as in HdrHistogram: each
+    power of two is divided into 2^`sub_bucket_bits` buckets of equal width, such that a value
+    is recorded with a relative error below 2^-`sub_bucket_bits` (3% by default), whatever its
+    magnitude. The counts are kept in an array allocated when the histogram is created, so
+    recording a value allocates no containers, and takes constant time.
+    '''
+
+    def __init__(self, sub_bucket_bits: int = 5):
+        '''
+        :param sub_bucket_bits: the number of bits of precision of the recorded values.
+
+        count: the number of values recorded.
+        total: the sum of the values recorded.
+        max: the largest value recorded.
+        '''
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.counts = array('q', bytes(8 * ((64 - sub_bucket_bits) << sub_bucket_bits)))
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def index_of(self, value: int) -> int:
+        '''
+        Returns the index of the bucket containing a value.
+        :param value: the value, negative values are counted as 0.
+        :return: the index.
+        '''
+        if value < self.sub_bucket_count:
+            return value if value > 0 else 0
+        shift = value.bit_length() - 1 - self.sub_bucket_bits
+        return ((shift + 1) << self.sub_bucket_bits) + (value >> shift) - self.sub_bucket_count
+
+    def highest_value(self, index: int) -> int:
+        '''
+        Returns the highest value counted in a bucket.
+        :param index: the index of the bucket.
+        :return: the value.
+        '''
+        if index < self.sub_bucket_count:
+            return index
+        shift = (index >> self.sub_bucket_bits) - 1
+        mantissa = (index & (self.sub_bucket_count - 1)) + self.sub_bucket_count
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value: int, count: int = 1):
+        '''
+        Records a value.
+        :param value: the value, in nanoseconds.
+        :param count: the number of times the value is recorded.
+        '''
+        self.counts[self.index_of(value)] += count
+        self.count += count
+        self.total += value * count
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percentile: float) -> int:
+        '''
+        Returns the value below which a given percentage of the recorded values are,
+        up to the precision of the histogram.
+        :param percentile: the percentage, between 0 and 100.
+        :return: the value, 0 if no values are recorded.
+        '''
+        if self.count == 0:
+            return 0
+        target = max(1, -int(-percentile * self.count // 100))
+        seen = 0
+        for (index, count) in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self.highest_value(index), self.max)
+        return self.max
+
+    def merge(self, other: "LatencyHistogram"):
+        '''
+        Adds the values recorded in another histogram with the same precision.
+        :param other: the other histogram.
+        '''
+        assert other.sub_bucket_bits == self.sub_bucket_bits, 'histograms have different precisions'
+        for (index, count) in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def reset(self):
+        '''
+        Forgets the values recorded.
+        '''
+        for index in range(len(self.counts)):
+            self.counts[index] = 0
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def to_dict(self) -> Dict[str, object]:
+        '''
+        Returns a summary of the histogram: the number of values, their sum, mean and maximum,
+        and the percentiles in `PERCENTILES`, keyed 'p50', 'p99' and 'p99.9'.
+        :return: the summary, in nanoseconds.
+        '''
+        result = {'count': self.count, 'total': self.total,
+                  'mean': self.total / self.count if self.count else 0.0, 'max': self.max}
+        for percentile in PERCENTILES:
+            result[f'p{percentile:g}'] = self.percentile(percentile)
+        return result
+
+    def __str__(self) -> str:
+        summary = self.to_dict()
+        return f"{summary['count']} values, " + \
+            ', '.join(f'{key} {summary[key] / 1000:.1f} us' for key in ['mean'] + [f'p{p:g}' for p in PERCENTILES] + ['max'])
+
+
+class LatencyTimer:
+    '''
+    Times each call of `eval` on a monitor, and the time events wait in a queue when handed
+    over by a producer, in `LatencyHistogram`s. Together they give how quickly a violation is
+    reported after an event arrives. Example of use:
+
+        timer = LatencyTimer(monitor)
+        async with AsyncMonitor(monitor, latency=timer) as async_monitor:
+            ...
+        print(timer)
+
+    The timer replaces the `eval` and `stats` methods of the monitor object. The statistics
+    returned by `stats()` (and hence exported by a `StatsSampler`) get an entry 'latency',
+    mapping 'eval' and 'queue_wait' to the summaries of the histograms. Queue waits are
+    recorded by an `AsyncMonitor` or a `PrefetchSource` created with the timer, or by calling
+    `record_wait` with the time an event was handed over, obtained with `time.monotonic_ns()`.
+    '''
+
+    def __init__(self, monitor: Monitor, sub_bucket_bits: int = 5):
+        '''
+        :param monitor: the monitor.
+        :param sub_bucket_bits: the number of bits of precision of the histograms.
+
+        eval_latency: the durations of the calls of `eval`.
+        queue_wait: the times events waited between being handed over and being evaluated.
+        '''
+        self.monitor = monitor
+        self.eval_latency = LatencyHistogram(sub_bucket_bits)
+        self.queue_wait = LatencyHistogram(sub_bucket_bits)
+        self.replaced = (monitor.__dict__.get('eval'), monitor.__dict__.get('stats'))
+        self.monitor_eval = monitor.eval
+        self.monitor_stats = monitor.stats
+        monitor.eval = self.eval
+        monitor.stats = self.stats
+
+    def eval(self, event: Event):
+        '''
+        Submits an event to the monitor, recording the time taken. Replaces the `eval` method of the monitor.
+        :param event: the event.
+        '''
+        begin = time.perf_counter_ns()
+        self.monitor_eval(event)
+        self.eval_latency.record(time.perf_counter_ns() - begin)
+
+    def record_wait(self, handed_over: int):
+        '''
+        Records the time an event has waited since it was handed over by a producer.
+        :param handed_over: the time the event was handed over, obtained with `time.monotonic_ns()`.
+        '''
+        self.queue_wait.record(time.monotonic_ns() - handed_over)
+
+    def stats(self) -> Dict[str, object]:
+        '''
+        Returns the statistics of the monitor, with the summaries of the histograms added.
+        Replaces the `stats` method of the monitor.
+        :return: the statistics.
+        '''
+        result = self.monitor_stats()
+        result['latency'] = {'eval': self.eval_latency.to_dict(), 'queue_wait': self.queue_wait.to_dict()}
+        return result
+
+    def detach(self):
+        '''
+        Restores the `eval` and `stats` methods of the monitor. Wrappers of these methods
+        installed after the timer must be detached first (see `restore_methods`).
+        '''
+        restore_methods(self.monitor, ['eval', 'stats'], [self.eval, self.stats], self.replaced)
+
+    def __str__(self) -> str:
+        lines = ['', 'Latency:', '', f'eval: {self.eval_latency}']
+        if self.queue_wait.count:
+            lines.append(f'queue wait: {self.queue_wait}')
+        return '\n'.join(lines)
@@ -0,0 +1,214 @@
+
+import sys
+import queue
+import logging
+import threading
+import traceback
+from typing import Optional, Callable, List
+from pycontract_core import Monitor, Message
+
+"""
+Overflow policies of a `MonitorLogHandler`, applied when its queue is full: drop the record,
+keep only a sample of the records (and drop the rest), or block the logging thread until
+there is room in the queue.
+"""
+DROP = 'drop'
+SAMPLE = 'sample'
+BLOCK = 'block'
+
+"""
+Marks the end of the records in the queue of a `MonitorLogHandler`.
+"""
+END = object()
+
+
+def event_of_record(record: logging.LogRecord) -> object:
+    """
+    Default conversion of log records into events: the event is passed as
+    the `event` attribute of the record, as in:
+
+        logger.info('command dispatched', extra={'event': {'name': 'dispatch', 'cmd': cmd}})
+
+    :param record: the log record.
+    :return: the event, or None if the record carries no event.
+    """
+    return getattr(record, 'event', None)
+
+
+class MonitorLogHandler(logging.Handler):
+    '''
+    A logging handler submitting application log records as events to a monitor.
+    Records are converted into events in the logging thread, and put in a bounded queue,
+    from which a background thread submits them to the monitor in batches. Logging hence
+    normally does not wait for the monitor. Example of use:
+
+        handler = MonitorLogHandler(CommandExecution(), converter=to_event, overflow=DROP)
+        logging.getLogger('fsw').addHandler(handler)
+        ...
+        handler.close()   # evaluates the remaining events and calls end() on the monitor
+        print(handler.report())
+
+    When the queue is full, the `overflow` policy decides what happens to a record: with `DROP` it
+    is dropped, with `SAMPLE` one in `sample_rate` records is put in the queue (waiting for room)
+    and the others are dropped, and with `BLOCK` the logging thread waits for room. Dropped records
+    are counted, but note that dropping events may cause the monitor to report false errors.
+    Records logged by the monitor itself, from the background thread, are dropped and counted,
+    since waiting for room in the queue from that thread would deadlock. Records logged after
+    the handler is closed are ignored.
+    '''
+
+    def __init__(self, monitor: Monitor, converter: Callable[[logging.LogRecord], object] = event_of_record,
+                 max_queue: int = 10000, batch_size: int = 100, overflow: str = DROP, sample_rate: int = 10,
+                 level: int = logging.NOTSET, end_monitor: bool = True):
+        '''
+        :param monitor: the monitor to submit events to.
+        :param converter: function converting a log record into an event, for example a
+        dictionary or an object of an `@data` class, or None if the record is not an event.
+        :param max_queue: the maximal number of events waiting to be evaluated.
+        :param batch_size: the maximal number of events submitted to the monitor at a time.
+        :param overflow: the overflow policy, `DROP`, `SAMPLE` or `BLOCK`.
+        :param sample_rate: with the `SAMPLE` policy, one in this many records is kept on overflow.
+        :param level: the level of the handler.
+        :param end_monitor: when True `end()` is called on the monitor when the handler is closed.
+
+        record_count: the number of records converted into events.
+        dropped_count: the number of events dropped because the queue was full.
+        sampled_count: the number of events kept by sampling when the queue was full.
+        reentrant_count: the number of records logged by the background thread, which are dropped.
+        event_count: the number of events submitted to the monitor.
+        failure: the exception raised by the monitor, after which no more events are submitted.
+        '''
+        super().__init__(level)
+        assert overflow in [DROP, SAMPLE, BLOCK], f'unknown overflow policy {overflow}'
+        assert sample_rate >= 1, 'sample rate must be at least 1'
+        self.monitor = monitor
+        self.converter = converter
+        self.batch_size = batch_size
+        self.overflow = overflow
+        self.sample_rate = sample_rate
+        self.end_monitor = end_monitor
+        self.events: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.record_count = 0
+        self.overflow_count = 0
+        self.dropped_count = 0
+        self.sampled_count = 0
+        self.reentrant_count = 0
+        self.event_count = 0
+        self.failure: Optional[BaseException] = None
+        self.closed = False
+        self.local = threading.local()
+        self.worker = threading.Thread(target=self.evaluate, name='MonitorLogHandler', daemon=True)
+        self.worker.start()
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        '''
+        Drops records logged by the background thread, for example by the monitor, before
+        the lock of the handler is taken, since another thread holding the lock may be waiting
+        for the background thread to make room in the queue.
+        :param record: the log record.
+        :return: True if the record was passed to `emit`.
+        '''
+        if getattr(self.local, 'evaluating', False):
+            self.reentrant_count += 1
+            return False
+        return super().handle(record)
+
+    def emit(self, record: logging.LogRecord):
+        '''
+        Converts a log record into an event and puts it in the queue. The event is put in the
+        queue holding the lock of the handler, such that it cannot follow the end mark put
+        by `close()`.
+        :param record: the log record.
+        '''
+        try:
+            event = self.converter(record)
+        except Exception:
+            self.handleError(record)
+            return
+        if event is None:
+            return
+        with self.lock:
+            if self.closed:
+                return
+            self.record_count += 1
+            if self.overflow == BLOCK:
+                self.events.put(event)
+                return
+            try:
+                self.events.put_nowait(event)
+            except queue.Full:
+                self.overflow_count += 1
+                if self.overflow == SAMPLE and self.overflow_count % self.sample_rate == 0:
+                    self.events.put(event)
+                    self.sampled_count += 1
+                else:
+                    self.dropped_count += 1
+
+    def evaluate(self):
+        '''
+        Run by the background thread: takes batches of events from the queue and
+        submits them to the monitor.
+        '''
+        self.local.evaluating = True
+        finished = False
+        while not finished:
+            batch = []
+            event = self.events.get()
+            while event is not END:
+                batch.append(event)
+                if len(batch) == self.batch_size:
+                    break
+                try:
+                    event = self.events.get_nowait()
+                except queue.Empty:
+                    break
+            finished = event is END
+            if batch and self.failure is None:
+                try:
+                    self.monitor.eval_many(batch)
+                    self.event_count += len(batch)
+                except Exception as e:
+                    self.failure = e
+                    traceback.print_exc(file=sys.stderr)
+            for _ in range(len(batch) + finished):
+                self.events.task_done()
+
+    def flush(self):
+        '''
+        Waits until all events in the queue have been submitted to the monitor.
+        '''
+        if self.worker.is_alive():
+            self.events.join()
+
+    def close(self):
+        '''
+        Submits the remaining events to the monitor, stops the background thread, and
+        calls `end()` on the monitor if `end_monitor` is True. Called by `logging.shutdown()`
+        at exit, or when the handler is removed with `logging.Logger.removeHandler` and closed.
+        '''
+        with self.lock:
+            closing = not self.closed
+            if closing:
+                self.closed = True
+                self.events.put(END)
+        if closing:
+            self.worker.join()
+            if self.end_monitor and self.failure is None:
+                self.monitor.end()
+        super().close()
+
+    def get_messages(self) -> List[Message]:
+        '''
+        Returns the messages reported by the monitor so far.
+        :return: the messages.
+        '''
+        return self.monitor.get_all_messages()
+
+    def report(self) -> str:
+        '''
+        Returns a report of the numbers of records converted, dropped and sampled,
+        and of events submitted to the monitor.
+        :return: the report.
+        '''
+        return (f'{self.record_count} records, {self.dropped_count} dropped, {self.sampled_count} sampled, '
+                f'{self.reentrant_count} re-entrant, {self.event_count} events submitted')
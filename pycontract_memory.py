@@ -0,0 +1,255 @@
+
+import sys
+import tracemalloc
+from types import ModuleType, FunctionType, BuiltinFunctionType, MethodType, CodeType
+from typing import List, Dict, Set, Optional
+from pycontract_core import Monitor, State, Event, restore_methods
+
+"""
+Objects not counted when sizing: classes, functions and modules are shared by all objects,
+and monitors are reached from every state through its `monitor` field.
+"""
+NOT_SIZED = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType, CodeType, Monitor)
+
+
+def deep_size(obj: object, seen: Set[int]) -> int:
+    """
+    Returns the number of bytes of an object and the objects reachable from it, through
+    containers, attributes and slots, not counting objects already seen. Objects reachable
+    from several objects are hence counted for the first object sized.
+    :param obj: the object.
+    :param seen: the identities of the objects already counted, extended with those counted now.
+    :return: the number of bytes.
+    """
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, NOT_SIZED):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        attributes = getattr(obj, '__dict__', None)
+        if isinstance(attributes, dict):
+            stack.append(attributes)
+        if not isinstance(obj, State):
+            slots = getattr(type(obj), '__slots__', ())
+            for name in [slots] if isinstance(slots, str) else slots:
+                if hasattr(obj, name):
+                    stack.append(getattr(obj, name))
+    return size
+
+
+def all_monitors(monitor: Monitor) -> List[Monitor]:
+    """
+    Returns a monitor and its sub-monitors, recursively.
+    :param monitor: the monitor.
+    :return: the monitors.
+    """
+    result = [monitor]
+    for sub_monitor in monitor.monitors:
+        result += all_monitors(sub_monitor)
+    return result
+
+
+def memory_report(monitor: Monitor, sample: Optional[int] = 100, largest: int = 10) -> Dict[str, object]:
+    """
+    Estimates the memory retained by a monitor and its sub-monitors, attributed to the messages,
+    the data objects of states (such as the `MatchObligations` of exhaustive states), the states
+    of each state class (named `monitor.state`), and the state vectors: the main state vector
+    and the slices. Sizes are computed with `sys.getsizeof`, following references. The size of
+    a state vector includes the sizes of its states, and the total is the sum of the sizes of
+    the messages, the data objects and the state vectors. States are counted by identity: a state
+    object occurring in several state vectors, such as an `AlwaysState` shared by the main state
+    vector and the slices, is counted once, and its size is attributed to the first of them.
+    :param monitor: the monitor.
+    :param sample: the maximal number of states of a class sized, the size of the others being
+    estimated as the average size of those sized. None to size all states.
+    :param largest: the number of largest slices listed.
+    :return: the report.
+    """
+    seen: Set[int] = set()
+    monitors = all_monitors(monitor)
+    messages = [message for m in monitors for message in m.messages]
+    report = {
+        'monitor': monitor.get_monitor_name(),
+        'events': monitor.event_count,
+        'messages': {'count': len(messages), 'bytes': sum(deep_size(message, seen) for message in messages)},
+        'data_objects': {},
+        'state_classes': {},
+        'state_vectors': {'main': 0, 'slices': 0, 'slice_count': 0},
+        'largest_slices': []
+    }
+    data_objects = report['data_objects']
+    state_classes = report['state_classes']
+    vectors = [(m, None, m.states) for m in monitors] + \
+              [(m, key, states) for m in monitors for (key, states) in list(m.states_indexed.items())]
+    sized: Dict[str, List[int]] = {}
+    counted: Set[int] = set()
+    for (m, _, states) in vectors:
+        for state in list(states):
+            if id(state) in counted:
+                continue
+            counted.add(id(state))
+            data_object = state.__dict__.get('__data_object__')
+            if data_object is not None and id(data_object) not in seen:
+                entry = data_objects.setdefault(type(data_object).__name__, {'count': 0, 'bytes': 0})
+                entry['count'] += 1
+                entry['bytes'] += deep_size(data_object, seen)
+            name = f'{m.get_monitor_name()}.{type(state).__name__}'
+            sizes = sized.setdefault(name, [])
+            entry = state_classes.setdefault(name, {'count': 0, 'bytes': 0})
+            entry['count'] += 1
+            if sample is None or len(sizes) < sample:
+                sizes.append(deep_size(state, seen))
+    for (name, entry) in state_classes.items():
+        sizes = sized[name]
+        entry['bytes'] = round(sum(sizes) / len(sizes) * entry['count']) if sizes else 0
+    slices = []
+    attributed: Set[int] = set()
+    for (m, key, states) in vectors:
+        states = list(states)
+        vector_bytes = sys.getsizeof(states)
+        for state in states:
+            if id(state) in attributed:
+                continue
+            attributed.add(id(state))
+            entry = state_classes[f'{m.get_monitor_name()}.{type(state).__name__}']
+            vector_bytes += entry['bytes'] // entry['count']
+        if key is None:
+            report['state_vectors']['main'] += vector_bytes
+        else:
+            report['state_vectors']['slices'] += vector_bytes
+            report['state_vectors']['slice_count'] += 1
+            slices.append({'monitor': m.get_monitor_name(), 'key': repr(key), 'states': len(states),
+                           'bytes': vector_bytes})
+    report['largest_slices'] = sorted(slices, key=lambda entry: -entry['bytes'])[:largest]
+    report['total'] = report['messages']['bytes'] + \
+        sum(entry['bytes'] for entry in data_objects.values()) + \
+        report['state_vectors']['main'] + report['state_vectors']['slices']
+    return report
+
+
+def format_memory_report(report: Dict[str, object]) -> str:
+    """
+    Formats a memory report as a table.
+    :param report: the report, as returned by `memory_report`.
+    :return: the table.
+    """
+    lines = ['', f"Memory of {report['monitor']} after {report['events']} events: {report['total']} bytes", '']
+    rows = [('messages', report['messages']['count'], report['messages']['bytes'])]
+    rows += [(f'data {name}', entry['count'], entry['bytes']) for (name, entry) in report['data_objects'].items()]
+    rows += [(f'states {name}', entry['count'], entry['bytes'])
+             for (name, entry) in sorted(report['state_classes'].items(), key=lambda item: -item[1]['bytes'])]
+    vectors = report['state_vectors']
+    rows += [('main state vectors', '', vectors['main']),
+             (f"slices", vectors['slice_count'], vectors['slices'])]
+    rows += [(f"  slice {entry['monitor']}[{entry['key']}]", entry['states'], entry['bytes'])
+             for entry in report['largest_slices']]
+    for (name, count, size) in rows:
+        lines.append(f'{name:50} {count:>10} {size:>14}')
+    if report.get('traced') is not None:
+        traced = report['traced']
+        lines.append('')
+        lines.append(f"traced by tracemalloc: {traced['current']} bytes, peak {traced['peak']} bytes")
+        for (location, size) in traced['top']:
+            lines.append(f'  {location:48} {size:>14}')
+    return '\n'.join(lines)
+
+
+class MemoryReporter:
+    '''
+    Takes memory reports (see `memory_report`) of a monitor every `every_events` events,
+    and when `end()` is called on the monitor, printing the last one. With `trace` True,
+    `tracemalloc` is started, and each report also contains the memory traced by it, in
+    total and for the source lines allocating the most. Example of use:
+
+        reporter = MemoryReporter(monitor, every_events=100000, sample=100)
+        monitor.verify(trace)
+        reporter.detach()
+        for report in reporter.reports: ...
+
+    The reporter replaces the `eval` and `end` methods of the monitor object.
+    '''
+
+    def __init__(self, monitor: Monitor, every_events: Optional[int] = None, sample: Optional[int] = 100,
+                 largest: int = 10, trace: bool = False, print_at_end: bool = True):
+        '''
+        :param monitor: the monitor.
+        :param every_events: the number of events between two reports, or None for a report only at the end.
+        :param sample: the maximal number of states of a class sized in a report.
+        :param largest: the number of largest slices listed in a report.
+        :param trace: True to also report the memory traced by `tracemalloc`.
+        :param print_at_end: True to print the report taken at `end()`.
+
+        reports: the reports taken.
+        started_tracing: True if `tracemalloc` was started by the reporter, and is hence stopped by `detach()`.
+        '''
+        self.monitor = monitor
+        self.every_events = every_events
+        self.sample = sample
+        self.largest = largest
+        self.trace = trace
+        self.print_at_end = print_at_end
+        self.reports: List[Dict[str, object]] = []
+        self.countdown = every_events
+        self.started_tracing = trace and not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+        self.replaced = (monitor.__dict__.get('eval'), monitor.__dict__.get('end'))
+        self.monitor_eval = monitor.eval
+        self.monitor_end = monitor.end
+        monitor.eval = self.eval
+        monitor.end = self.end
+
+    def eval(self, event: Event):
+        '''
+        Submits an event to the monitor, taking a report afterwards if one is due.
+        Replaces the `eval` method of the monitor.
+        :param event: the event.
+        '''
+        self.monitor_eval(event)
+        if self.every_events is not None:
+            self.countdown -= 1
+            if self.countdown == 0:
+                self.countdown = self.every_events
+                self.report()
+
+    def end(self):
+        '''
+        Ends monitoring, and takes a report. Replaces the `end` method of the monitor.
+        '''
+        self.monitor_end()
+        report = self.report()
+        if self.print_at_end:
+            print(format_memory_report(report))
+
+    def report(self) -> Dict[str, object]:
+        '''
+        Takes a report now.
+        :return: the report.
+        '''
+        report = memory_report(self.monitor, self.sample, self.largest)
+        if self.trace and tracemalloc.is_tracing():
+            (current, peak) = tracemalloc.get_traced_memory()
+            statistics = tracemalloc.take_snapshot().statistics('lineno')[:5]
+            report['traced'] = {'current': current, 'peak': peak,
+                                'top': [(str(statistic.traceback), statistic.size) for statistic in statistics]}
+        self.reports.append(report)
+        return report
+
+    def detach(self):
+        '''
+        Restores the `eval` and `end` methods of the monitor, and stops `tracemalloc` if it was
+        started by the reporter. Wrappers of these methods installed after the reporter must be
+        detached first (see `restore_methods`).
+        '''
+        restore_methods(self.monitor, ['eval', 'end'], [self.eval, self.end], self.replaced)
+        if self.started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self.started_tracing = False
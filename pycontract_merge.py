@@ -0,0 +1,124 @@
+
+import heapq
+from typing import List, Callable, Iterator, Optional
+
+
+class MergeSource:
+    '''
+    Class for merging several event sources (such as `CSVSource` objects or any other
+    iterators over events) into one stream of events ordered by time stamps.
+    Each source is assumed to be ordered by time stamps, up to a bounded
+    disorder: an event may occur after events with time stamps up to `tolerance`
+    higher than its own. The merge is performed while reading, with a heap holding
+    only the events read ahead, so no pre-sorting is needed and memory use is
+    bounded by the number of events within the tolerance window.
+    Example of use:
+
+        with MergeSource([CSVSource('commands.csv'), CSVSource('evrs.csv')],
+                         lambda event: int(event['TIME'])) as source:
+            for event in source:
+                ...
+    '''
+
+    def __init__(self, sources: List[Iterator], timestamp: Callable[[object], object], tolerance: object = 0):
+        '''
+        :param sources: the sources to merge.
+        :param timestamp: function returning the time stamp of an event.
+        :param tolerance: the maximal amount of time by which events within a source can be
+        out of order. If different from 0, time stamps must be numbers.
+
+        line_count: the number of events returned.
+        late_count: the number of events arriving later than the tolerance allows. They are
+        returned as soon as they are read, and hence out of order.
+        '''
+        self.sources = sources
+        self.iterators: List[Optional[Iterator]] = [None] * len(sources)
+        self.timestamp = timestamp
+        self.tolerance = tolerance
+        self.heap: List[tuple] = []
+        self.latest: List[object] = [None] * len(sources)
+        self.exhausted: List[bool] = [False] * len(sources)
+        self.last_timestamp: object = None
+        self.sequence_nr = 0
+        self.line_count = 0
+        self.late_count = 0
+
+    def __enter__(self):
+        for (index, source) in enumerate(self.sources):
+            if hasattr(source, '__enter__'):
+                self.sources[index] = source.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for source in self.sources:
+            if hasattr(source, '__exit__'):
+                source.__exit__(exc_type, exc_val, exc_tb)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while True:
+            lagging = self.lagging_source()
+            if lagging is None:
+                break
+            self.read_from(lagging)
+        if not self.heap:
+            raise StopIteration
+        (time, _, _, event) = heapq.heappop(self.heap)
+        self.last_timestamp = time
+        self.line_count += 1
+        return event
+
+    def lagging_source(self) -> Optional[int]:
+        '''
+        Returns a source that must be read from before the first event on the heap can be
+        returned, because it may still deliver an earlier event. This is the case if the latest
+        time stamp read from the source, minus the tolerance, is lower than the time stamp
+        of the first event on the heap.
+        :return: the index of the source furthest behind, or None if no source needs to be read.
+        '''
+        result = None
+        for index in range(len(self.sources)):
+            if self.exhausted[index]:
+                continue
+            latest = self.latest[index]
+            if latest is None:
+                return index
+            if self.heap and self.reached(latest, self.heap[0][0]):
+                continue
+            if result is None or latest < self.latest[result]:
+                result = index
+        return result
+
+    def reached(self, latest: object, time: object) -> bool:
+        '''
+        Returns True if no more events with time stamp lower than `time` can be delivered by
+        a source from which time stamp `latest` has been read.
+        :param latest: the latest time stamp read from the source.
+        :param time: the time stamp to compare with.
+        :return: True iff. `latest` minus the tolerance is at least `time`.
+        '''
+        if self.tolerance:
+            return latest - self.tolerance >= time
+        return latest >= time
+
+    def read_from(self, index: int):
+        '''
+        Reads the next event from a source and pushes it on the heap.
+        :param index: the index of the source.
+        '''
+        if self.iterators[index] is None:
+            self.iterators[index] = iter(self.sources[index])
+        try:
+            event = next(self.iterators[index])
+        except StopIteration:
+            self.exhausted[index] = True
+            return
+        time = self.timestamp(event)
+        if self.last_timestamp is not None and time < self.last_timestamp:
+            self.late_count += 1
+        if self.latest[index] is None or time > self.latest[index]:
+            self.latest[index] = time
+        heapq.heappush(self.heap, (time, index, self.sequence_nr, event))
+        self.sequence_nr += 1
@@ -155,13 +155,13 @@ def find_transitions(source_state: str, event: str, conditions: List[str], stmts
                 # Name(identifier id, expr_context ctx)
                 target_state: ast.identifier = called_thing.id
             args: List[str] = [ast.unparse(arg) for arg in returned_expr.args]
-            transition = AstTransition(source_state, event, conditions, target_state, args, number)
+            transition = AstTransition(source_state, event, conditions, target_state, args, number, stmt.lineno)
             return [transition]
         elif isinstance(returned_expr, ast.List):
             # List(expr* elts, expr_context ctx)
             calls = returned_expr.elts
             fork_state = next_fork_state()
-            to_fork_transition = AstTransition(source_state, event, conditions, fork_state, [], number)
+            to_fork_transition = AstTransition(source_state, event, conditions, fork_state, [], number, stmt.lineno)
             transitions = [to_fork_transition]
             for call in calls:
                 if isinstance(call, ast.Call):
@@ -178,12 +178,12 @@ def find_transitions(source_state: str, event: str, conditions: List[str], stmts
                     transitions += [transition]
             return transitions
         elif isinstance(returned_expr, ast.Name) and returned_expr.id == 'ok':
-            transition = AstTransition(source_state, event, conditions, returned_expr.id, [], number)
+            transition = AstTransition(source_state, event, conditions, returned_expr.id, [], number, stmt.lineno)
             return [transition]
         else:
             # TODO:
             # assert False,  f'returned expressions not a state: {ast.unparse(returned_expr)}'
-            transition = AstTransition(source_state, event, conditions, 'INTERNAL', [], number)
+            transition = AstTransition(source_state, event, conditions, 'INTERNAL', [], number, stmt.lineno)
             return [transition]
     elif isinstance(stmt, ast.If):
         # If(expr test, stmt* body, stmt* orelse)
@@ -212,7 +212,7 @@ def find_transitions(source_state: str, event: str, conditions: List[str], stmts
         return transitions
     else:
         # self loop
-        transition = AstTransition(source_state, event, conditions, source_state, [], number)
+        transition = AstTransition(source_state, event, conditions, source_state, [], number, stmt.lineno)
         return [transition]
 
 
@@ -332,7 +332,8 @@ class AstTransition:
     """
     Representation of a transition.
     """
-    def __init__(self, source: str, event: str, conditions: List[str], target: str, arguments: List[str], number: int = None):
+    def __init__(self, source: str, event: str, conditions: List[str], target: str, arguments: List[str], number: int = None,
+                 line: int = None):
         """
         :param source: the name of the source state.
         :param event: the event name. It is None in case source is a fork state.
@@ -342,6 +343,9 @@ class AstTransition:
         :param arguments: the list of arguments to the target state. This is None in case target is a fork state.
         :param number: transition number reflecting the top down order in which cases in a match statement are
             executed. This order is sometimes important.
+        :param line: the line of the statement the transition is drawn from. None for transitions from fork states.
+        - count : the number of times the transition fired, if coverage was recorded, otherwise None.
+        - hot : True if the transition is among the most frequently fired ones.
         """
         self.source = source
         self.event = event
@@ -349,6 +353,9 @@ class AstTransition:
         self.target = target
         self.arguments = arguments
         self.number = number
+        self.line = line
+        self.count: Optional[int] = None
+        self.hot: bool = False
 
     def __str__(self):
         result = ''
@@ -363,7 +370,13 @@ class AstTransition:
             else:
                 number = f'{self.number} '
             # --------
-            result += f'  {self.source} --> {target} : {number}**{self.event}**'
+            if self.count is None:
+                arrow = '-->'
+                count = ''
+            else:
+                arrow = '-[#red,bold]->' if self.hot else '-[#gray,dashed]->' if self.count == 0 else '-->'
+                count = f'[{self.count}] '
+            result += f'  {self.source} {arrow} {target} : {count}{number}**{self.event}**'
             if self.conditions:
                 result += "\\n" + mk_string(self.conditions,' and\\n')
             if self.arguments and self.target != 'error':
@@ -396,6 +409,21 @@ class AstMonitor:
         self.states: List[AstState] = []
         self.transitions: List[AstTransition] = []
 
+    def annotate(self, monitor_file: str, coverage: "Coverage"):
+        """
+        Annotates the transitions with the number of times they fired.
+        :param monitor_file: the file containing the monitor.
+        :param coverage: the coverage recorded while monitoring.
+        """
+        for transition in self.transitions:
+            if transition.line is not None and transition.event:
+                transition.count = coverage.count(monitor_file, transition.source, transition.line)
+        counts = [transition.count for transition in self.transitions if transition.count is not None]
+        highest = max(counts, default=0)
+        for transition in self.transitions:
+            transition.hot = transition.count is not None and transition.count > 0 and \
+                transition.count >= coverage.hot_fraction * highest
+
     def __str__(self):
         result = '@startuml\n'
         # result += '!theme plain\n'
@@ -530,11 +558,12 @@ class Analyzer(ast.NodeVisitor):
             for transition in transitions:
                 self.current_monitor.transitions.append(transition)
 
-    def visualize(self, monitor_file: str, png: bool):
+    def visualize(self, monitor_file: str, png: bool, coverage: "Coverage" = None):
         """
         Generates PlantUML diagrams.
         :param monitor_file: the file to visualize
         :param png: True of a png file should be generated in addition to a plantuml source file.
+        :param coverage: if not None, the transitions are annotated with the number of times they fired.
         """
         print(f'\n\nGenerating PlantUML state machines for:\n{monitor_file}:')
         for monitor in self.monitors:
@@ -544,6 +573,8 @@ class Analyzer(ast.NodeVisitor):
             plantuml_prefix = f'{monitor_file_prefix}.{monitor.name}'
             plantuml_source = f'{plantuml_prefix}.pu'
             plantuml_png = f'{plantuml_prefix}.png'
+            if coverage is not None:
+                monitor.annotate(monitor_file, coverage)
             with open(plantuml_source, "w") as file:
                 file.write(str(monitor))
             if png:
@@ -556,17 +587,20 @@ class Analyzer(ast.NodeVisitor):
             #     print()
 
 
-def visualize(monitor_file: str, png: bool = True):
+def visualize(monitor_file: str, png: bool = True, coverage: "Coverage" = None):
     """
     Generates PlantUML diagrams from monitors in file.
     :param monitor_file: Python script containing monitors.
     :param png: True of a png file should be generated in addition to a plantuml source file.
+    :param coverage: transition coverage recorded while monitoring (see `pycontract_coverage`). If not
+        None, each transition is annotated with the number of times it fired, and colored
+        if it fired often or never.
     """
     with open(monitor_file, "r") as source:
         tree = ast.parse(source.read())
         analyzer = Analyzer()
         analyzer.visit(tree)
-        analyzer.visualize(monitor_file, png)
+        analyzer.visualize(monitor_file, png, coverage)
 
 
 
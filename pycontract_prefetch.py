@@ -0,0 +1,219 @@
+
+import queue
+import threading
+import multiprocessing
+import time
+from itertools import islice
+from typing import Iterator, Callable, List, Optional, Union
+from pycontract_latency import LatencyTimer
+
+"""
+Kinds of messages sent from the producer to the consumer of a `PrefetchSource`.
+"""
+BATCH = 'batch'
+END = 'end'
+FAILURE = 'failure'
+
+
+def produce(source: Iterator, batch_size: int, put: Callable[[tuple], bool]) -> float:
+    """
+    Reads events from a source in batches and hands them over with `put`. Also
+    sends the final `END` message, or a `FAILURE` message if reading fails.
+    :param source: the source to read from.
+    :param batch_size: the number of events in each batch.
+    :param put: function handing over a message, returning False if the consumer has stopped.
+    :return: the time spent blocked in `put`, in seconds.
+    """
+    blocked = 0.0
+    try:
+        iterator = iter(source)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+            begin = time.perf_counter()
+            if not put((BATCH, batch, time.monotonic_ns())):
+                return blocked
+            blocked += time.perf_counter() - begin
+        put((END, blocked, None))
+    except Exception as e:
+        put((FAILURE, e, None))
+    return blocked
+
+
+def produce_in_process(source_factory: Callable[[], Iterator], batch_size: int, messages: multiprocessing.Queue):
+    """
+    Run by the producer process: creates the source and reads events from it.
+    :param source_factory: function creating the source.
+    :param batch_size: the number of events in each batch.
+    :param messages: the queue to send batches to.
+    """
+    def put(message: tuple) -> bool:
+        messages.put(message)
+        return True
+
+    try:
+        source = source_factory()
+    except Exception as e:
+        put((FAILURE, e, None))
+        return
+    if hasattr(source, '__enter__'):
+        with source as entered_source:
+            produce(entered_source, batch_size, put)
+    else:
+        produce(source, batch_size, put)
+
+
+class PrefetchSource:
+    '''
+    Wraps an event source, reading and parsing events ahead in a separate thread,
+    or process, while the monitor evaluates the events already read. Events are
+    handed over in batches through a bounded queue. Example of use:
+
+        with PrefetchSource(CSVSource('log.csv'), batch_size=1000, depth=8) as source:
+            for event in source:
+                m.eval(event)
+        print(source.report())
+
+    A thread overlaps waiting for I/O (and decompression) with monitoring. To also
+    overlap parsing, which holds the global interpreter lock, a process can be used
+    instead. In that case `source` must be a function, which can be pickled, creating
+    the source in the producer process, and events must be picklable.
+
+    The time spent blocked on each side indicates which side is the bottleneck: if the
+    consumer (the monitor) is blocked, reading is the bottleneck, and vice versa.
+    '''
+
+    def __init__(self, source: Union[Iterator, Callable[[], Iterator]], batch_size: int = 1000,
+                 depth: int = 8, process: bool = False, latency: Optional[LatencyTimer] = None):
+        '''
+        :param source: the source to wrap, or a function creating the source if `process` is True.
+        :param batch_size: the number of events handed over at a time.
+        :param depth: the maximal number of batches read ahead.
+        :param process: when True the source is read in a separate process, otherwise in a thread.
+        :param latency: the timer recording the time events wait between being handed over
+        by the producer and being returned, or None.
+
+        line_count: the number of events returned.
+        producer_blocked: seconds the producer has been blocked on a full queue.
+        consumer_blocked: seconds the consumer has been blocked on an empty queue.
+        '''
+        self.source = source
+        self.batch_size = batch_size
+        self.depth = depth
+        self.process = process
+        self.latency = latency
+        self.handed_over: Optional[int] = None
+        self.messages: Optional[Union[queue.Queue, multiprocessing.Queue]] = None
+        self.producer: Optional[Union[threading.Thread, multiprocessing.Process]] = None
+        self.stopped = threading.Event()
+        self.batch: List[object] = []
+        self.batch_index: int = 0
+        self.finished: bool = False
+        self.line_count = 0
+        self.batch_count = 0
+        self.producer_blocked: float = 0.0
+        self.consumer_blocked: float = 0.0
+
+    def __enter__(self):
+        if not self.process and hasattr(self.source, '__enter__'):
+            self.source = self.source.__enter__()
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        if not self.process and hasattr(self.source, '__exit__') and not self.producer_alive():
+            self.source.__exit__(exc_type, exc_val, exc_tb)
+
+    def start(self):
+        '''
+        Starts the producer thread or process. Called by `__enter__`, or by the
+        first call of `__next__` if the source is not used in a `with` statement.
+        '''
+        if self.producer is not None:
+            return
+        if self.process:
+            self.messages = multiprocessing.Queue(maxsize=self.depth)
+            self.producer = multiprocessing.Process(
+                target=produce_in_process, args=(self.source, self.batch_size, self.messages), daemon=True)
+        else:
+            self.messages = queue.Queue(maxsize=self.depth)
+            self.producer = threading.Thread(target=self.produce_in_thread, daemon=True)
+        self.producer.start()
+
+    def produce_in_thread(self):
+        '''
+        Run by the producer thread.
+        '''
+        def put(message: tuple) -> bool:
+            while not self.stopped.is_set():
+                try:
+                    self.messages.put(message, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        self.producer_blocked = produce(self.source, self.batch_size, put)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while self.batch_index == len(self.batch):
+            if self.finished:
+                raise StopIteration
+            self.start()
+            begin = time.perf_counter()
+            (kind, contents, handed_over) = self.messages.get()
+            self.consumer_blocked += time.perf_counter() - begin
+            if kind == BATCH:
+                self.batch = contents
+                self.handed_over = handed_over
+                self.batch_index = 0
+                self.batch_count += 1
+            elif kind == END:
+                self.producer_blocked = contents
+                self.finished = True
+            else:
+                self.finished = True
+                raise contents
+        event = self.batch[self.batch_index]
+        self.batch_index += 1
+        self.line_count += 1
+        if self.latency is not None:
+            self.latency.record_wait(self.handed_over)
+        return event
+
+    def close(self, timeout: float = 10.0):
+        '''
+        Stops the producer, and waits for it to finish. A producer thread stops when it has
+        read its current batch. Leaving a `with` statement only closes the source when the
+        producer thread has finished, such that the source is never closed while being read.
+        :param timeout: the maximal number of seconds to wait for a producer thread.
+        '''
+        self.stopped.set()
+        if isinstance(self.producer, multiprocessing.Process):
+            if self.producer.is_alive():
+                self.producer.terminate()
+            self.producer.join()
+        elif self.producer is not None:
+            self.producer.join(timeout)
+
+    def producer_alive(self) -> bool:
+        '''
+        Returns True if the producer has been started and has not finished.
+        :return: True if the producer is running.
+        '''
+        return self.producer is not None and self.producer.is_alive()
+
+    def report(self) -> str:
+        '''
+        Returns a report of the number of events and batches handed over, and of the time
+        spent blocked on each side of the queue.
+        :return: the report.
+        '''
+        return (f'{self.line_count} events in {self.batch_count} batches, '
+                f'producer blocked {self.producer_blocked:.3f} s, '
+                f'consumer blocked {self.consumer_blocked:.3f} s')
@@ -0,0 +1,222 @@
+
+import json
+import time
+import inspect
+from typing import List, Dict, Tuple, Callable, Optional
+from pycontract_core import Monitor, State, OkState, ErrorState, InfoState, Event, is_state_class, restore_methods
+
+"""
+The outcomes of evaluating a state on an event, as counted by the profiler: the transition
+did not fire (stay), or it fired and resulted in a new state, in ok, in an error, or in
+an information message. A transition resulting in several states counts each of them.
+"""
+OUTCOMES = ['stay', 'new', 'ok', 'error', 'info']
+
+
+class StateProfile:
+    '''
+    The profile of a state class in a monitor.
+    '''
+
+    def __init__(self, monitor_name: str, state_name: str):
+        '''
+        :param monitor_name: the name of the monitor.
+        :param state_name: the name of the state class.
+
+        evaluations: the number of times a state of the class has been evaluated on an event.
+        sampled: the number of those evaluations that were timed and classified.
+        transitions: the number of sampled evaluations where a transition fired.
+        seconds: the time spent in sampled evaluations.
+        outcomes: the number of each outcome (see `OUTCOMES`) in sampled evaluations.
+        '''
+        self.monitor_name = monitor_name
+        self.state_name = state_name
+        self.evaluations = 0
+        self.sampled = 0
+        self.transitions = 0
+        self.seconds = 0.0
+        self.outcomes: Dict[str, int] = {outcome: 0 for outcome in OUTCOMES}
+
+    def scale(self) -> float:
+        '''
+        Returns the factor by which the sampled figures are multiplied to estimate the figures
+        of all evaluations.
+        :return: the factor, 1 if all evaluations were sampled.
+        '''
+        return self.evaluations / self.sampled if self.sampled else 0.0
+
+    def to_dict(self) -> Dict[str, object]:
+        '''
+        Returns the profile with the figures estimated for all evaluations.
+        :return: the profile as a dictionary.
+        '''
+        scale = self.scale()
+        return {
+            'monitor': self.monitor_name,
+            'state': self.state_name,
+            'evaluations': self.evaluations,
+            'sampled': self.sampled,
+            'transitions': round(self.transitions * scale),
+            'seconds': self.seconds * scale,
+            'outcomes': {outcome: round(count * scale) for (outcome, count) in self.outcomes.items()}
+        }
+
+
+class Profiler:
+    '''
+    An opt-in profiler recording, per monitor and per state class, how often states are
+    evaluated on events, how often a transition fires, the time spent in the transitions,
+    and the outcomes of the transitions. The `eval` method of each state class of the
+    monitor (and its sub-monitors) is wrapped. Example of use:
+
+        profiler = Profiler(sample_rate=10)
+        profiler.attach(monitor)
+        monitor.verify(trace)  # prints the ranked table at end()
+        profiler.write_json('profile.json')
+        profiler.detach()
+
+    With a sample rate of N, only every N'th evaluation is timed and classified, and the
+    figures are estimated by scaling. The number of evaluations is always exact. Note that
+    the wrapping is done on the classes, so states of other monitors of the same class are
+    also profiled while the profiler is attached, and are recorded under their monitor's name.
+    '''
+
+    def __init__(self, sample_rate: int = 1, print_at_end: bool = True):
+        '''
+        :param sample_rate: time and classify one out of this many evaluations.
+        :param print_at_end: when True, the ranked table is printed when `end()` is called on the monitor.
+        '''
+        assert sample_rate >= 1, 'the sample rate must be at least 1'
+        self.sample_rate = sample_rate
+        self.print_at_end = print_at_end
+        self.calls = 0
+        self.profiles: Dict[Tuple[str, type], StateProfile] = {}
+        self.wrapped: List[Tuple[type, Optional[Callable]]] = []
+        self.monitors: List[Monitor] = []
+        self.end_wrapped: Optional[Tuple[Monitor, Callable, Optional[Callable]]] = None
+
+    def attach(self, monitor: Monitor):
+        '''
+        Starts profiling a monitor and its sub-monitors.
+        :param monitor: the monitor.
+        '''
+        self.monitors.append(monitor)
+        monitor.__profiler__ = self
+        for (_, state_class) in inspect.getmembers(monitor, predicate=is_state_class):
+            self.wrap(state_class)
+        for sub_monitor in monitor.monitors:
+            self.attach(sub_monitor)
+        if self.print_at_end and len(self.monitors) == 1:
+            end = monitor.end
+
+            def end_and_print():
+                end()
+                print(self)
+            self.end_wrapped = (monitor, end_and_print, monitor.__dict__.get('end'))
+            monitor.end = end_and_print
+
+    def wrap(self, state_class: type):
+        '''
+        Wraps the `eval` method of a state class, unless it already is wrapped,
+        possibly by being inherited from a wrapped class.
+        :param state_class: the state class.
+        '''
+        original = state_class.eval
+        if hasattr(original, '__profiled__'):
+            return
+        profiler = self
+
+        def eval(state: State, event: Event) -> List[State]:
+            monitor = state.__dict__.get('monitor')
+            if getattr(monitor, '__profiler__', None) is not profiler:
+                return original(state, event)
+            profile_key = (monitor.get_monitor_name(), type(state))
+            profile = profiler.profiles.get(profile_key)
+            if profile is None:
+                profile = profiler.profiles[profile_key] = StateProfile(profile_key[0], type(state).__name__)
+            profile.evaluations += 1
+            profiler.calls += 1
+            if profiler.calls % profiler.sample_rate != 0:
+                return original(state, event)
+            begin = time.perf_counter()
+            result = original(state, event)
+            profile.seconds += time.perf_counter() - begin
+            profile.sampled += 1
+            profiler.classify(profile, state, result)
+            return result
+        eval.__profiled__ = True
+        self.wrapped.append((state_class, state_class.__dict__.get('eval')))
+        state_class.eval = eval
+
+    @staticmethod
+    def classify(profile: StateProfile, state: State, result: List[State]):
+        '''
+        Counts the outcome of evaluating a state.
+        :param profile: the profile of the state class.
+        :param state: the evaluated state.
+        :param result: the resulting states.
+        '''
+        if len(result) == 1 and result[0] is state:
+            profile.outcomes['stay'] += 1
+            return
+        profile.transitions += 1
+        for target in result:
+            if target is state:
+                continue
+            elif isinstance(target, OkState):
+                profile.outcomes['ok'] += 1
+            elif isinstance(target, ErrorState):
+                profile.outcomes['error'] += 1
+            elif isinstance(target, InfoState):
+                profile.outcomes['info'] += 1
+            else:
+                profile.outcomes['new'] += 1
+
+    def detach(self):
+        '''
+        Stops profiling, restoring the `eval` methods of the state classes
+        and the `end` method of the monitor. The recorded profiles are kept. Wrappers of `end`
+        installed after the profiler must be detached first (see `restore_methods`).
+        '''
+        if self.end_wrapped is not None:
+            (monitor, wrapper, replaced) = self.end_wrapped
+            restore_methods(monitor, ['end'], [wrapper], [replaced])
+            self.end_wrapped = None
+        for (state_class, original) in reversed(self.wrapped):
+            if original is None:
+                del state_class.eval
+            else:
+                state_class.eval = original
+        self.wrapped = []
+        for monitor in self.monitors:
+            del monitor.__profiler__
+        self.monitors = []
+
+    def get_profiles(self) -> List[Dict[str, object]]:
+        '''
+        Returns the profiles, ranked by the time spent, most first.
+        :return: the profiles, with figures estimated for all evaluations.
+        '''
+        profiles = [profile.to_dict() for profile in self.profiles.values()]
+        return sorted(profiles, key=lambda profile: (-profile['seconds'], -profile['evaluations']))
+
+    def write_json(self, file: str):
+        '''
+        Writes the profiles to a JSON file.
+        :param file: the file.
+        '''
+        with open(file, 'w') as f:
+            json.dump({'sample_rate': self.sample_rate, 'profiles': self.get_profiles()}, f, indent=2)
+
+    def __str__(self) -> str:
+        profiles = self.get_profiles()
+        total = sum(profile['seconds'] for profile in profiles) or 1.0
+        lines = ['', 'Profile' + (f' (sampling 1 in {self.sample_rate})' if self.sample_rate > 1 else '') + ':', '',
+                 f"{'monitor':20} {'state':20} {'evals':>10} {'fired':>10} {'ms':>10} {'%':>6} "
+                 + ' '.join(f'{outcome:>8}' for outcome in OUTCOMES)]
+        for profile in profiles:
+            lines.append(f"{profile['monitor']:20} {profile['state']:20} {profile['evaluations']:10} "
+                         f"{profile['transitions']:10} {profile['seconds'] * 1000:10.2f} "
+                         f"{100 * profile['seconds'] / total:6.1f} "
+                         + ' '.join(f"{profile['outcomes'][outcome]:8}" for outcome in OUTCOMES))
+        return '\n'.join(lines)
@@ -0,0 +1,154 @@
+
+import csv
+from typing import List, Dict, Tuple, Callable, Optional
+from pycontract_core import Monitor, Event, restore_methods
+
+
+class StateRecorder:
+    '''
+    Records the number of live states of a monitor over time, per monitor and per state
+    class, for example to plot how many commands are active during a run. Samples are taken
+    every `every_events` events, and/or every `every_time` units of event time, where the time
+    of an event is obtained with `time_of`. Taking a sample reads the counters the monitor
+    maintains incrementally (see `Monitor.states_per_class()`), so it costs time proportional
+    to the number of monitors and state classes, not to the number of live states. Example of use:
+
+        recorder = StateRecorder(monitor, every_time=60, time_of=lambda event: event.time)
+        monitor.verify(trace)
+        recorder.detach()
+        recorder.write_csv('states.csv')
+        recorder.plot('states.png')
+
+    The recorder replaces the `eval` method of the monitor object, such that events submitted
+    with `eval`, `eval_many` or `verify` are counted. Each sample records the event number,
+    the event time (or None), the total number of states, and the number of states of each
+    state class, named `monitor.state` as in `Monitor.stats()`.
+    '''
+
+    def __init__(self, monitor: Monitor, every_events: Optional[int] = None, every_time: Optional[float] = None,
+                 time_of: Optional[Callable[[Event], Optional[float]]] = None):
+        '''
+        :param monitor: the monitor.
+        :param every_events: the number of events between two samples, or None.
+        :param every_time: the amount of event time between two samples, or None.
+        :param time_of: function returning the time of an event, or None for events without a time.
+        Required with `every_time`.
+        '''
+        assert every_events is not None or every_time is not None, 'every_events or every_time must be given'
+        assert every_time is None or time_of is not None, 'time_of must be given with every_time'
+        self.monitor = monitor
+        self.every_events = every_events
+        self.every_time = every_time
+        self.time_of = time_of
+        self.samples: List[Tuple[int, Optional[float], int, Dict[str, int]]] = []
+        self.next_time: Optional[float] = None
+        self.countdown = every_events
+        self.last_time: Optional[float] = None
+        self.replaced = monitor.__dict__.get('eval')
+        self.monitor_eval = monitor.eval
+        monitor.eval = self.record
+
+    def record(self, event: Event):
+        '''
+        Submits an event to the monitor, taking a sample afterwards if one is due.
+        Replaces the `eval` method of the monitor.
+        :param event: the event.
+        '''
+        self.monitor_eval(event)
+        due = False
+        if self.every_events is not None:
+            self.countdown -= 1
+            if self.countdown == 0:
+                self.countdown = self.every_events
+                due = True
+        if self.every_time is not None:
+            time = self.time_of(event)
+            if time is not None:
+                self.last_time = time
+                if self.next_time is None:
+                    self.next_time = time
+                if time >= self.next_time:
+                    while self.next_time <= time:
+                        self.next_time += self.every_time
+                    due = True
+        if due:
+            self.sample()
+
+    def sample(self):
+        '''
+        Takes a sample of the numbers of live states.
+        '''
+        monitor = self.monitor
+        self.samples.append((monitor.event_count, self.last_time, monitor.state_count, monitor.states_per_class()))
+
+    def detach(self):
+        '''
+        Restores the `eval` method of the monitor, and takes a last sample. Wrappers of `eval`
+        installed after the recorder must be detached first (see `restore_methods`).
+        '''
+        restore_methods(self.monitor, ['eval'], [self.record], [self.replaced])
+        self.sample()
+
+    def columns(self) -> List[str]:
+        '''
+        Returns the names of the state classes occurring in the samples.
+        :return: the names, sorted.
+        '''
+        names = set()
+        for (_, _, _, counts) in self.samples:
+            names.update(counts)
+        return sorted(names)
+
+    def rows(self) -> List[List[object]]:
+        '''
+        Returns the samples as rows: event number, time, total number of states,
+        and the number of states of each state class in `columns()`.
+        :return: the rows.
+        '''
+        columns = self.columns()
+        return [[events, time, total] + [counts.get(column, 0) for column in columns]
+                for (events, time, total, counts) in self.samples]
+
+    def write_csv(self, file: str):
+        '''
+        Writes the samples to a CSV file, with a header row.
+        :param file: the file.
+        '''
+        with open(file, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['event', 'time', 'states'] + self.columns())
+            writer.writerows(self.rows())
+
+    def to_numpy(self) -> Tuple[List[str], "numpy.ndarray"]:
+        '''
+        Returns the samples as a NumPy array, with a row per sample. Requires NumPy.
+        A missing time is represented as NaN.
+        :return: the column names and the array.
+        '''
+        import numpy
+        rows = [[float('nan') if value is None else value for value in row] for row in self.rows()]
+        return ['event', 'time', 'states'] + self.columns(), numpy.array(rows, dtype=float).reshape(len(rows), -1)
+
+    def plot(self, file: str, columns: Optional[List[str]] = None):
+        '''
+        Plots the numbers of live states over time (or over events, if events have no time)
+        to an image file. Requires matplotlib.
+        :param file: the image file.
+        :param columns: the state classes to plot, by default all, and the total.
+        '''
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        names = ['event', 'time', 'states'] + self.columns()
+        rows = self.rows()
+        use_time = all(row[1] is not None for row in rows)
+        x_values = [row[1] if use_time else row[0] for row in rows]
+        figure = plt.figure()
+        for column in (columns or names[2:]):
+            position = names.index(column)
+            plt.plot(x_values, [row[position] for row in rows], label=column)
+        plt.xlabel('time' if use_time else 'events')
+        plt.ylabel('live states')
+        plt.legend()
+        figure.savefig(file)
+        plt.close(figure)
@@ -0,0 +1,296 @@
+
+import os
+import json
+import time
+import struct
+import asyncio
+import logging
+from typing import List, Optional, Callable, Dict
+from pycontract_core import Monitor, Message
+from pycontract_async import AsyncMonitor
+
+"""
+Framings of events sent to an `EventServer`: one JSON document per line, or
+each JSON document preceded by its length in bytes as a 4 byte big-endian integer.
+"""
+NEWLINE = 'newline'
+LENGTH = 'length'
+
+"""
+The default maximal size in bytes of a document sent to an `EventServer`.
+"""
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def encode_event(event: object, framing: str = NEWLINE) -> bytes:
+    """
+    Encodes an event as sent by a producer to an `EventServer`.
+    :param event: the event, which must be serializable as JSON.
+    :param framing: `NEWLINE` or `LENGTH`.
+    :return: the encoded event.
+    """
+    document = json.dumps(event, separators=(',', ':')).encode()
+    if framing == NEWLINE:
+        return document + b'\n'
+    return struct.pack('>I', len(document)) + document
+
+
+class FrameTooLarge(ValueError):
+    '''
+    Raised by `split_frames` when a document is larger than the maximal frame size.
+    '''
+
+    def __init__(self, length: int, max_frame_size: int, documents: List[bytes]):
+        '''
+        :param length: the size in bytes of the document, or the length announced for it.
+        :param max_frame_size: the maximal size in bytes of a document.
+        :param documents: the complete documents received before the document.
+        '''
+        super().__init__(f'document of {length} bytes exceeds maximum of {max_frame_size} bytes')
+        self.documents = documents
+
+
+def split_frames(buffer: bytearray, framing: str, max_frame_size: Optional[int] = None) -> List[bytes]:
+    """
+    Removes all complete frames from the beginning of a buffer. An incomplete frame
+    at the end of the buffer is left in the buffer.
+    :param buffer: the bytes received.
+    :param framing: `NEWLINE` or `LENGTH`.
+    :param max_frame_size: the maximal size in bytes of a document, None for no limit.
+    :return: the documents of the complete frames.
+    :raises FrameTooLarge: if a document, complete or not, is larger than `max_frame_size`.
+    """
+    documents = []
+    if framing == NEWLINE:
+        end = buffer.rfind(b'\n')
+        if end >= 0:
+            documents = [line for line in bytes(buffer[:end]).split(b'\n') if line.strip()]
+            del buffer[:end + 1]
+        if max_frame_size is not None:
+            for (index, document) in enumerate(documents + [buffer]):
+                if len(document) > max_frame_size:
+                    raise FrameTooLarge(len(document), max_frame_size, documents[:index])
+    else:
+        position = 0
+        while len(buffer) - position >= 4:
+            (length,) = struct.unpack_from('>I', buffer, position)
+            if max_frame_size is not None and length > max_frame_size:
+                raise FrameTooLarge(length, max_frame_size, documents)
+            if len(buffer) - position - 4 < length:
+                break
+            documents.append(bytes(buffer[position + 4:position + 4 + length]))
+            position += 4 + length
+        del buffer[:position]
+    return documents
+
+
+class ConnectionStats:
+    '''
+    Statistics for one producer connected to an `EventServer`.
+    '''
+
+    def __init__(self, peer: str):
+        '''
+        :param peer: the address of the producer.
+        '''
+        self.peer = peer
+        self.event_count = 0
+        self.invalid_count = 0
+        self.error_count = 0
+        self.byte_count = 0
+        self.dropped: Optional[str] = None
+        self.begin = time.perf_counter()
+        self.end: Optional[float] = None
+
+    def seconds(self) -> float:
+        '''
+        Returns how long the connection has been (or was) open.
+        :return: the number of seconds.
+        '''
+        end = self.end if self.end is not None else time.perf_counter()
+        return end - self.begin
+
+    def __str__(self) -> str:
+        seconds = self.seconds()
+        rate = self.event_count / seconds if seconds > 0 else 0.0
+        state = 'closed' if self.end is not None else 'open'
+        if self.dropped is not None:
+            state = f'dropped: {self.dropped}'
+        return (f'{self.peer} ({state}): {self.event_count} events, {self.invalid_count} invalid, '
+                f'{self.error_count} conversion errors, '
+                f'{self.byte_count} bytes, {seconds:.3f} s, {rate:.0f} events/s')
+
+
+class EventServer:
+    '''
+    A server receiving events as JSON documents from producers in other processes, possibly
+    not written in Python, over a UNIX domain socket or a TCP socket on localhost. Each
+    document is decoded (optionally converted by a `converter` function) and submitted
+    to the monitors, each wrapped in an `AsyncMonitor`. Documents received together are
+    decoded as a batch. Example of use:
+
+        async def main():
+            async with EventServer([CommandExecution()], path='/tmp/monitor.sock') as server:
+                await server.wait_closed_connections(2)
+            print(server.report())
+            print(server.messages)
+
+    A producer sends each event as one line of JSON (framing `NEWLINE`), or as a JSON document
+    preceded by its length in 4 bytes big-endian (framing `LENGTH`), see `encode_event`.
+    Events from one connection are submitted in the order sent. Events from different
+    connections are interleaved in the order they are received.
+    '''
+
+    def __init__(self, monitors: List[Monitor], path: Optional[str] = None, host: str = '127.0.0.1',
+                 port: int = 0, framing: str = NEWLINE, converter: Optional[Callable[[object], object]] = None,
+                 max_queue: int = 10000, batch_size: int = 100, read_size: int = 65536,
+                 max_frame_size: int = MAX_FRAME_SIZE):
+        '''
+        :param monitors: the monitors to submit the events to.
+        :param path: the path of the UNIX domain socket. If None a TCP socket is used.
+        :param host: the host of the TCP socket.
+        :param port: the port of the TCP socket, 0 for any free port, see `port` after `start()`.
+        :param framing: `NEWLINE` or `LENGTH`.
+        :param converter: function converting a decoded JSON document into an event, or None
+        if the document is not an event.
+        :param max_queue: the maximal number of events waiting to be evaluated by each monitor.
+        :param batch_size: the maximal number of events evaluated by a monitor at a time.
+        :param read_size: the maximal number of bytes read from a connection at a time.
+        :param max_frame_size: the maximal size in bytes of a document. A connection sending
+        a larger document is dropped, such that a corrupt length does not exhaust memory.
+
+        connections: statistics for each connection, in the order connections were made.
+        messages: the messages reported by each monitor, available after `stop()`.
+        '''
+        assert framing in [NEWLINE, LENGTH], f'unknown framing {framing}'
+        self.monitors = [AsyncMonitor(monitor, max_queue, batch_size) for monitor in monitors]
+        self.path = path
+        self.host = host
+        self.port = port
+        self.framing = framing
+        self.converter = converter
+        self.read_size = read_size
+        self.max_frame_size = max_frame_size
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.handlers: List[asyncio.Task] = []
+        self.connections: List[ConnectionStats] = []
+        self.closed = asyncio.Condition()
+        self.messages: Optional[List[List[Message]]] = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    async def start(self):
+        '''
+        Starts listening for connections.
+        '''
+        for monitor in self.monitors:
+            monitor.start()
+        if self.path is not None:
+            self.server = await asyncio.start_unix_server(self.handle, path=self.path)
+        else:
+            self.server = await asyncio.start_server(self.handle, host=self.host, port=self.port)
+            self.port = self.server.sockets[0].getsockname()[1]
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        '''
+        Handles one connection: reads frames until the producer closes the connection.
+        A last line without a newline is decoded as a document, whereas a frame cut off
+        by the end of the connection is counted as invalid. A connection sending a document
+        larger than `max_frame_size` is counted as invalid and closed.
+        :param reader: the stream to read from.
+        :param writer: the stream to the producer, only used for closing the connection.
+        '''
+        task = asyncio.current_task()
+        self.handlers.append(task)
+        peer = writer.get_extra_info('peername') or self.path
+        stats = ConnectionStats(str(peer))
+        self.connections.append(stats)
+        buffer = bytearray()
+        try:
+            while chunk := await reader.read(self.read_size):
+                stats.byte_count += len(chunk)
+                buffer.extend(chunk)
+                try:
+                    documents = split_frames(buffer, self.framing, self.max_frame_size)
+                except FrameTooLarge as e:
+                    await self.submit_batch(e.documents, stats)
+                    logger.warning(f'dropping connection from {stats.peer}: {e}')
+                    stats.invalid_count += 1
+                    stats.dropped = str(e)
+                    return
+                await self.submit_batch(documents, stats)
+            if self.framing == NEWLINE:
+                if buffer.strip():
+                    await self.submit_batch([bytes(buffer)], stats)
+            elif buffer:
+                stats.invalid_count += 1
+        finally:
+            stats.end = time.perf_counter()
+            self.handlers.remove(task)
+            writer.close()
+            async with self.closed:
+                self.closed.notify_all()
+
+    async def submit_batch(self, documents: List[bytes], stats: ConnectionStats):
+        '''
+        Decodes a batch of documents and submits the resulting events to the monitors.
+        :param documents: the documents.
+        :param stats: the statistics of the connection the documents were received on.
+        '''
+        events = []
+        for document in documents:
+            try:
+                event = json.loads(document)
+            except ValueError:
+                stats.invalid_count += 1
+                continue
+            if self.converter is not None:
+                try:
+                    event = self.converter(event)
+                except Exception as e:
+                    logger.warning(f'converter failed on document from {stats.peer}: {e!r}')
+                    stats.error_count += 1
+                    continue
+            if event is not None:
+                events.append(event)
+        for event in events:
+            for monitor in self.monitors:
+                await monitor.submit(event)
+        stats.event_count += len(events)
+
+    async def wait_closed_connections(self, count: int):
+        '''
+        Waits until a given number of connections have been closed by producers.
+        :param count: the number of connections.
+        '''
+        async with self.closed:
+            await self.closed.wait_for(
+                lambda: len([stats for stats in self.connections if stats.end is not None]) >= count)
+
+    async def stop(self) -> List[List[Message]]:
+        '''
+        Stops listening, waits for open connections to be closed, and ends the monitors.
+        The UNIX domain socket file, if any, is removed.
+        :return: the messages reported by each monitor.
+        '''
+        self.server.close()
+        await self.server.wait_closed()
+        if self.path is not None and os.path.exists(self.path):
+            os.unlink(self.path)
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        self.messages = [await monitor.end() for monitor in self.monitors]
+        return self.messages
+
+    def report(self) -> str:
+        '''
+        Returns the throughput of each connection.
+        :return: the report.
+        '''
+        return '\n'.join(str(stats) for stats in self.connections)
@@ -0,0 +1,279 @@
+
+import sys
+import json
+import time
+import struct
+from multiprocessing import shared_memory
+from typing import List, Optional, Callable, Iterable, Iterator
+from pycontract_core import Monitor
+
+"""
+Layout of the header of a `SharedRing`: the number of records written (head), the number
+of records read (tail), a flag set when the producer has finished, the capacity and the
+record size, each an 8 byte integer in native byte order. The records follow the header,
+each consisting of a 4 byte length followed by the encoded event.
+"""
+HEAD = 0
+TAIL = 8
+FINISHED = 16
+CAPACITY = 24
+RECORD_SIZE = 32
+HEADER_SIZE = 64
+LENGTH_SIZE = 4
+
+
+def encode_json(event: object) -> bytes:
+    """
+    Default encoding of events in a `SharedRing`.
+    :param event: the event, which must be serializable as JSON.
+    :return: the encoded event.
+    """
+    return json.dumps(event, separators=(',', ':')).encode()
+
+
+def decode_json(record: bytes) -> object:
+    """
+    Default decoding of events in a `SharedRing`.
+    :param record: the encoded event.
+    :return: the event.
+    """
+    return json.loads(record)
+
+
+def back_off(attempt: int):
+    """
+    Waits before checking the ring again: first just yields the processor, then sleeps.
+    :param attempt: the number of times the ring has been checked in vain.
+    """
+    time.sleep(0 if attempt < 100 else 0.0005)
+
+
+class SharedRing:
+    '''
+    A ring buffer in shared memory (`multiprocessing.shared_memory`), for handing over events
+    from one producer process to one consumer process (the monitor) on the same machine,
+    without pickling and without a pipe. The ring consists of a fixed number of fixed size
+    records. The producer writes records and then advances the head counter, the consumer
+    reads records and then advances the tail counter. Each counter is written by only one
+    side, so no lock is needed. A side that finds the ring full (or empty) polls, first
+    yielding the processor and then sleeping briefly. No memory barriers are used: the ring
+    assumes a strongly ordered memory model, such as x86-64, where a record written before
+    the head is advanced is visible to the consumer once the new head is. On weakly ordered
+    processors, such as ARM, the consumer may read a record before its bytes arrive.
+    Example of use:
+
+        # consumer
+        ring = SharedRing(capacity=65536, record_size=128)
+        start_producer(ring.name)
+        for batch in RingSource(ring).batches():
+            monitor.eval_many(batch)
+        monitor.end()
+        ring.unlink()
+
+        # producer
+        ring = SharedRing(name, create=False)
+        for event in events:
+            ring.put(event)
+        ring.finish()
+        ring.close()
+
+    Events are encoded with `encode` and decoded with `decode`, by default as JSON. A faster
+    fixed format, such as `struct.pack`, can be used for events of a known shape. An encoded
+    event must fit in `record_size - 4` bytes.
+    '''
+
+    def __init__(self, name: Optional[str] = None, capacity: int = 65536, record_size: int = 128,
+                 create: bool = True, encode: Callable[[object], bytes] = encode_json,
+                 decode: Callable[[bytes], object] = decode_json):
+        '''
+        :param name: the name of the shared memory block, generated if None and `create` is True.
+        :param capacity: the number of records, when creating the ring.
+        :param record_size: the size in bytes of each record, including its 4 byte length, when creating the ring.
+        :param create: True to create the ring, False to attach to an existing ring.
+        :param encode: function encoding an event as bytes.
+        :param decode: function decoding bytes into an event.
+        '''
+        self.encode = encode
+        self.decode = decode
+        if create:
+            assert record_size > LENGTH_SIZE, f'record size must exceed {LENGTH_SIZE} bytes'
+            self.memory = shared_memory.SharedMemory(name, create=True, size=HEADER_SIZE + capacity * record_size)
+            struct.pack_into('qqqqq', self.memory.buf, 0, 0, 0, 0, capacity, record_size)
+        elif sys.version_info >= (3, 13):
+            self.memory = shared_memory.SharedMemory(name, track=False)
+        else:
+            self.memory = shared_memory.SharedMemory(name)
+        self.name = self.memory.name
+        self.counters = self.memory.buf[:HEADER_SIZE].cast('q')
+        (self.capacity, self.record_size) = (self.counters[CAPACITY // 8], self.counters[RECORD_SIZE // 8])
+        self.head = self.read_counter(HEAD)
+        self.tail = self.read_counter(TAIL)
+        self.put_blocked: float = 0.0
+        self.get_blocked: float = 0.0
+
+    def read_counter(self, position: int) -> int:
+        '''
+        Reads a counter in the header. Counters are accessed through a memoryview cast to
+        8 byte integers. The header is aligned, and CPython copies an item of such a view
+        with a single 8 byte load or store on common platforms, so the other side does not
+        see a partially written value in practice, although Python does not guarantee it.
+        :param position: the position of the counter.
+        :return: the value.
+        '''
+        return self.counters[position // 8]
+
+    def write_counter(self, position: int, value: int):
+        '''
+        Writes a counter in the header.
+        :param position: the position of the counter.
+        :param value: the value.
+        '''
+        self.counters[position // 8] = value
+
+    def put(self, event: object):
+        '''
+        Writes an event to the ring, waiting while the ring is full. Used by the producer.
+        :param event: the event.
+        '''
+        self.put_many([event])
+
+    def put_many(self, events: Iterable[object]):
+        '''
+        Writes events to the ring, waiting while the ring is full. The head counter is
+        advanced once for as many events as there is room for, which is cheaper than
+        advancing it for each event. Used by the producer.
+        :param events: the events.
+        '''
+        buffer = self.memory.buf
+        limit = self.record_size - LENGTH_SIZE
+        room = self.capacity - (self.head - self.tail)
+        for event in events:
+            if room == 0:
+                self.write_counter(HEAD, self.head)
+                room = self.wait_for_room()
+            record = self.encode(event)
+            length = len(record)
+            assert length <= limit, f'encoded event of {length} bytes exceeds record size {self.record_size}'
+            position = HEADER_SIZE + (self.head % self.capacity) * self.record_size
+            struct.pack_into('<I', buffer, position, length)
+            buffer[position + LENGTH_SIZE:position + LENGTH_SIZE + length] = record
+            self.head += 1
+            room -= 1
+        self.write_counter(HEAD, self.head)
+
+    def wait_for_room(self) -> int:
+        '''
+        Waits until the consumer has read records. Used by the producer.
+        :return: the number of free records.
+        '''
+        begin = time.perf_counter()
+        attempt = 0
+        while (room := self.capacity - (self.head - self.read_counter(TAIL))) == 0:
+            back_off(attempt)
+            attempt += 1
+        self.tail = self.head + room - self.capacity
+        self.put_blocked += time.perf_counter() - begin
+        return room
+
+    def finish(self):
+        '''
+        Marks that the producer will not write more events. Used by the producer.
+        '''
+        self.write_counter(FINISHED, 1)
+
+    def get_batch(self, max_count: int, timeout: Optional[float] = None) -> Optional[List[object]]:
+        '''
+        Reads up to `max_count` events from the ring, waiting while the ring is empty.
+        Used by the consumer.
+        :param max_count: the maximal number of events to read.
+        :param timeout: the maximal number of seconds to wait for an event, for example
+        to detect that the producer has died. None to wait forever.
+        :return: the events, or None if the producer has finished and all events have been read.
+        '''
+        available = self.head - self.tail
+        if available == 0:
+            begin = time.perf_counter()
+            attempt = 0
+            while True:
+                finished = self.read_counter(FINISHED)
+                self.head = self.read_counter(HEAD)
+                available = self.head - self.tail
+                if available > 0:
+                    break
+                if finished:
+                    return None
+                if timeout is not None and time.perf_counter() - begin > timeout:
+                    raise TimeoutError(f'no event written to ring {self.name} for {timeout} seconds')
+                back_off(attempt)
+                attempt += 1
+            self.get_blocked += time.perf_counter() - begin
+        buffer = self.memory.buf
+        decode = self.decode
+        batch = []
+        for _ in range(min(available, max_count)):
+            position = HEADER_SIZE + (self.tail % self.capacity) * self.record_size
+            (length,) = struct.unpack_from('<I', buffer, position)
+            batch.append(decode(bytes(buffer[position + LENGTH_SIZE:position + LENGTH_SIZE + length])))
+            self.tail += 1
+        self.write_counter(TAIL, self.tail)
+        return batch
+
+    def close(self):
+        '''
+        Detaches from the shared memory.
+        '''
+        self.counters.release()
+        self.memory.close()
+
+    def unlink(self):
+        '''
+        Detaches from and destroys the shared memory. Called by the side that created the ring,
+        after the other side has closed it.
+        '''
+        self.close()
+        self.memory.unlink()
+
+
+class RingSource:
+    '''
+    An event source reading events from a `SharedRing`, as batches for `Monitor.eval_many`,
+    or one by one.
+    '''
+
+    def __init__(self, ring: SharedRing, batch_size: int = 1000, timeout: Optional[float] = None):
+        '''
+        :param ring: the ring to read from.
+        :param batch_size: the maximal number of events in a batch.
+        :param timeout: the maximal number of seconds to wait for an event, None to wait forever.
+
+        line_count: the number of events read.
+        batch_count: the number of batches read.
+        '''
+        self.ring = ring
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.line_count = 0
+        self.batch_count = 0
+
+    def batches(self) -> Iterator[List[object]]:
+        '''
+        Returns the events in batches, until the producer has finished.
+        :return: iterator over the batches.
+        '''
+        while (batch := self.ring.get_batch(self.batch_size, self.timeout)) is not None:
+            self.line_count += len(batch)
+            self.batch_count += 1
+            yield batch
+
+    def __iter__(self) -> Iterator[object]:
+        for batch in self.batches():
+            yield from batch
+
+    def verify(self, monitor: Monitor):
+        '''
+        Submits all events to a monitor in batches, and calls `end()` on the monitor.
+        :param monitor: the monitor.
+        '''
+        for batch in self.batches():
+            monitor.eval_many(batch)
+        monitor.end()
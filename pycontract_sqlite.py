@@ -0,0 +1,233 @@
+
+import sqlite3
+import dataclasses
+from typing import Optional, List, Dict, Callable, Tuple
+from pycontract_core import Relevance
+
+
+def quote_name(name: str) -> str:
+    """
+    Quotes an SQL identifier such as a table or column name.
+    :param name: the identifier.
+    :return: the quoted identifier.
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SQLiteSource:
+    '''
+    Class for reading events from a table, or the result of a query, in a SQLite
+    database. Rows are fetched in batches with `fetchmany`, so tables of any size can
+    be processed. Filters on relevant events and on time ranges are added to the
+    SQL `WHERE` clause, such that irrelevant rows are never transferred from the database.
+    Example of use:
+
+        with SQLiteSource('telemetry.db', table='events', relevance=m.get_relevance()) as source:
+            for event in source:
+                m.eval(event)
+
+    By default each row is returned as a dictionary mapping column names to values.
+    Alternatively, rows can be mapped to `@data` classes with the `kind_column` and `kinds`
+    parameters, or by a user provided converter.
+
+    When reading from a table, monitoring can be resumed later from where it stopped,
+    by passing the value of `last_rowid` as the `after_rowid` argument of a new source.
+
+    The connection reading the events is opened when the first rows are fetched, in the
+    thread iterating over the source, which can hence be wrapped in a `PrefetchSource`.
+    '''
+
+    def __init__(self, database: str, table: Optional[str] = None, query: Optional[str] = None,
+                 parameters: Tuple = (),
+                 converter: Optional[Callable[[Dict[str, object]], object]] = None,
+                 kind_column: Optional[str] = None, kinds: Optional[Dict[object, type]] = None,
+                 relevance: Optional[Relevance] = None,
+                 time_column: Optional[str] = None, time_from: object = None, time_to: object = None,
+                 after_rowid: Optional[int] = None,
+                 batch_size: int = 1000):
+        '''
+        :param database: name of the SQLite database file.
+        :param table: the table to read events from. Exactly one of `table` and `query` must be provided.
+        :param query: an SQL query the rows of which are the events.
+        :param parameters: parameters to `query`, if it contains placeholders.
+        :param converter: optional function converting a row, as a dictionary, into an event.
+        :param kind_column: the column discriminating between kinds of events.
+        :param kinds: maps values of `kind_column` to `@data` classes. A row is converted to
+        an instance of the class of its kind, taking the values of the columns named as the
+        fields of the class. Rows of other kinds are not read.
+        :param relevance: when not None, only relevant rows are read. Usually obtained with
+        `monitor.get_relevance()`. Event classes can only be pushed into the query when `kinds` is provided.
+        :param time_column: the column containing time stamps, needed for time range filters.
+        :param time_from: when not None, only rows with time stamp >= `time_from` are read.
+        :param time_to: when not None, only rows with time stamp < `time_to` are read.
+        :param after_rowid: when not None, only table rows with rowid > `after_rowid` are read.
+        :param batch_size: the number of rows fetched from the database at a time.
+
+        line_count: the number of events returned.
+        last_rowid: the rowid of the last row read from the table.
+
+        Raises `ValueError` if a column filtered on is not a column of the table or query.
+        '''
+        assert (table is None) != (query is None), 'exactly one of table and query must be provided'
+        assert after_rowid is None or table is not None, 'rowids can only be used when reading a table'
+        assert kinds is None or kind_column is not None, 'kinds require a kind column'
+        assert time_column is not None or (time_from is None and time_to is None), \
+            'time_column is required for time ranges'
+        self.database = database
+        self.connection: Optional[sqlite3.Connection] = None
+        self.table = table
+        self.converter = converter
+        self.kind_column = kind_column
+        self.kinds = kinds
+        self.relevance = relevance
+        self.batch_size = batch_size
+        self.cursor: Optional[sqlite3.Cursor] = None
+        self.column_names: List[str] = []
+        self.batch: List[tuple] = []
+        self.batch_index: int = 0
+        self.line_count = 0
+        self.last_rowid: Optional[int] = after_rowid
+        self.check_relevance: bool = False
+        self.filtered_columns: List[str] = []
+        (self.sql, self.parameters) = self.mk_query(table, query, parameters, time_column, time_from, time_to, after_rowid)
+        self.check_columns(table, query, parameters)
+
+    def mk_query(self, table: Optional[str], query: Optional[str], parameters: Tuple,
+                 time_column: Optional[str], time_from: object, time_to: object,
+                 after_rowid: Optional[int]) -> Tuple[str, List[object]]:
+        '''
+        Creates the SQL query reading the events, with the filters pushed into the `WHERE` clause.
+        :return: the SQL query and its parameters.
+        '''
+        if table is not None:
+            sql = f'SELECT rowid AS __rowid__, * FROM {quote_name(table)}'
+        else:
+            sql = f'SELECT * FROM ({query})'
+        sql_parameters: List[object] = list(parameters)
+        conditions: List[str] = []
+
+        def add_in_condition(column: str, values: List[object]) -> str:
+            self.filtered_columns.append(column)
+            sql_parameters.extend(values)
+            return f'{quote_name(column)} IN ({", ".join("?" * len(values))})'
+
+        if self.kinds is not None:
+            conditions.append(add_in_condition(self.kind_column, list(self.kinds.keys())))
+        if self.relevance is not None:
+            alternatives = self.mk_relevance_conditions()
+            if alternatives is None:
+                self.check_relevance = True  # has to be checked on the events instead
+            else:
+                disjuncts = [add_in_condition(column, values) for (column, values) in alternatives]
+                conditions.append(f'({" OR ".join(disjuncts)})' if disjuncts else '0')
+        if time_from is not None or time_to is not None:
+            self.filtered_columns.append(time_column)
+        if time_from is not None:
+            sql_parameters.append(time_from)
+            conditions.append(f'{quote_name(time_column)} >= ?')
+        if time_to is not None:
+            sql_parameters.append(time_to)
+            conditions.append(f'{quote_name(time_column)} < ?')
+        if after_rowid is not None:
+            sql_parameters.append(after_rowid)
+            conditions.append('rowid > ?')
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        if table is not None:
+            sql += ' ORDER BY rowid'
+        return sql, sql_parameters
+
+    def check_columns(self, table: Optional[str], query: Optional[str], parameters: Tuple):
+        '''
+        Checks that the columns filtered on in the `WHERE` clause are columns of the table or
+        query, such that a misspelled column is reported clearly rather than as an SQL error.
+        '''
+        if not self.filtered_columns:
+            return
+        base = f'SELECT * FROM {quote_name(table)}' if table is not None else f'SELECT * FROM ({query})'
+        connection = sqlite3.connect(self.database)
+        try:
+            cursor = connection.execute(f'{base} LIMIT 0', [] if table is not None else parameters)
+            columns = {description[0].lower() for description in cursor.description}
+        finally:
+            connection.close()
+        for column in self.filtered_columns:
+            if column.lower() not in columns:
+                raise ValueError(f'{self.database}: no column {column} to filter on in {base}')
+
+    def mk_relevance_conditions(self) -> Optional[List[Tuple[str, List[object]]]]:
+        '''
+        Translates the relevance declaration into a list of alternative `IN` conditions,
+        each a column and the relevant values of that column.
+        :return: the alternatives, or None if the relevance cannot be expressed in SQL.
+        '''
+        alternatives = []
+        for (column, values) in self.relevance.values.items():
+            if not isinstance(column, str):
+                return None
+            alternatives.append((column, list(values)))
+        if self.relevance.classes:
+            if self.kinds is None:
+                return None
+            relevant_kinds = [kind for (kind, kind_class) in self.kinds.items()
+                              if issubclass(kind_class, self.relevance.class_tuple)]
+            alternatives.append((self.kind_column, relevant_kinds))
+        return alternatives
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while True:
+            if self.batch_index == len(self.batch):
+                self.fetch_batch()
+            row = self.batch[self.batch_index]
+            self.batch_index += 1
+            row_dict = dict(zip(self.column_names, row))
+            if self.table is not None:
+                self.last_rowid = row_dict.pop('__rowid__')
+            event = self.convert(row_dict)
+            if self.check_relevance and not self.relevance.admits_event(event):
+                continue
+            self.line_count += 1
+            if self.line_count % 100000 == 0:
+                print(f'- {self.line_count}')
+            return event
+
+    def fetch_batch(self):
+        '''
+        Fetches the next batch of rows from the database, executing the query first if needed.
+        Raises `StopIteration` if there are no more rows.
+        '''
+        if self.cursor is None:
+            if self.connection is None:
+                self.connection = sqlite3.connect(self.database, check_same_thread=False)
+            self.cursor = self.connection.execute(self.sql, self.parameters)
+            self.column_names = [description[0] for description in self.cursor.description]
+        self.batch = self.cursor.fetchmany(self.batch_size)
+        self.batch_index = 0
+        if not self.batch:
+            raise StopIteration
+
+    def convert(self, row: Dict[str, object]) -> object:
+        '''
+        Converts a row into an event.
+        :param row: the row as a dictionary from column names to values.
+        :return: the event.
+        '''
+        if self.converter is not None:
+            return self.converter(row)
+        if self.kinds is not None:
+            event_class = self.kinds[row[self.kind_column]]
+            return event_class(*[row[field.name] for field in dataclasses.fields(event_class)])
+        return row
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
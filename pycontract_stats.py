@@ -0,0 +1,216 @@
+
+import os
+import time
+import threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Dict, Tuple, Callable, Optional
+from pycontract_core import Monitor
+
+
+def escape_label(value: object) -> str:
+    """
+    Escapes a label value in the Prometheus text format.
+    :param value: the value.
+    :return: the escaped value.
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text(snapshot: Dict[str, object]) -> str:
+    """
+    Formats a snapshot taken by a `StatsSampler` in the Prometheus text exposition format.
+    :param snapshot: the snapshot.
+    :return: the metrics.
+    """
+    monitor = escape_label(snapshot['monitor'])
+    lines = []
+
+    def metric(name: str, kind: str, description: str, samples: List[Tuple[str, object]]):
+        lines.append(f'# HELP pycontract_{name} {description}')
+        lines.append(f'# TYPE pycontract_{name} {kind}')
+        for (labels, value) in samples:
+            lines.append(f'pycontract_{name}{{monitor="{monitor}"{labels}}} {value}')
+
+    metric('events_total', 'counter', 'Events processed.', [('', snapshot['events'])])
+    metric('events_per_second', 'gauge', 'Events processed per second over a sliding window.',
+           [(f',window="{window}s"', f'{rate:.3f}') for (window, rate) in snapshot['events_per_second'].items()])
+    metric('live_states', 'gauge', 'Live states per state class.',
+           [(f',state="{escape_label(name)}"', count) for (name, count) in sorted(snapshot['states_per_class'].items())])
+    metric('slices', 'gauge', 'Slices of the state vector.', [('', snapshot['slices'])])
+    metric('messages_total', 'counter', 'Messages reported, per kind.',
+           [(f',kind="{escape_label(kind)}"', count) for (kind, count) in sorted(snapshot['messages'].items())])
+    if snapshot['reader_lag'] is not None:
+        metric('reader_lag', 'gauge', 'Events read but not yet processed.', [('', snapshot['reader_lag'])])
+    for (kind, summary) in snapshot.get('latency', {}).items():
+        name = f'{kind}_latency_seconds'
+        metric(name, 'summary', f"Latency of {kind.replace('_', ' ')} in seconds.",
+               [(f',quantile="{float(key[1:]) / 100:g}"', f'{value / 1e9:.9f}')
+                for (key, value) in summary.items() if key.startswith('p')])
+        lines.append(f'pycontract_{name}_count{{monitor="{monitor}"}} {summary["count"]}')
+        lines.append(f'pycontract_{name}_sum{{monitor="{monitor}"}} {summary["total"] / 1e9:.9f}')
+    return '\n'.join(lines) + '\n'
+
+
+class StatsSampler:
+    '''
+    Takes snapshots of the statistics of a monitor (see `Monitor.stats()`) at regular intervals
+    in a background thread, adding the number of events processed per second over sliding
+    windows, and the lag of the reader the events come from. Monitoring itself is not slowed
+    down, apart from competing with the thread for the processor. Example of use:
+
+        sampler = StatsSampler(monitor, interval=1.0, source=reader)
+        PrometheusExporter(sampler, file='metrics.prom')
+        sampler.start()
+        monitor.verify(reader)
+        sampler.stop()
+    '''
+
+    def __init__(self, monitor: Monitor, interval: float = 1.0, windows: Tuple[int, ...] = (10, 60, 300),
+                 source: Optional[object] = None):
+        '''
+        :param monitor: the monitor.
+        :param interval: the number of seconds between snapshots.
+        :param windows: the lengths in seconds of the windows over which events per second are computed.
+        :param source: the reader the events come from, with a `line_count` attribute counting the
+        events read, or None.
+        '''
+        self.monitor = monitor
+        self.interval = interval
+        self.windows = windows
+        self.source = source
+        self.history: deque = deque()
+        self.latest: Optional[Dict[str, object]] = None
+        self.listeners: List[Callable[[Dict[str, object]], None]] = []
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def add_listener(self, listener: Callable[[Dict[str, object]], None]):
+        '''
+        Adds a function to be called with each snapshot taken, in the background thread.
+        :param listener: the function.
+        '''
+        self.listeners.append(listener)
+
+    def start(self):
+        '''
+        Starts taking snapshots.
+        '''
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, name='pycontract-stats', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        '''
+        The loop of the background thread.
+        '''
+        while True:
+            self.sample()
+            if self.stopped.wait(self.interval):
+                return
+
+    def sample(self) -> Dict[str, object]:
+        '''
+        Takes a snapshot, and passes it to the listeners.
+        :return: the snapshot.
+        '''
+        now = time.monotonic()
+        snapshot = self.monitor.stats()
+        events = snapshot['events']
+        self.history.append((now, events))
+        while now - self.history[0][0] > max(self.windows):
+            self.history.popleft()
+        snapshot['events_per_second'] = {window: self.rate(now, events, window) for window in self.windows}
+        if self.source is not None:
+            snapshot['reader_lag'] = max(0, self.source.line_count - events)
+        else:
+            snapshot['reader_lag'] = None
+        snapshot['time'] = time.time()
+        self.latest = snapshot
+        for listener in self.listeners:
+            listener(snapshot)
+        return snapshot
+
+    def rate(self, now: float, events: int, window: int) -> float:
+        '''
+        Computes the events processed per second over a window ending now.
+        :param now: the current time.
+        :param events: the number of events processed until now.
+        :param window: the length of the window in seconds.
+        :return: the events per second, 0 if there is no earlier snapshot in the window.
+        '''
+        for (then, events_then) in self.history:
+            if now - then <= window:
+                return (events - events_then) / (now - then) if now > then else 0.0
+        return 0.0
+
+    def stop(self):
+        '''
+        Stops taking snapshots, after taking a last one.
+        '''
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.sample()
+
+
+class PrometheusExporter:
+    '''
+    Exports the snapshots of a `StatsSampler` in the Prometheus text format, by writing
+    them to a file (for example for the textfile collector of the node exporter), and/or
+    by serving them over HTTP on localhost.
+    '''
+
+    def __init__(self, sampler: StatsSampler, file: Optional[str] = None, port: Optional[int] = None,
+                 host: str = '127.0.0.1'):
+        '''
+        :param sampler: the sampler taking the snapshots.
+        :param file: the file the metrics are written to after each snapshot, or None.
+        :param port: the port the metrics are served on, or None. 0 to choose a free port.
+        :param host: the host address the metrics are served on.
+        '''
+        self.sampler = sampler
+        self.file = file
+        self.text = ''
+        self.server: Optional[ThreadingHTTPServer] = None
+        sampler.add_listener(self.export)
+        if port is not None:
+            exporter = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    body = exporter.text.encode()
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            self.server = ThreadingHTTPServer((host, port), Handler)
+            self.port = self.server.server_address[1]
+            threading.Thread(target=self.server.serve_forever, name='pycontract-metrics', daemon=True).start()
+
+    def export(self, snapshot: Dict[str, object]):
+        '''
+        Exports a snapshot. The file is replaced atomically, such that readers never see
+        a partially written file.
+        :param snapshot: the snapshot.
+        '''
+        self.text = prometheus_text(snapshot)
+        if self.file is not None:
+            temporary = f'{self.file}.tmp'
+            with open(temporary, 'w') as f:
+                f.write(self.text)
+            os.replace(temporary, self.file)
+
+    def close(self):
+        '''
+        Stops serving the metrics.
+        '''
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
@@ -0,0 +1,268 @@
+
+import sys
+import ast
+import json
+import struct
+import argparse
+from collections import deque
+from typing import List, Dict, Set, Tuple, Iterator, Optional, Union
+from pycontract_core import Monitor, State
+
+"""
+The fields of a transition record: the event number, the name of the monitor, the key of
+the slice (as returned by `repr`, None for the main state vector), the source state, the resulting
+states, and the names of the classes of the source state and the resulting states.
+"""
+FIELDS = ['event', 'monitor', 'key', 'source', 'results', 'classes']
+
+"""
+The first bytes of a trace file. Each record follows as a JSON list of the values of
+`FIELDS`, preceded by its length in bytes as a 4 byte little-endian integer.
+"""
+MAGIC = b'PYCTRACE1\n'
+
+
+class TraceFilter:
+    '''
+    Selects transition records by event number range, slice key, state class and monitor.
+    A criterion given as None selects all records.
+    '''
+
+    def __init__(self, events: Optional[Tuple[Optional[int], Optional[int]]] = None,
+                 keys: Optional[List[object]] = None, state_classes: Optional[List[Union[str, type]]] = None,
+                 monitors: Optional[List[str]] = None):
+        '''
+        :param events: the first and last event numbers (inclusive), either of which can be None.
+        :param keys: the keys of the slices, compared by their `repr`, such that the key 1 and the key '1'
+        are different.
+        :param state_classes: the state classes, or their names. A transition is selected if
+        its source state or one of its resulting states is of one of these classes.
+        :param monitors: the names of the monitors.
+        '''
+        (self.first, self.last) = events if events is not None else (None, None)
+        self.keys: Optional[Set[str]] = None if keys is None else {repr(key) for key in keys}
+        self.state_classes: Optional[Set[str]] = None if state_classes is None else \
+            {name if isinstance(name, str) else name.__name__ for name in state_classes}
+        self.monitors: Optional[Set[str]] = None if monitors is None else set(monitors)
+
+    def selects_vector(self, event: int, monitor: str, key: Optional[object]) -> bool:
+        '''
+        Returns True if transitions of a state vector evaluated on an event can be selected.
+        :param event: the event number.
+        :param monitor: the name of the monitor.
+        :param key: the key of the slice, None for the main state vector.
+        :return: True if transitions can be selected.
+        '''
+        return self.selects_event(event, monitor) and \
+               (self.keys is None or (key is not None and repr(key) in self.keys))
+
+    def selects_event(self, event: int, monitor: str) -> bool:
+        '''
+        Returns True if transitions of a monitor on an event can be selected, not considering keys.
+        :param event: the event number.
+        :param monitor: the name of the monitor.
+        :return: True if transitions can be selected.
+        '''
+        return (self.first is None or event >= self.first) and \
+               (self.last is None or event <= self.last) and \
+               (self.monitors is None or monitor in self.monitors)
+
+    def selects_classes(self, classes: List[str]) -> bool:
+        '''
+        Returns True if a transition between states of given classes is selected.
+        :param classes: the names of the classes of the source state and the resulting states.
+        :return: True if the transition is selected.
+        '''
+        return self.state_classes is None or not self.state_classes.isdisjoint(classes)
+
+    def selects(self, record: Dict[str, object]) -> bool:
+        '''
+        Returns True if a record is selected.
+        :param record: the record, as returned by `Tracer.records()` or `read_trace`.
+        :return: True if the record is selected.
+        '''
+        return self.selects_event(record['event'], record['monitor']) and \
+            (self.keys is None or record['key'] in self.keys) and \
+            self.selects_classes(record['classes'])
+
+
+class Tracer:
+    '''
+    Records the transitions taken by a monitor and its sub-monitors as structured records
+    (see `FIELDS`), in a bounded ring buffer keeping the latest records, and/or in a binary
+    file, which can be viewed with `python pycontract_trace.py FILE`. Unlike debug mode
+    (`set_debug(True)`), which prints every state evaluated, the cost is
+    proportional to what is traced: the event, monitor and key criteria of the filter are
+    checked once per state vector evaluated, and only the states of selected vectors are
+    checked and formatted. Example of use:
+
+        tracer = Tracer(capacity=10000, file='trace.bin', trace_filter=TraceFilter(keys=['CMD42']))
+        tracer.attach(monitor)
+        monitor.verify(trace)
+        tracer.close()
+        for record in tracer.records(): ...
+
+    Evaluating a state without a transition firing (staying in the state) is only
+    recorded with `stays` True.
+    '''
+
+    def __init__(self, capacity: int = 100000, file: Optional[str] = None,
+                 trace_filter: Optional[TraceFilter] = None, stays: bool = False):
+        '''
+        :param capacity: the maximal number of records kept in memory, the oldest being dropped.
+        :param file: the file all records are written to, or None.
+        :param trace_filter: the filter selecting the records, or None to record all transitions.
+        :param stays: True to also record evaluations where no transition fired.
+
+        record_count: the number of records recorded, including those dropped from the ring buffer.
+        '''
+        self.ring: deque = deque(maxlen=capacity)
+        self.trace_filter = trace_filter if trace_filter is not None else TraceFilter()
+        self.stays = stays
+        self.record_count = 0
+        self.monitors: List[Monitor] = []
+        self.file = None
+        if file is not None:
+            self.file = open(file, 'wb')
+            self.file.write(MAGIC)
+
+    def attach(self, monitor: Monitor):
+        '''
+        Starts recording the transitions of a monitor and its sub-monitors (recursively).
+        :param monitor: the monitor.
+        '''
+        monitor.tracer = self
+        self.monitors.append(monitor)
+        for sub_monitor in monitor.monitors:
+            self.attach(sub_monitor)
+
+    def detach(self):
+        '''
+        Stops recording transitions.
+        '''
+        for monitor in self.monitors:
+            monitor.tracer = None
+        self.monitors = []
+
+    def traces(self, monitor: Monitor, key: Optional[object]) -> bool:
+        '''
+        Returns True if the transitions of a state vector evaluated now can be selected.
+        Called by the monitor before evaluating the states of the vector.
+        :param monitor: the monitor.
+        :param key: the key of the slice, None for the main state vector.
+        :return: True if transitions can be selected.
+        '''
+        return self.trace_filter.selects_vector(monitor.event_count, monitor.get_monitor_name(), key)
+
+    def record(self, monitor: Monitor, key: Optional[object], source: State, results: List[State]):
+        '''
+        Records a transition, if selected. Called by the monitor for each state evaluated in a
+        state vector for which `traces` returned True.
+        :param monitor: the monitor.
+        :param key: the key of the slice, None for the main state vector.
+        :param source: the state evaluated.
+        :param results: the resulting states.
+        '''
+        if not self.stays and len(results) == 1 and results[0] is source:
+            return
+        classes = [type(source).__name__] + [type(state).__name__ for state in results]
+        if not self.trace_filter.selects_classes(classes):
+            return
+        record = (monitor.event_count, monitor.get_monitor_name(), None if key is None else repr(key),
+                  str(source), [str(state) for state in results], classes)
+        self.ring.append(record)
+        self.record_count += 1
+        if self.file is not None:
+            data = json.dumps(record, separators=(',', ':')).encode()
+            self.file.write(struct.pack('<I', len(data)) + data)
+
+    def records(self) -> List[Dict[str, object]]:
+        '''
+        Returns the records in the ring buffer, oldest first.
+        :return: the records, mapping the names in `FIELDS` to values.
+        '''
+        return [dict(zip(FIELDS, record)) for record in self.ring]
+
+    def close(self):
+        '''
+        Stops recording transitions, and closes the file.
+        '''
+        self.detach()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __str__(self) -> str:
+        return '\n'.join(format_record(record) for record in self.records())
+
+
+def read_trace(file: str) -> Iterator[Dict[str, object]]:
+    """
+    Reads the records of a trace file written by a `Tracer`. A record cut off at the end
+    of the file, as when the monitor is still running, is ignored.
+    :param file: the file.
+    :return: the records, mapping the names in `FIELDS` to values.
+    """
+    with open(file, 'rb') as f:
+        assert f.read(len(MAGIC)) == MAGIC, f'{file} is not a trace file'
+        while len(header := f.read(4)) == 4:
+            (length,) = struct.unpack('<I', header)
+            data = f.read(length)
+            if len(data) < length:
+                return
+            yield dict(zip(FIELDS, json.loads(data)))
+
+
+def format_record(record: Dict[str, object]) -> str:
+    """
+    Formats a record on one line.
+    :param record: the record.
+    :return: the line.
+    """
+    vector = record['monitor'] if record['key'] is None else f"{record['monitor']}[{record['key']}]"
+    return f"{record['event']:>8} {vector}: {record['source']} -> [{', '.join(record['results'])}]"
+
+
+def literal(text: str) -> object:
+    """
+    Converts a slice key given on the command line to a value.
+    :param text: the key, a Python literal, or else a string.
+    :return: the value of the literal, or the text itself.
+    """
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def main(arguments: List[str]):
+    """
+    Command line interface for viewing trace files.
+    :param arguments: the command line arguments.
+    """
+    parser = argparse.ArgumentParser(prog='pycontract_trace', description='Views a PyContract trace file.')
+    parser.add_argument('file', help='the trace file')
+    parser.add_argument('--first', type=int, default=None, help='the first event number shown')
+    parser.add_argument('--last', type=int, default=None, help='the last event number shown')
+    parser.add_argument('--key', nargs='+', default=None,
+                        help='the slice keys shown, as Python literals (such as 12 or \'12\'), or else as strings')
+    parser.add_argument('--state', nargs='+', default=None, help='the state classes shown')
+    parser.add_argument('--monitor', nargs='+', default=None, help='the monitors shown')
+    parser.add_argument('--summary', action='store_true', help='shows the number of transitions per monitor and state class')
+    options = parser.parse_args(arguments)
+    keys = None if options.key is None else [literal(key) for key in options.key]
+    trace_filter = TraceFilter((options.first, options.last), keys, options.state, options.monitor)
+    counts: Dict[Tuple[str, str], int] = {}
+    for record in read_trace(options.file):
+        if trace_filter.selects(record):
+            if options.summary:
+                name = (record['monitor'], record['classes'][0])
+                counts[name] = counts.get(name, 0) + 1
+            else:
+                print(format_record(record))
+    for ((monitor, state), count) in sorted(counts.items(), key=lambda item: -item[1]):
+        print(f'{monitor}.{state}: {count}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
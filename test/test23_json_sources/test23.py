@@ -0,0 +1,107 @@
+import os
+import json
+import tempfile
+from pycontract import *
+import unittest
+import test.utest
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Reading events from JSON and JSON-Lines files, without loading
+the whole trace into memory.
+"""
+
+
+class CommandMonitor(Monitor):
+    def transition(self, event):
+        match event:
+            case {'id': 'dispatch', 'task_id': task_id, 'cmd_nr': cmd_nr, 'cmd_type': 'START'}:
+                return CommandMonitor.DoReply(task_id, cmd_nr)
+
+    @data
+    class DoReply(HotState):
+        task_id: int
+        cmd_nr: int
+
+        def transition(self, event):
+            match event:
+                case {'id': 'reply', 'task_id': self.task_id}:
+                    return CommandMonitor.DoComplete(self.task_id, self.cmd_nr)
+
+    @data
+    class DoComplete(HotState):
+        task_id: int
+        cmd_nr: int
+
+        def transition(self, event):
+            match event:
+                case {'id': 'complete', 'task_id': self.task_id, 'cmd_nr': self.cmd_nr, 'cmd_type': 'START'}:
+                    return CommandMonitor.DoNotComplete(self.task_id, self.cmd_nr)
+
+    @data
+    class DoNotComplete(State):
+        task_id: int
+        cmd_nr: int
+
+        def transition(self, event):
+            match event:
+                case {'id': 'complete', 'task_id': self.task_id, 'cmd_nr': self.cmd_nr, 'cmd_type': 'START'}:
+                    return error()
+
+
+fields = ['id', 'task_id', 'cmd_nr', 'cmd_type']
+
+errors_expected = [
+    "*** error transition in CommandMonitor:\n    state DoNotComplete(2, 1)\n    event 7 {'id': 'complete', 'task_id': 2, 'cmd_nr': 1, 'cmd_type': 'START'}\n    "
+]
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        m = CommandMonitor()
+        with JSONSource(DIR + 'file1.json', fields=fields) as source:
+            m.verify(source)
+            self.assertEqual(source.line_count, 7)
+        self.assert_equal(errors_expected, m.get_all_message_texts())
+
+    def test2(self):
+        with JSONSource(DIR + 'file1.json', chunk_size=7) as source:
+            events = list(source)
+        with open(DIR + 'file1.json') as file:
+            self.assertEqual(json.load(file), events)
+
+    def test3(self):
+        with JSONSource(DIR + 'file1.json', fields=['id']) as source:
+            events = list(source)
+        self.assertEqual(events[0], {'id': 'dispatch'})
+
+    def test4(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'events.json')
+            for (text, events) in [('[]', []), ('[ 1 , 2 ]', [1, 2]), ('[1,[2,3]]', [1, [2, 3]])]:
+                with open(file, 'w') as f:
+                    f.write(text)
+                with JSONSource(file, chunk_size=1) as source:
+                    self.assertEqual(list(source), events)
+            for text in ['[1 2]', '[,1]', '[1,,2]', '[1,]', '[1', '[1,']:
+                with open(file, 'w') as f:
+                    f.write(text)
+                with JSONSource(file, chunk_size=1) as source:
+                    with self.assertRaises(ValueError, msg=text):
+                        list(source)
+
+
+class Test2(test.utest.Test):
+    def test1(self):
+        m = CommandMonitor()
+        with JSONLSource(DIR + 'file1.jsonl', fields=fields) as source:
+            m.verify(source)
+            self.assertEqual(source.line_count, 7)
+        self.assert_equal(errors_expected, m.get_all_message_texts())
+
+    def test2(self):
+        with JSONLSource(DIR + 'file1.jsonl', fields=['id', 'data']) as source:
+            events = list(source)
+        self.assertEqual(events[2], {'id': 'complete', 'data': {'time': 10, 'memory': 100}})
+        self.assertEqual(events[3], {'id': 'dispatch'})
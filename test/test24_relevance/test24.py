@@ -0,0 +1,171 @@
+import os
+from typing import Optional, List, Dict
+from pycontract import *
+import unittest
+import test.utest
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Monitors declaring relevance statically, allowing readers
+to skip irrelevant rows before events are constructed.
+"""
+
+
+@data
+class Dispatch:
+    time: int
+    cmd: str
+
+
+@data
+class Complete:
+    time: int
+    cmd: str
+
+
+class CommandExecution(Monitor):
+    def relevant_values(self) -> Optional[Dict[object, List[object]]]:
+        return {'OP': ['CMD_DISPATCH', 'CMD_COMPLETE']}
+
+    def transition(self, event):
+        match event:
+            case {'OP': 'CMD_DISPATCH', 'TIME': time, 'CMD': cmd}:
+                return self.DoComplete(int(time), cmd)
+
+    @data
+    class DoComplete(HotState):
+        time: int
+        cmd: str
+
+        def transition(self, event):
+            match event:
+                case {'OP': 'CMD_COMPLETE', 'TIME': time, 'CMD': self.cmd}:
+                    if int(time) - self.time <= 3000:
+                        return ok
+                    else:
+                        return error(f'{self.cmd} completion takes too long')
+
+
+class Downloads(Monitor):
+    def relevant_values(self) -> Optional[Dict[object, List[object]]]:
+        return {'OP': ['CMD_DOWNLOAD']}
+
+    def transition(self, event):
+        match event:
+            case {'OP': 'CMD_DOWNLOAD', 'CMD': cmd}:
+                return info(f'download {cmd}')
+
+
+class Dispatches(Monitor):
+    def relevant_event_classes(self) -> Optional[List[type]]:
+        return [Dispatch]
+
+    def transition(self, event):
+        match event:
+            case Complete(_, cmd):
+                return error(f'complete {cmd} submitted')
+
+
+class PositionalDispatches(Monitor):
+    def relevant_values(self) -> Optional[Dict[object, List[object]]]:
+        return {0: ['CMD_DISPATCH']}
+
+    def transition(self, event):
+        match event:
+            case Dispatch(_, cmd):
+                return error(f'dispatch {cmd} submitted')
+
+
+class Everything(Monitor):
+    def transition(self, event):
+        pass
+
+
+class Monitors(Monitor):
+    def __init__(self):
+        super().__init__()
+        self.monitor_this(CommandExecution(), Downloads())
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        m = CommandExecution()
+        events = []
+        with CSVSource(DIR + 'commands.csv', relevance=m.get_relevance()) as csv_reader:
+            for event in csv_reader:
+                events.append(event)
+                m.eval(event)
+            self.assertEqual(csv_reader.line_count, 7)
+        m.end()
+        self.assertEqual([event['OP'] for event in events], ['CMD_DISPATCH', 'CMD_DISPATCH', 'CMD_COMPLETE', 'CMD_COMPLETE'])
+        self.assertEqual(events[0], {'OP': 'CMD_DISPATCH', 'TIME': '1000', 'CMD': 'TURN'})
+        errors_expected = [
+            "*** error transition in CommandExecution:\n    state DoComplete(1000, 'TURN')\n    event 3 {'OP': 'CMD_COMPLETE', 'TIME': '5000', 'CMD': 'TURN'}\n    TURN completion takes too long"
+        ]
+        self.assert_equal(errors_expected, m.get_all_message_texts())
+
+    def test2(self):
+        m = Monitors()
+        relevance = m.get_relevance()
+        self.assertEqual(relevance.values, {'OP': {'CMD_DISPATCH', 'CMD_COMPLETE', 'CMD_DOWNLOAD'}})
+        with CSVSource(DIR + 'commands.csv', relevance=relevance) as csv_reader:
+            ops = [event['OP'] for event in csv_reader]
+        self.assertEqual(ops, ['CMD_DISPATCH', 'CMD_DOWNLOAD', 'CMD_DISPATCH', 'CMD_COMPLETE', 'CMD_COMPLETE'])
+
+    def test3(self):
+        m = Monitors()
+        m.monitor_this(Everything())
+        self.assertIsNone(m.get_relevance())
+
+
+class Test2(test.utest.Test):
+    def test1(self):
+        m = Dispatches()
+        m.eval(Dispatch(1000, 'TURN'))
+        m.eval(Complete(2000, 'TURN'))
+        m.end()
+        self.assertFalse(m.errors_found())
+
+    def test2(self):
+        def classify(row: List[str]) -> Optional[type]:
+            match row[0]:
+                case 'CMD_DISPATCH':
+                    return Dispatch
+                case 'CMD_COMPLETE':
+                    return Complete
+
+        def converter(row: List[str]) -> object:
+            return classify(row)(int(row[1]), row[2])
+
+        m = Dispatches()
+        csv_reader = CSVReader(DIR + 'commands.csv', converter, skip=1, relevance=m.get_relevance(), classify=classify)
+        events = list(csv_reader)
+        csv_reader.close()
+        self.assertEqual(events, [Dispatch(1000, 'TURN'), Dispatch(4000, 'THRUST')])
+
+    def test3(self):
+        m = CommandExecution()
+        relevance = m.get_relevance()
+        with self.assertRaises(ValueError):
+            CSVReader(DIR + 'commands.csv', lambda row: row, skip=1, relevance=relevance)
+        csv_reader = CSVReader(DIR + 'commands.csv', lambda row: row, skip=1, relevance=relevance,
+                               column_names=['OP', 'TIME', 'CMD'])
+        rows = list(csv_reader)
+        csv_reader.close()
+        self.assertEqual([row[0] for row in rows], ['CMD_DISPATCH', 'CMD_DISPATCH', 'CMD_COMPLETE', 'CMD_COMPLETE'])
+
+    def test4(self):
+        m = PositionalDispatches()
+        csv_reader = CSVReader(DIR + 'commands.csv', lambda row: Dispatch(int(row[1]), row[2]), skip=1,
+                               relevance=m.get_relevance())
+        for event in csv_reader:
+            m.eval(event)
+        csv_reader.close()
+        m.end()
+        self.assertEqual(len(m.get_all_message_texts()), 2)
+        m = PositionalDispatches()
+        m.eval(['CMD_COMPLETE', '5000', 'TURN'])
+        m.eval(Dispatch(1000, 'TURN'))
+        self.assertEqual(m.event_count, 2)
+        self.assertEqual(len(m.get_all_message_texts()), 1)
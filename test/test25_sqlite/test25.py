@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import tempfile
+from typing import Optional, List
+from pycontract import *
+import unittest
+import test.utest
+
+"""
+Reading events from a SQLite database, with relevance and
+time range filters pushed into the SQL query.
+"""
+
+
+@data
+class Dispatch:
+    time: int
+    cmd: str
+
+
+@data
+class Complete:
+    time: int
+    cmd: str
+
+
+class CommandExecution(Monitor):
+    def relevant_event_classes(self) -> Optional[List[type]]:
+        return [Dispatch, Complete]
+
+    def transition(self, event):
+        match event:
+            case Dispatch(time, cmd):
+                return self.DoComplete(time, cmd)
+
+    @data
+    class DoComplete(HotState):
+        time: int
+        cmd: str
+
+        def transition(self, event):
+            match event:
+                case Complete(time, self.cmd):
+                    if time - self.time <= 3000:
+                        return ok
+                    else:
+                        return error(f'{self.cmd} completion takes too long')
+
+
+rows = [
+    ('CMD_DISPATCH', 1000, 'TURN'),
+    ('CMD_DOWNLOAD', 1500, 'STOP'),
+    ('CMD_DISPATCH', 4000, 'THRUST'),
+    ('CMD_COMPLETE', 5000, 'TURN'),
+    ('ALIEN', 5500, 'ENCOUNTERED'),
+    ('CMD_COMPLETE', 6000, 'THRUST'),
+]
+
+
+class Test1(test.utest.Test):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.directory.name, 'telemetry.db')
+        connection = sqlite3.connect(self.database)
+        connection.execute('CREATE TABLE events (op TEXT, time INTEGER, cmd TEXT)')
+        connection.executemany('INSERT INTO events VALUES (?, ?, ?)', rows)
+        connection.commit()
+        connection.close()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test1(self):
+        with SQLiteSource(self.database, table='events', batch_size=2) as source:
+            events = list(source)
+        self.assertEqual(len(events), 6)
+        self.assertEqual(events[0], {'op': 'CMD_DISPATCH', 'time': 1000, 'cmd': 'TURN'})
+        self.assertEqual(source.last_rowid, 6)
+
+    def test2(self):
+        m = CommandExecution()
+        kinds = {'CMD_DISPATCH': Dispatch, 'CMD_COMPLETE': Complete}
+        with SQLiteSource(self.database, table='events', kind_column='op', kinds=kinds,
+                          relevance=m.get_relevance()) as source:
+            m.verify(source)
+            self.assertEqual(source.line_count, 4)
+        errors_expected = [
+            "*** error transition in CommandExecution:\n    state DoComplete(1000, 'TURN')\n    event 3 Complete(time=5000, cmd='TURN')\n    TURN completion takes too long"
+        ]
+        self.assert_equal(errors_expected, m.get_all_message_texts())
+
+    def test3(self):
+        relevance = Relevance(values={'op': ['CMD_DISPATCH', 'ALIEN']})
+        with SQLiteSource(self.database, query='SELECT op, time FROM events', relevance=relevance,
+                          time_column='time', time_from=1000, time_to=5500) as source:
+            events = list(source)
+        self.assertIn('"op" IN (?, ?)', source.sql)
+        self.assertEqual(events, [{'op': 'CMD_DISPATCH', 'time': 1000}, {'op': 'CMD_DISPATCH', 'time': 4000}])
+        with self.assertRaisesRegex(AssertionError, 'time_column is required'):
+            SQLiteSource(self.database, table='events', time_from=1000)
+
+    def test4(self):
+        with SQLiteSource(self.database, table='events', batch_size=1) as source:
+            first = [next(source), next(source)]
+            rowid = source.last_rowid
+        with SQLiteSource(self.database, table='events', after_rowid=rowid) as source:
+            rest = list(source)
+        self.assertEqual([event['time'] for event in first + rest], [row[1] for row in rows])
+
+    def test5(self):
+        relevance = Relevance(classes=[Dispatch])
+        with SQLiteSource(self.database, table='events', relevance=relevance,
+                          converter=lambda row: Dispatch(row['time'], row['cmd']) if row['op'] == 'CMD_DISPATCH' else row) as source:
+            events = list(source)
+        self.assertEqual(events, [Dispatch(1000, 'TURN'), Dispatch(4000, 'THRUST')])
+
+    def test6(self):
+        m = CommandExecution()
+        kinds = {'CMD_DISPATCH': Dispatch, 'CMD_COMPLETE': Complete}
+        with PrefetchSource(SQLiteSource(self.database, table='events', kind_column='op', kinds=kinds,
+                                         relevance=m.get_relevance(), batch_size=1), batch_size=2) as source:
+            m.verify(source)
+        self.assertEqual(source.line_count, 4)
+        self.assertEqual(len(m.get_all_message_texts()), 1)
+
+    def test7(self):
+        relevance = Relevance(values={'kind': ['CMD_DISPATCH']})
+        with self.assertRaisesRegex(ValueError, 'no column kind'):
+            SQLiteSource(self.database, table='events', relevance=relevance)
+        with self.assertRaisesRegex(ValueError, 'no column stamp'):
+            SQLiteSource(self.database, query='SELECT op FROM events', time_column='stamp', time_from=0)
+        with SQLiteSource(self.database, table='events', relevance=Relevance(values={'OP': ['ALIEN']})) as source:
+            self.assertEqual([event['time'] for event in source], [5500])
@@ -0,0 +1,96 @@
+import os
+import gc
+import gzip
+import bz2
+import lzma
+import tempfile
+from pycontract import *
+from pycontract_compressed import BackgroundDecompressor, open_log
+import unittest
+import test.utest
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Reading compressed CSV and JSON-Lines files, decompressed
+by a background thread.
+"""
+
+csv_file = DIR + '../test_readme_file/test9/commands.csv'
+jsonl_file = DIR + '../test23_json_sources/file1.jsonl'
+
+
+def compress(file: str, directory: str) -> list[str]:
+    with open(file, 'rb') as f:
+        contents = f.read()
+    base_name = os.path.join(directory, os.path.basename(file))
+    files = []
+    for (suffix, module) in [('.gz', gzip), ('.bz2', bz2), ('.xz', lzma)]:
+        with module.open(base_name + suffix, 'wb') as f:
+            f.write(contents)
+        files.append(base_name + suffix)
+    return files
+
+
+class Test1(test.utest.Test):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test1(self):
+        with CSVSource(csv_file) as csv_reader:
+            expected = list(csv_reader)
+        for file in compress(csv_file, self.directory.name):
+            with CSVSource(file) as csv_reader:
+                self.assertEqual(expected, list(csv_reader))
+
+    def test2(self):
+        csv_reader = CSVReader(csv_file, lambda line: line, skip=1)
+        expected = list(csv_reader)
+        csv_reader.close()
+        for file in compress(csv_file, self.directory.name):
+            csv_reader = CSVReader(file, lambda line: line, skip=1)
+            self.assertEqual(expected, list(csv_reader))
+            csv_reader.close()
+
+    def test3(self):
+        with JSONLSource(jsonl_file) as source:
+            expected = list(source)
+        for file in compress(jsonl_file, self.directory.name):
+            with JSONLSource(file) as source:
+                self.assertEqual(expected, list(source))
+
+    def test4(self):
+        file = os.path.join(self.directory.name, 'large.csv.gz')
+        lines = [f'{nr},{nr * nr}\n' for nr in range(100000)]
+        with gzip.open(file, 'wt') as f:
+            f.writelines(lines)
+        stream = BackgroundDecompressor(file, gzip.open, chunk_size=1000, buffered_chunks=2)
+        self.assertEqual(stream.read(), ''.join(lines).encode())
+        stream = BackgroundDecompressor(file, gzip.open, chunk_size=1000, buffered_chunks=2)
+        stream.read(10)
+        stream.close()
+        stream.thread.join(5)
+        self.assertFalse(stream.thread.is_alive())
+
+    def test5(self):
+        file = os.path.join(self.directory.name, 'dropped.csv.gz')
+        with gzip.open(file, 'wt') as f:
+            f.writelines(f'{nr},{nr * nr}\n' for nr in range(100000))
+
+        source = open_log(file)
+        thread = source.buffer.raw.thread
+        source.readline()
+        del source
+        gc.collect()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        stream = BackgroundDecompressor(file, gzip.open, chunk_size=1000, buffered_chunks=2)
+        thread = stream.thread
+        stream.read(10)
+        del stream
+        gc.collect()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
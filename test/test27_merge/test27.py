@@ -0,0 +1,65 @@
+import os
+from pycontract import *
+import unittest
+import test.utest
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Merging events from several logs by time stamps.
+"""
+
+
+class CommandExecution(Monitor):
+    def transition(self, event):
+        match event:
+            case {'OP': 'CMD_DISPATCH', 'TIME': time, 'CMD': cmd}:
+                return self.DoComplete(int(time), cmd)
+
+    @data
+    class DoComplete(HotState):
+        time: int
+        cmd: str
+
+        def transition(self, event):
+            match event:
+                case {'OP': 'CMD_COMPLETE', 'TIME': time, 'CMD': self.cmd}:
+                    if int(time) - self.time <= 3000:
+                        return ok
+                    else:
+                        return error(f'{self.cmd} completion takes too long')
+
+
+def time_of(event) -> int:
+    return int(event['TIME'])
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        m = CommandExecution()
+        with MergeSource([CSVSource(DIR + 'commands.csv'), CSVSource(DIR + 'evrs.csv')], time_of) as source:
+            m.verify(source)
+            self.assertEqual(source.line_count, 6)
+        errors_expected = [
+            "*** error transition in CommandExecution:\n    state DoComplete(4000, 'THRUST')\n    event 5 {'OP': 'CMD_COMPLETE', 'TIME': '8000', 'CMD': 'THRUST'}\n    THRUST completion takes too long"
+        ]
+        self.assert_equal(errors_expected, m.get_all_message_texts())
+
+    def test2(self):
+        source1 = [1, 4, 6, 10]
+        source2 = [2, 3, 5, 11, 12]
+        source3 = []
+        merged = list(MergeSource([iter(source1), iter(source2), iter(source3)], lambda t: t))
+        self.assertEqual(merged, [1, 2, 3, 4, 5, 6, 10, 11, 12])
+
+    def test3(self):
+        source1 = [3, 1, 2, 6, 4, 5, 9, 7, 8]
+        source2 = [2, 0, 7, 5]
+        source = MergeSource([iter(source1), iter(source2)], lambda t: t, tolerance=2)
+        self.assertEqual(list(source), [0, 1, 2, 2, 3, 4, 5, 5, 6, 7, 7, 8, 9])
+        self.assertEqual(source.late_count, 0)
+
+    def test4(self):
+        source = MergeSource([iter([5, 1]), iter([2, 6])], lambda t: t)
+        self.assertEqual(list(source), [2, 5, 1, 6])
+        self.assertEqual(source.late_count, 1)
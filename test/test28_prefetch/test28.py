@@ -0,0 +1,88 @@
+import os
+import time
+from typing import List, Dict
+from pycontract import *
+import unittest
+import test.utest
+from test.test12_vpt_2022.test12 import M4, converter
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Reading and parsing events ahead of monitoring, in a separate
+thread or process.
+"""
+
+file = DIR + '../test12_vpt_2022/log-1-12500.csv'
+
+
+def mk_source() -> CSVReader:
+    return CSVReader(file, converter)
+
+
+def failing_source():
+    yield {'name': 'command'}
+    raise ValueError('corrupt log')
+
+
+class SlowSource:
+    def __init__(self):
+        self.reading = False
+        self.read_while_closed = False
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.read_while_closed = self.read_while_closed or self.reading
+        self.closed = True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.reading = True
+        time.sleep(0.01)
+        self.read_while_closed = self.read_while_closed or self.closed
+        self.reading = False
+        return {'name': 'command'}
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        m = M4()
+        set_debug(False)
+        with PrefetchSource(mk_source(), batch_size=100, depth=4) as source:
+            m.verify(source)
+        self.assertEqual(source.line_count, 50000)
+        self.assertEqual(source.batch_count, 500)
+        self.assertFalse(m.errors_found())
+        print(source.report())
+
+    def test2(self):
+        reader = mk_source()
+        expected = list(reader)
+        reader.close()
+        with PrefetchSource(mk_source, batch_size=1000, process=True) as source:
+            self.assertEqual(expected, list(source))
+
+    def test3(self):
+        source = PrefetchSource(failing_source(), batch_size=1)
+        self.assertEqual(next(source), {'name': 'command'})
+        with self.assertRaises(ValueError):
+            next(source)
+
+    def test4(self):
+        with PrefetchSource(mk_source(), batch_size=10, depth=1) as source:
+            next(source)
+        source.producer.join(5)
+        self.assertFalse(source.producer.is_alive())
+
+    def test5(self):
+        slow_source = SlowSource()
+        with PrefetchSource(slow_source, batch_size=5, depth=1) as source:
+            next(source)
+        self.assertFalse(source.producer.is_alive())
+        self.assertTrue(slow_source.closed)
+        self.assertFalse(slow_source.read_while_closed)
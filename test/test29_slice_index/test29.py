@@ -0,0 +1,111 @@
+import os
+import tempfile
+from typing import Optional
+from pycontract import *
+import unittest
+import test.utest
+from test.test10_many_locks.test10 import AcquireRelease, converter as lock_converter
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Indexing a log by slice keys, and replaying a single slice.
+"""
+
+
+class CommandExecution(Monitor):
+    def key(self, event) -> Optional[str]:
+        match event:
+            case {'OP': 'DISPATCH' | 'COMPLETE', 'CMD': cmd}:
+                return cmd
+
+    def transition(self, event):
+        match event:
+            case {'OP': 'DISPATCH', 'TIME': time, 'CMD': cmd}:
+                return self.DoComplete(int(time), cmd)
+
+    @data
+    class DoComplete(HotState):
+        time: int
+        cmd: str
+
+        def transition(self, event):
+            match event:
+                case {'OP': 'COMPLETE', 'TIME': time, 'CMD': self.cmd}:
+                    if int(time) - self.time <= 3000:
+                        return self.Completed(self.cmd)
+                    else:
+                        return error(f'{self.cmd} completion takes too long')
+
+    @data
+    class Completed(State):
+        cmd: str
+
+        def transition(self, event):
+            match event:
+                case {'OP': 'COMPLETE', 'CMD': self.cmd}:
+                    return error(f'{self.cmd} completed twice')
+
+
+def converter(row: dict) -> Optional[dict]:
+    if row['OP'] != 'ALIEN':
+        return row
+
+
+class Test1(test.utest.Test):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test1(self):
+        index_file = os.path.join(self.directory.name, 'commands.csv.idx')
+        index = SliceIndex(DIR + 'commands.csv', converter, header=True, index_file=index_file)
+        index.build(CommandExecution())
+        self.assertEqual(set(SliceIndex(DIR + 'commands.csv', converter, True, index_file).keys()), {"'TURN'", "'SEND'"})
+        m = CommandExecution()
+        with CSVSource(DIR + 'commands.csv') as csv_reader:
+            for event in csv_reader:
+                if converter(event) is not None:
+                    m.eval(event)
+        m.end()
+        turn_messages = [text for text in m.get_all_message_texts() if 'TURN' in text]
+        index = SliceIndex(DIR + 'commands.csv', converter, header=True, index_file=index_file)
+        m_turn = index.replay_slice('TURN', CommandExecution())
+        self.assertEqual(turn_messages, m_turn.get_all_message_texts())
+        self.assertEqual(len(turn_messages), 2)
+
+    def test2(self):
+        lock_file = DIR + '../test10_many_locks/lock_file.csv'
+        index_file = os.path.join(self.directory.name, 'lock_file.csv.idx')
+        index = SliceIndex(lock_file, lock_converter, index_file=index_file)
+        index.build(AcquireRelease())
+        m = index.replay_slice('LOCK_27', AcquireRelease())
+        errors_expected = ["*** error at end in AcquireRelease:\n    terminates in hot state DoRelease('LOCK_27')"]
+        self.assert_equal(errors_expected, m.get_all_message_texts())
+        m = index.replay_slice('LOCK_1', AcquireRelease())
+        self.assertFalse(m.errors_found())
+
+    def test3(self):
+        log_file = os.path.join(self.directory.name, 'commands.csv')
+        with open(log_file, 'w', newline='') as f:
+            f.write('OP,TIME,CMD,NOTE\r\n'
+                    'DISPATCH,1000,TURN,"first\nturn"\r\n'
+                    'DISPATCH,2000,SEND,"a ""quoted"",\nnote"\r\n'
+                    'COMPLETE,6000,TURN,\r\n'
+                    'COMPLETE,2500,SEND,"x"\r\n')
+        index = SliceIndex(log_file, converter, header=True)
+        index.build(CommandExecution())
+        self.assertEqual(set(index.keys()), {"'TURN'", "'SEND'"})
+        events = [event for (_, event) in SliceIndex(log_file, converter, header=True).slice_events('SEND')]
+        self.assertEqual(events, [{'OP': 'DISPATCH', 'TIME': '2000', 'CMD': 'SEND', 'NOTE': 'a "quoted",\nnote'},
+                                  {'OP': 'COMPLETE', 'TIME': '2500', 'CMD': 'SEND', 'NOTE': 'x'}])
+        m = index.replay_slice('TURN', CommandExecution())
+        self.assertEqual(len(m.get_all_message_texts()), 1)
+        self.assertIn('event 3 ', m.get_all_message_texts()[0])
+        with open(log_file, 'a') as f:
+            f.write('COMPLETE,7000,SEND,\r\n')
+        os.utime(log_file, (0, 0))
+        with self.assertRaisesRegex(ValueError, 'out of date'):
+            SliceIndex(log_file, converter, header=True).keys()
@@ -0,0 +1,74 @@
+import os
+from typing import Optional
+from pycontract import *
+import unittest
+import test.utest
+from test.test10_many_locks.test10 import AcquireRelease, converter
+from pycontract_batch import merge_messages
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Verifying a log by partitioning it on slice keys into buckets,
+verified in parallel by separate processes.
+"""
+
+lock_file = DIR + '../test10_many_locks/lock_file.csv'
+
+
+class Holders(Monitor):
+    def key(self, event) -> Optional[object]:
+        return event.get('lock')
+
+    @initial
+    class Always(AlwaysState):
+        def transition(self, event):
+            match event:
+                case {'name': 'acquire'}:
+                    return Holders.Held()
+                case {'name': 'crash'}:
+                    return error('crashed')
+
+    class Held(HotState):
+        def transition(self, event):
+            match event:
+                case {'name': 'reset'}:
+                    return error('reset while held')
+
+
+HOLDER_EVENTS = [{'name': 'acquire', 'lock': lock} for lock in range(8)] + [{'name': 'reset'}, {'name': 'crash'}] + \
+    [{'name': 'acquire', 'lock': lock} for lock in range(8, 12)]
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        set_debug(False)
+        csv_reader = CSVReader(lock_file, converter)
+        events = (event for event in csv_reader if event)
+        messages = verify_partitioned(AcquireRelease, events, buckets=4, workers=2)
+        csv_reader.close()
+        m = AcquireRelease()
+        csv_reader = CSVReader(lock_file, converter)
+        for event in csv_reader:
+            if event:
+                m.eval(event)
+        m.end()
+        csv_reader.close()
+        self.assertEqual(len(messages), 12)
+        self.assert_equal(m.get_all_message_texts(), [message.text for message in messages])
+
+    def test2(self):
+        a = Message('a', None)
+        b = Message('b', None)
+        merged = merge_messages([[(True, a), (True, b)], [(True, a)], [(True, b), (True, b)]])
+        self.assertEqual([message.text for message in merged], ['a', 'b', 'b'])
+        merged = merge_messages([[(False, a), (True, b)], [(False, a), (True, b)]])
+        self.assertEqual([message.text for message in merged], ['a', 'b', 'a'])
+
+    def test3(self):
+        set_debug(False)
+        messages = verify_partitioned(Holders, HOLDER_EVENTS, buckets=4, workers=2)
+        m = Holders()
+        m.verify(HOLDER_EVENTS)
+        self.assertEqual(len(m.get_all_message_texts()), 8 + 1 + 8 + 1)
+        self.assertEqual(sorted(message.text for message in messages), sorted(m.get_all_message_texts()))
@@ -0,0 +1,66 @@
+import os
+import json
+import tempfile
+from pycontract import *
+import unittest
+import test.utest
+from test.test12_vpt_2022.test12 import M4, converter
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Verifying many log files in parallel, each with a fresh monitor.
+"""
+
+log_dir = DIR + '../test12_vpt_2022/'
+files = [log_dir + name for name in ['log-50-250.csv', 'log-1-12500.csv', 'test1.csv']]
+
+
+def read_log(file: str):
+    csv_reader = CSVReader(file, lambda row: converter(row) if row else None)
+    for event in csv_reader:
+        if event:
+            yield event
+    csv_reader.close()
+
+
+def failing_monitor() -> M4:
+    raise RuntimeError('no monitor')
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        set_debug(False)
+        report = verify_files(M4, files, workers=2, reader=read_log)
+        print(report)
+        self.assertEqual(len(report.results), 3)
+        results = {os.path.basename(result.file): result for result in report.results}
+        for file in files:
+            m = M4()
+            for event in read_log(file):
+                m.eval(event)
+            m.end()
+            result = results[os.path.basename(file)]
+            self.assertEqual(result.messages, m.get_all_message_texts())
+            self.assertEqual(result.event_count, m.event_count)
+            self.assertIsNone(result.failure)
+        self.assertEqual(results['log-50-250.csv'].verdict(), 'OK')
+
+    def test2(self):
+        set_debug(False)
+        report = verify_files(M4, [log_dir + 'no-such-log.csv'], workers=1, reader=read_log)
+        self.assertEqual(report.results[0].verdict(), 'FAILED')
+        self.assertTrue(report.errors_found())
+        with tempfile.TemporaryDirectory() as directory:
+            report.write_json(directory + '/report.json')
+            with open(directory + '/report.json') as f:
+                contents = json.load(f)
+        self.assertEqual(contents['files'][0]['verdict'], 'FAILED')
+
+    def test3(self):
+        set_debug(False)
+        report = verify_files(failing_monitor, files[:2], workers=1, reader=read_log)
+        self.assertEqual(len(report.results), 2)
+        for result in report.results:
+            self.assertEqual(result.verdict(), 'FAILED')
+            self.assertEqual(result.failure, 'RuntimeError: no monitor')
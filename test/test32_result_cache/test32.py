@@ -0,0 +1,125 @@
+import os
+import sys
+import shutil
+import importlib
+import tempfile
+from pycontract import *
+import unittest
+import test.utest
+from test.test12_vpt_2022.test12 import M4
+from test.test31_verify_files.test31 import read_log
+from pycontract_cache import hash_monitor_source, hash_reader, monitor_modules, main
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Caching verification results of logs that have not changed.
+"""
+
+log_dir = DIR + '../test12_vpt_2022/'
+
+
+MONITOR_SOURCE = """
+from pycontract import *
+
+
+class Watched(Monitor):
+    def transition(self, event):
+        match event:
+            case 'start':
+                return self.Started()
+
+    @data
+    class Started(HotState):
+        def transition(self, event):
+            match event:
+                case '%s':
+                    return ok
+"""
+
+
+def make_m4():
+    return M4()
+
+
+def read_first_events(file: str):
+    for (nr, event) in enumerate(read_log(file)):
+        if nr == 10:
+            return
+        yield event
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        set_debug(False)
+        with tempfile.TemporaryDirectory() as directory:
+            files = [directory + '/log1.csv', directory + '/log2.csv']
+            shutil.copy(log_dir + 'log-50-250.csv', files[0])
+            shutil.copy(log_dir + 'test1.csv', files[1])
+            cache = ResultCache(directory + '/cache')
+            report1 = verify_files(M4, files, workers=2, reader=read_log, cache=cache)
+            self.assertEqual([r.cached for r in report1.results], [False, False])
+            self.assertEqual(len(cache.entries()), 2)
+            report2 = verify_files(M4, files, workers=2, reader=read_log, cache=cache)
+            self.assertEqual([r.cached for r in report2.results], [True, True])
+            messages1 = {r.file: r.messages for r in report1.results}
+            messages2 = {r.file: r.messages for r in report2.results}
+            self.assertEqual(messages1, messages2)
+            self.assertEqual(cache.hits, 2)
+            with open(files[1], 'a') as f:
+                f.write('command,100,100,FSW\n')
+            report3 = verify_files(M4, files, workers=2, reader=read_log, cache=cache)
+            cached = {os.path.basename(r.file): r.cached for r in report3.results}
+            self.assertEqual(cached, {'log1.csv': True, 'log2.csv': False})
+            self.assertEqual(cache.prune(), 1)
+            self.assertEqual(len(cache.entries()), 2)
+            os.remove(files[0])
+            main(['--directory', directory + '/cache', 'list'])
+            self.assertEqual(cache.prune(), 1)
+            self.assertEqual(cache.clear(), 1)
+
+    def test2(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file = directory + '/log.csv'
+            shutil.copy(log_dir + 'test1.csv', file)
+            cache = ResultCache(directory + '/cache', content_hash=True)
+            monitor_hash = hash_monitor_source(M4)
+            self.assertIsNone(cache.get(file, monitor_hash))
+            cache.put(file, monitor_hash, 'M4', ['*** error'], 20, 0.1)
+            os.utime(file, (0, 0))
+            self.assertEqual(cache.get(file, monitor_hash)['messages'], ['*** error'])
+            self.assertIsNone(cache.get(file, hash_monitor_source(ResultCache)))
+
+    def test3(self):
+        set_debug(False)
+        self.assertNotEqual(hash_reader(read_log), hash_reader(read_first_events))
+        with tempfile.TemporaryDirectory() as directory:
+            files = [directory + '/log.csv']
+            shutil.copy(log_dir + 'test1.csv', files[0])
+            cache = ResultCache(directory + '/cache')
+            report1 = verify_files(M4, files, workers=1, reader=read_log, cache=cache)
+            report2 = verify_files(M4, files, workers=1, reader=read_first_events, cache=cache)
+            self.assertFalse(report2.results[0].cached)
+            self.assertEqual(report2.results[0].event_count, 10)
+            self.assertNotEqual(report1.results[0].event_count, 10)
+            report3 = verify_files(M4, files, workers=1, reader=read_log, cache=cache)
+            self.assertTrue(report3.results[0].cached)
+            self.assertEqual(report3.results[0].messages, report1.results[0].messages)
+
+    def test4(self):
+        self.assertIn(sys.modules[M4.__module__], monitor_modules(make_m4))
+        self.assertIn(sys.modules[__name__], monitor_modules(make_m4))
+        with tempfile.TemporaryDirectory() as directory:
+            with open(directory + '/watched_monitor.py', 'w') as f:
+                f.write(MONITOR_SOURCE % 'stop')
+            sys.path.insert(0, directory)
+            try:
+                module = importlib.import_module('watched_monitor')
+                hash1 = hash_monitor_source(lambda: module.Watched())
+                with open(directory + '/watched_monitor.py', 'w') as f:
+                    f.write(MONITOR_SOURCE % 'finished')
+                hash2 = hash_monitor_source(lambda: module.Watched())
+                self.assertNotEqual(hash1, hash2)
+            finally:
+                sys.path.remove(directory)
+                sys.modules.pop('watched_monitor', None)
@@ -0,0 +1,87 @@
+import os
+import asyncio
+from pycontract import *
+import unittest
+import test.utest
+from test.test12_vpt_2022.test12 import M4, converter
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Monitoring events submitted from asyncio code.
+"""
+
+file = DIR + '../test12_vpt_2022/test1.csv'
+
+
+def read_events() -> list:
+    csv_reader = CSVReader(file, lambda row: converter(row) if row else None)
+    events = [event for event in csv_reader if event]
+    csv_reader.close()
+    return events
+
+
+async def telemetry(events: list):
+    for event in events:
+        await asyncio.sleep(0)
+        yield event
+
+
+class Failing(Monitor):
+    @initial
+    class Always(AlwaysState):
+        def transition(self, event):
+            if event['name'] == 'dispatch':
+                raise ValueError('corrupt event')
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        set_debug(False)
+        events = read_events()
+        m = M4()
+        m.verify(events)
+
+        async def main() -> AsyncMonitor:
+            async with AsyncMonitor(M4(), max_queue=4, batch_size=3) as monitor:
+                async for event in telemetry(events):
+                    await monitor.submit(event)
+            return monitor
+
+        monitor = asyncio.run(main())
+        print(monitor.report())
+        self.assertEqual(monitor.event_count, len(events))
+        self.assertEqual([message.text for message in monitor.messages], m.get_all_message_texts())
+
+    def test2(self):
+        set_debug(False)
+        events = read_events()
+        m = M4()
+        m.verify(events)
+
+        async def main() -> list:
+            source = asyncio.Queue()
+            for event in events:
+                source.put_nowait(event)
+            source.put_nowait(None)
+            monitor = AsyncMonitor(M4(), max_queue=2, batch_size=100)
+            await monitor.ingest(source)
+            await asyncio.wait_for(source.join(), 5)
+            await monitor.drain()
+            self.assertEqual(monitor.monitor.event_count, len(events))
+            return await monitor.end()
+
+        messages = asyncio.run(main())
+        self.assertEqual([message.text for message in messages], m.get_all_message_texts())
+
+    def test3(self):
+        set_debug(False)
+
+        async def main():
+            monitor = AsyncMonitor(Failing())
+            async for event in telemetry(read_events()):
+                await monitor.submit(event)
+            await monitor.end()
+
+        with self.assertRaises(ValueError):
+            asyncio.run(main())
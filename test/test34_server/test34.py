@@ -0,0 +1,148 @@
+import os
+import struct
+import asyncio
+import tempfile
+from pycontract import *
+import unittest
+import test.utest
+from test.test12_vpt_2022.test12 import M4
+from test.test33_async.test33 import read_events
+from pycontract_server import encode_event, split_frames, FrameTooLarge, NEWLINE, LENGTH
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Receiving events from producers in other processes over a socket.
+"""
+
+
+async def produce(connection, events: list, framing: str):
+    (reader, writer) = await connection
+    data = b''.join(encode_event(event, framing) for event in events)
+    for position in range(0, len(data), 7):
+        writer.write(data[position:position + 7])
+        await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        set_debug(False)
+        events = read_events()
+        m = M4()
+        m.verify(events)
+
+        async def main() -> EventServer:
+            with tempfile.TemporaryDirectory() as directory:
+                path = directory + '/monitor.sock'
+                async with EventServer([M4()], path=path) as server:
+                    await produce(asyncio.open_unix_connection(path), events, NEWLINE)
+                    await server.wait_closed_connections(1)
+            return server
+
+        server = asyncio.run(main())
+        print(server.report())
+        self.assertEqual(server.connections[0].event_count, len(events))
+        self.assertEqual([message.text for message in server.messages[0]], m.get_all_message_texts())
+
+    def test2(self):
+        set_debug(False)
+        events = read_events()
+        commands = [event for event in events if event['name'] == 'command']
+
+        async def main() -> EventServer:
+            async with EventServer([M4(), M4()], framing=LENGTH) as server:
+                producers = [produce(asyncio.open_connection(server.host, server.port), commands, LENGTH)
+                             for _ in range(3)]
+                await asyncio.gather(*producers)
+                await server.wait_closed_connections(3)
+            return server
+
+        server = asyncio.run(main())
+        print(server.report())
+        self.assertEqual([stats.event_count for stats in server.connections], [len(commands)] * 3)
+        self.assertEqual(len(server.messages), 2)
+        self.assertEqual(server.monitors[0].event_count, 3 * len(commands))
+
+    def test3(self):
+        buffer = bytearray(encode_event({'a': 1}, LENGTH) + encode_event([2], LENGTH)[:5])
+        self.assertEqual(split_frames(buffer, LENGTH), [b'{"a":1}'])
+        self.assertEqual(len(buffer), 5)
+        buffer = bytearray(b'{"a":1}\n\n[2')
+        self.assertEqual(split_frames(buffer, NEWLINE), [b'{"a":1}'])
+        self.assertEqual(buffer, bytearray(b'[2'))
+
+    def test4(self):
+        set_debug(False)
+
+        async def send(connection, data: bytes):
+            (reader, writer) = await connection
+            writer.write(data)
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+
+        async def main():
+            with tempfile.TemporaryDirectory() as directory:
+                path = directory + '/monitor.sock'
+                async with EventServer([M4()], path=path) as server:
+                    await send(asyncio.open_unix_connection(path), b'{"name":"a"}\n{"name":"b"}')
+                    await server.wait_closed_connections(1)
+                    self.assertEqual(server.handlers, [])
+                self.assertFalse(os.path.exists(path))
+                async with EventServer([M4()], path=path, framing=LENGTH) as length_server:
+                    await send(asyncio.open_unix_connection(path),
+                               encode_event({'name': 'a'}, LENGTH) + encode_event({'name': 'b'}, LENGTH)[:6])
+                    await length_server.wait_closed_connections(1)
+            return (server, length_server)
+
+        (server, length_server) = asyncio.run(main())
+        self.assertEqual(server.connections[0].event_count, 2)
+        self.assertEqual(server.connections[0].invalid_count, 0)
+        self.assertEqual(length_server.connections[0].event_count, 1)
+        self.assertEqual(length_server.connections[0].invalid_count, 1)
+
+    def test5(self):
+        buffer = bytearray(struct.pack('>I', 1 << 30) + b'{')
+        with self.assertRaises(ValueError):
+            split_frames(buffer, LENGTH, max_frame_size=1000)
+        buffer = bytearray(b'[1]\n' + b'1' * 20)
+        with self.assertRaises(FrameTooLarge) as context:
+            split_frames(buffer, NEWLINE, max_frame_size=10)
+        self.assertEqual(context.exception.documents, [b'[1]'])
+        buffer = bytearray(b'[1]\n' + b'1' * 5)
+        self.assertEqual(split_frames(buffer, NEWLINE, max_frame_size=10), [b'[1]'])
+
+    def test6(self):
+        set_debug(False)
+
+        def convert(document: dict) -> dict:
+            if document['name'] == 'bad':
+                raise KeyError('bad')
+            return document
+
+        async def send(connection, data: bytes):
+            (reader, writer) = await connection
+            writer.write(data)
+            await writer.drain()
+            await reader.read()
+            writer.close()
+            await writer.wait_closed()
+
+        async def main() -> EventServer:
+            async with EventServer([M4()], framing=LENGTH, converter=convert, max_frame_size=100) as server:
+                await send(asyncio.open_connection(server.host, server.port),
+                           encode_event({'name': 'a'}, LENGTH) + encode_event({'name': 'bad'}, LENGTH) +
+                           struct.pack('>I', 1 << 31) + b'{"name":')
+                await server.wait_closed_connections(1)
+            return server
+
+        with self.assertLogs('pycontract_server', level='WARNING'):
+            server = asyncio.run(main())
+        print(server.report())
+        stats = server.connections[0]
+        self.assertEqual(stats.event_count, 1)
+        self.assertEqual(stats.error_count, 1)
+        self.assertEqual(stats.invalid_count, 1)
+        self.assertIn('exceeds maximum', stats.dropped)
@@ -0,0 +1,80 @@
+import os
+import struct
+from multiprocessing import Process
+from pycontract import *
+import unittest
+import test.utest
+from test.test12_vpt_2022.test12 import M4
+from test.test33_async.test33 import read_events
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Handing over events from a producer process through a ring buffer in shared memory.
+"""
+
+
+def producer(name: str, events: list):
+    ring = SharedRing(name, create=False)
+    for event in events:
+        ring.put(event)
+    ring.finish()
+    ring.close()
+
+
+def encode_number(event: int) -> bytes:
+    return struct.pack('<q', event)
+
+
+def decode_number(record: bytes) -> int:
+    return struct.unpack('<q', record)[0]
+
+
+def number_producer(name: str, count: int):
+    ring = SharedRing(name, create=False, encode=encode_number)
+    ring.put_many(range(count))
+    ring.finish()
+    ring.close()
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        set_debug(False)
+        events = read_events()
+        m = M4()
+        m.verify(events)
+        ring = SharedRing(capacity=4, record_size=64)
+        process = Process(target=producer, args=(ring.name, events))
+        process.start()
+        source = RingSource(ring, batch_size=3, timeout=10)
+        monitor = M4()
+        source.verify(monitor)
+        process.join()
+        ring.unlink()
+        self.assertEqual(source.line_count, len(events))
+        self.assertEqual(monitor.get_all_message_texts(), m.get_all_message_texts())
+
+    def test2(self):
+        ring = SharedRing(capacity=100, record_size=12, decode=decode_number)
+        process = Process(target=number_producer, args=(ring.name, 10000))
+        process.start()
+        numbers = list(RingSource(ring, batch_size=64, timeout=10))
+        process.join()
+        ring.unlink()
+        self.assertEqual(numbers, list(range(10000)))
+
+    def test3(self):
+        ring = SharedRing(capacity=2, record_size=8)
+        with self.assertRaises(AssertionError):
+            ring.put({'name': 'command'})
+        ring.put(1)
+        ring.finish()
+        self.assertEqual(ring.get_batch(10), [1])
+        self.assertIsNone(ring.get_batch(10))
+        ring.unlink()
+
+    def test4(self):
+        ring = SharedRing(capacity=2, record_size=8)
+        with self.assertRaises(TimeoutError):
+            ring.get_batch(10, timeout=0.1)
+        ring.unlink()
@@ -0,0 +1,140 @@
+import os
+import logging
+import threading
+from pycontract import *
+import unittest
+import test.utest
+from test.test12_vpt_2022.test12 import M4
+from test.test33_async.test33 import read_events
+from pycontract_logging import SAMPLE, BLOCK
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Monitoring events carried by application log records.
+"""
+
+
+class Gated(Monitor):
+    def __init__(self):
+        super().__init__()
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+
+    @initial
+    class Always(AlwaysState):
+        def transition(self, event):
+            self.monitor.entered.set()
+            self.monitor.gate.wait()
+
+
+class Chatty(Monitor):
+    @initial
+    class Always(AlwaysState):
+        def transition(self, event):
+            logging.getLogger('test36.chatty').warning('event', {'nr': -1})
+
+
+def to_event(record: logging.LogRecord) -> dict:
+    if record.msg == 'event':
+        return record.args
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        set_debug(False)
+        events = read_events()
+        m = M4()
+        m.verify(events)
+        logger = logging.getLogger('test36.fsw')
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        handler = MonitorLogHandler(M4(), overflow=BLOCK, max_queue=2, batch_size=5)
+        logger.addHandler(handler)
+        for event in events:
+            logger.info('%s received', event['name'], extra={'event': event})
+            logger.info('no event')
+        logger.removeHandler(handler)
+        handler.close()
+        print(handler.report())
+        self.assertEqual(handler.event_count, len(events))
+        self.assertEqual(handler.dropped_count, 0)
+        self.assertEqual([message.text for message in handler.get_messages()], m.get_all_message_texts())
+
+    def test2(self):
+        set_debug(False)
+        logger = logging.getLogger('test36.drop')
+        logger.propagate = False
+        monitor = Gated()
+        handler = MonitorLogHandler(monitor, converter=to_event, max_queue=2)
+        logger.addHandler(handler)
+        logger.warning('event', {'nr': 0})
+        monitor.entered.wait()
+        for nr in range(1, 11):
+            logger.warning('event', {'nr': nr})
+        self.assertEqual(handler.dropped_count, 8)
+        monitor.gate.set()
+        logger.removeHandler(handler)
+        handler.close()
+        self.assertEqual(handler.event_count, 3)
+        self.assertEqual(handler.record_count, 11)
+
+    def test3(self):
+        set_debug(False)
+        logger = logging.getLogger('test36.sample')
+        logger.propagate = False
+        monitor = Gated()
+        handler = MonitorLogHandler(monitor, converter=to_event, max_queue=2, overflow=SAMPLE, sample_rate=4)
+        logger.addHandler(handler)
+        logger.warning('event', {'nr': 0})
+        monitor.entered.wait()
+        timer = threading.Timer(0.2, monitor.gate.set)
+        timer.start()
+        for nr in range(1, 11):
+            logger.warning('event', {'nr': nr})
+        logger.removeHandler(handler)
+        handler.close()
+        timer.join()
+        print(handler.report())
+        self.assertGreaterEqual(handler.dropped_count, 3)
+        self.assertEqual(handler.sampled_count + handler.dropped_count, handler.overflow_count)
+        self.assertEqual(handler.event_count, handler.record_count - handler.dropped_count)
+
+    def test4(self):
+        set_debug(False)
+        logger = logging.getLogger('test36.chatty')
+        logger.propagate = False
+        handler = MonitorLogHandler(Chatty(), converter=to_event, max_queue=1, overflow=BLOCK)
+        logger.addHandler(handler)
+        emitter = threading.Thread(target=lambda: [logger.warning('event', {'nr': nr}) for nr in range(20)])
+        emitter.start()
+        emitter.join(timeout=10)
+        self.assertFalse(emitter.is_alive())
+        handler.flush()
+        logger.removeHandler(handler)
+        handler.close()
+        print(handler.report())
+        self.assertEqual(handler.event_count, 20)
+        self.assertEqual(handler.reentrant_count, 20)
+
+    def test5(self):
+        set_debug(False)
+        logger = logging.getLogger('test36.close')
+        logger.propagate = False
+        handler = MonitorLogHandler(Chatty(), converter=to_event, max_queue=1, overflow=BLOCK)
+        logger.addHandler(handler)
+
+        def emit_events():
+            for nr in range(200):
+                logger.warning('event', {'nr': nr})
+
+        emitters = [threading.Thread(target=emit_events) for _ in range(4)]
+        for emitter in emitters:
+            emitter.start()
+        handler.close()
+        for emitter in emitters:
+            emitter.join(timeout=10)
+            self.assertFalse(emitter.is_alive())
+        logger.removeHandler(handler)
+        self.assertEqual(handler.event_count, handler.record_count)
+        self.assertEqual(handler.events.qsize(), 0)
@@ -0,0 +1,151 @@
+import os
+import sys
+import threading
+from typing import Optional
+from pycontract import *
+import unittest
+import test.utest
+from pycontract_instrument import Call, Return, HAS_SYS_MONITORING
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Monitoring calls of instrumented functions, without modifying the call sites.
+"""
+
+
+class AcquireRelease(Monitor):
+    def key(self, event) -> Optional[int]:
+        if isinstance(event, Call):
+            return event.arguments.get('lock')
+
+    @initial
+    class Always(AlwaysState):
+        def transition(self, event):
+            match event:
+                case Call('Locks.acquire', {'lock': lock}):
+                    return self.Locked(lock)
+
+    @data
+    class Locked(HotState):
+        lock: int
+
+        def transition(self, event):
+            match event:
+                case Call('Locks.acquire', {'lock': self.lock}):
+                    return error(f'lock {self.lock} acquired twice')
+                case Call('Locks.release', {'lock': self.lock}):
+                    return ok
+
+
+class Locks:
+    def acquire(self, lock: int) -> bool:
+        return True
+
+    def release(self, lock: int):
+        pass
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        set_debug(False)
+        monitor = AcquireRelease()
+        instrumenter = Instrumenter(monitor, batch_size=2)
+
+        @instrumenter.instrument
+        def total(x: int, y: int = 10) -> int:
+            return x + y
+
+        instrumenter.instrument_class(Locks)
+        locks = Locks()
+        locks.acquire(1)
+        instrumenter.enable()
+        locks.acquire(2)
+        locks.release(2)
+        locks.acquire(3)
+        self.assertEqual(total(1), 11)
+        instrumenter.disable()
+        locks.acquire(3)
+        instrumenter.enable()
+        locks.acquire(3)
+        instrumenter.end()
+        self.assertEqual(instrumenter.event_count, 10)
+        self.assertEqual(monitor.event_count, 10)
+        texts = monitor.get_all_message_texts()
+        self.assertEqual(len(texts), 2)
+        self.assertIn('event 9 Call(function=\'Locks.acquire\'', texts[0])
+        self.assertIn('lock 3 acquired twice', texts[0])
+        self.assertIn('terminates in hot state Locked(3)', texts[1])
+
+    def test2(self):
+        set_debug(False)
+        monitor = AcquireRelease()
+        with Instrumenter(monitor) as instrumenter:
+
+            @instrumenter.instrument
+            def total(x: int, *numbers, scale: int = 1, **options) -> int:
+                return scale * (x + sum(numbers))
+
+            instrumenter.enable()
+            total(1, 2, 3, scale=2, unit='m')
+            instrumenter.disable()
+            self.assertEqual(instrumenter.buffer, [
+                Call('Test1.test2.<locals>.total',
+                     {'x': 1, 'numbers': (2, 3), 'scale': 2, 'options': {'unit': 'm'}}),
+                Return('Test1.test2.<locals>.total', 12)
+            ])
+        self.assertIsNone(instrumenter.tool_id)
+        self.assertEqual(monitor.event_count, 2)
+
+    @unittest.skipUnless(HAS_SYS_MONITORING, 'requires sys.monitoring (Python 3.12+)')
+    def test3(self):
+        monitor = AcquireRelease()
+
+        def double(x: int) -> int:
+            return 2 * x
+
+        with Instrumenter(monitor) as instrumenter:
+            self.assertIs(instrumenter.instrument(double), double)
+            instrumenter.enable()
+            self.assertNotEqual(sys.monitoring.get_local_events(instrumenter.tool_id, double.__code__), 0)
+            instrumenter.disable()
+            self.assertEqual(sys.monitoring.get_local_events(instrumenter.tool_id, double.__code__), 0)
+            double(1)
+            self.assertEqual(instrumenter.event_count, 0)
+
+    def test4(self):
+        set_debug(False)
+        monitor = AcquireRelease()
+        instrumenter = Instrumenter(monitor, batch_size=7)
+        instrumenter.instrument_class(Locks)
+        instrumenter.enable()
+        locks = Locks()
+
+        def use_locks(first: int):
+            for n in range(500):
+                locks.acquire(first + n % 4)
+                locks.release(first + n % 4)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-5)
+        try:
+            threads = [threading.Thread(target=use_locks, args=(first,)) for first in range(0, 32, 4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        instrumenter.end()
+        self.assertEqual(instrumenter.event_count, 8 * 500 * 4)
+        self.assertEqual(monitor.event_count, 8 * 500 * 4)
+        self.assertFalse(monitor.errors_found())
+
+    @unittest.skipUnless(HAS_SYS_MONITORING, 'requires sys.monitoring (Python 3.12+)')
+    def test5(self):
+        self.assertIsNone(sys.monitoring.get_tool(3))
+        with Instrumenter(AcquireRelease()) as first:
+            with Instrumenter(AcquireRelease()) as second:
+                self.assertEqual((first.tool_id, second.tool_id), (3, 4))
+        self.assertIsNone(sys.monitoring.get_tool(3))
+        self.assertIsNone(sys.monitoring.get_tool(4))
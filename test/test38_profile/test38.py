@@ -0,0 +1,80 @@
+import os
+import json
+import tempfile
+from pycontract import *
+import unittest
+import test.utest
+from test.test12_vpt_2022.test12 import M4
+from test.test33_async.test33 import read_events
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Profiling the evaluation of states, per monitor and per state class.
+"""
+
+
+class Locks(Monitor):
+    @initial
+    class Always(AlwaysState):
+        def transition(self, event):
+            match event:
+                case ('acquire', lock):
+                    return Locks.Locked(lock)
+                case ('note', lock):
+                    return info(f'note on {lock}')
+
+    @data
+    class Locked(HotState):
+        lock: int
+
+        def transition(self, event):
+            match event:
+                case ('acquire', self.lock):
+                    return error(f'lock {self.lock} acquired twice')
+                case ('release', self.lock):
+                    return ok
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        set_debug(False)
+        monitor = Locks()
+        profiler = Profiler(print_at_end=False)
+        profiler.attach(monitor)
+        monitor.verify([('acquire', 1), ('acquire', 2), ('note', 1), ('release', 1), ('acquire', 2)])
+        profiler.detach()
+        profiles = {profile['state']: profile for profile in profiler.get_profiles()}
+        self.assertEqual(profiles['Always']['evaluations'], 5)
+        self.assertEqual(profiles['Always']['transitions'], 4)
+        self.assertEqual(profiles['Always']['outcomes'], {'stay': 1, 'new': 3, 'ok': 0, 'error': 0, 'info': 1})
+        self.assertEqual(profiles['Locked']['evaluations'], 6)
+        self.assertEqual(profiles['Locked']['transitions'], 2)
+        self.assertEqual(profiles['Locked']['outcomes'], {'stay': 4, 'new': 0, 'ok': 1, 'error': 1, 'info': 0})
+        self.assertEqual(monitor.get_message_count(), 3)
+        self.assertFalse(hasattr(Locks.Always.eval, '__profiled__'))
+        self.assertFalse(hasattr(Locks.Locked.eval, '__profiled__'))
+
+    def test2(self):
+        set_debug(False)
+        events = read_events()
+        m = M4()
+        m.verify(events)
+        monitor = M4()
+        profiler = Profiler(sample_rate=7)
+        profiler.attach(monitor)
+        monitor.verify(events)
+        profiler.detach()
+        self.assertEqual(monitor.get_all_message_texts(), m.get_all_message_texts())
+        profiles = profiler.get_profiles()
+        self.assertEqual([profile['seconds'] for profile in profiles],
+                         sorted([profile['seconds'] for profile in profiles], reverse=True))
+        for profile in profiles:
+            self.assertEqual(profile['monitor'], 'M4')
+            self.assertLessEqual(profile['sampled'], profile['evaluations'])
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'profile.json')
+            profiler.write_json(file)
+            with open(file) as f:
+                self.assertEqual(json.load(f)['sample_rate'], 7)
+        self.assertIn('Dispatch', str(profiler))
@@ -0,0 +1,50 @@
+import os
+from pycontract import *
+import unittest
+import test.utest
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Transition coverage shown on the PlantUML diagram of a monitor.
+"""
+
+
+class Locks(Monitor):
+    def transition(self, event):
+        match event:
+            case ('acquire', lock):
+                return Locks.Locked(lock)
+
+    @data
+    class Locked(HotState):
+        lock: int
+
+        def transition(self, event):
+            match event:
+                case ('acquire', self.lock):
+                    return error(f'lock {self.lock} acquired twice')
+                case ('release', self.lock):
+                    if self.lock >= 0:
+                        return ok
+                    else:
+                        return error(f'negative lock {self.lock}')
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        set_debug(False)
+        coverage = Coverage(Locks)
+        coverage.install()
+        monitor = Locks()
+        monitor.verify([('acquire', 1), ('acquire', 2), ('release', 1), ('acquire', 3), ('release', 3),
+                        ('acquire', 2)])
+        coverage.uninstall()
+        self.assertEqual(monitor.get_message_count(), 2)
+        self.assertEqual(coverage.count(__file__, '__Always__', 17), 4)
+        self.assertEqual(coverage.count(__file__, 'Locked', 26), 1)
+        self.assertEqual(coverage.count(__file__, 'Locked', 29), 2)
+        self.assertEqual(coverage.count(__file__, 'Locked', 31), 0)
+        self.assertIsNone(coverage.count(__file__, 'Other', 31))
+        visualize(__file__, False, coverage)
+        self.assert_equal_files(DIR + 'test39.Locks.test.pu', DIR + 'test39.Locks.pu')
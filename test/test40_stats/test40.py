@@ -0,0 +1,140 @@
+import os
+import tempfile
+import urllib.request
+from pycontract import *
+import unittest
+import test.utest
+from pycontract_stats import prometheus_text
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Statistics of a running monitor, and exporting them in the Prometheus format.
+"""
+
+
+class Locks(Monitor):
+    def key(self, event):
+        return event[1]
+
+    @initial
+    class Always(AlwaysState):
+        def transition(self, event):
+            match event:
+                case ('acquire', lock):
+                    return Locks.Locked(lock)
+                case ('note', lock):
+                    return info(f'note on {lock}')
+
+    @data
+    class Locked(HotState):
+        lock: int
+
+        def transition(self, event):
+            match event:
+                case ('acquire', self.lock):
+                    return error(f'lock {self.lock} acquired twice')
+                case ('release', self.lock):
+                    return ok
+
+
+class Releases(Monitor):
+    @initial
+    class Always(AlwaysState):
+        def transition(self, event):
+            match event:
+                case ('release', lock):
+                    return Releases.Released(lock)
+
+    @data
+    class Released(State):
+        lock: int
+
+
+class Both(Monitor):
+    def __init__(self):
+        super().__init__()
+        self.monitor_this(Locks(), Releases())
+
+
+EVENTS = [('acquire', 1), ('acquire', 2), ('note', 1), ('release', 1), ('acquire', 2)]
+
+
+def walk_stats(monitor: Monitor) -> dict:
+    result = {'states_per_class': {}, 'slices': 0, 'messages': {'error': 0, 'end': 0, 'info': 0}}
+    monitors = [monitor]
+    while monitors:
+        m = monitors.pop()
+        result['slices'] += len(m.states_indexed)
+        for states in [m.states] + list(m.states_indexed.values()):
+            for state in states:
+                name = f'{m.get_monitor_name()}.{type(state).__name__}'
+                result['states_per_class'][name] = result['states_per_class'].get(name, 0) + 1
+        for message in m.messages:
+            result['messages'][message.kind] += 1
+        monitors.extend(m.monitors)
+    return result
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        set_debug(False)
+        monitor = Both()
+        for event in EVENTS:
+            monitor.eval(event)
+            stats = monitor.stats()
+            self.assertEqual(monitor.states_per_class(), stats['states_per_class'])
+            self.assertEqual(monitor.number_of_states(), stats['states'])
+            self.assertEqual({key: stats[key] for key in ['states_per_class', 'slices', 'messages']},
+                             walk_stats(monitor))
+        self.assertEqual(stats['monitor'], 'Both')
+        self.assertEqual(stats['events'], 5)
+        self.assertEqual(stats['slices'], 2)
+        self.assertEqual(stats['states_per_class'],
+                         {'Locks.Always': 3, 'Locks.Locked': 1, 'Releases.Always': 1, 'Releases.Released': 1})
+        self.assertEqual(stats['states'], 6)
+        self.assertEqual(stats['messages'], {'error': 1, 'end': 0, 'info': 1})
+        monitor.end()
+        self.assertEqual(monitor.stats()['messages'], {'error': 1, 'end': 1, 'info': 1})
+        self.assertEqual(monitor.stats()['messages'], walk_stats(monitor)['messages'])
+
+    def test2(self):
+        set_debug(False)
+        monitor = Both()
+        sampler = StatsSampler(monitor, windows=(10, 60))
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'metrics.prom')
+            exporter = PrometheusExporter(sampler, file=file, port=0)
+            sampler.sample()
+            monitor.eval_many(EVENTS)
+            snapshot = sampler.sample()
+            self.assertEqual(set(snapshot['events_per_second']), {10, 60})
+            self.assertGreater(snapshot['events_per_second'][10], 0)
+            self.assertIsNone(snapshot['reader_lag'])
+            with open(file) as f:
+                text = f.read()
+            with urllib.request.urlopen(f'http://127.0.0.1:{exporter.port}/metrics') as response:
+                self.assertEqual(response.read().decode(), text)
+            exporter.close()
+        self.assertEqual(text, prometheus_text(snapshot))
+        self.assertIn('pycontract_events_total{monitor="Both"} 5', text)
+        self.assertIn('pycontract_live_states{monitor="Both",state="Locks.Locked"} 1', text)
+        self.assertIn('pycontract_messages_total{monitor="Both",kind="error"} 1', text)
+        self.assertIn('# TYPE pycontract_events_per_second gauge', text)
+
+    def test3(self):
+        set_debug(False)
+
+        class Source:
+            line_count = 20
+
+        monitor = Locks()
+        sampler = StatsSampler(monitor, interval=0.01, source=Source())
+        snapshots = []
+        sampler.add_listener(snapshots.append)
+        sampler.start()
+        monitor.eval_many([('acquire', nr) for nr in range(5)])
+        sampler.stop()
+        self.assertGreaterEqual(len(snapshots), 2)
+        self.assertEqual(snapshots[-1]['events'], 5)
+        self.assertEqual(snapshots[-1]['reader_lag'], 15)
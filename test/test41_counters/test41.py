@@ -0,0 +1,77 @@
+import os
+from pycontract import *
+import unittest
+import test.utest
+from test.test12_vpt_2022.test12 import M4
+from test.test33_async.test33 import read_events
+from test.test40_stats.test40 import Locks, Releases
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Numbers of states and messages maintained incrementally, across slices and sub-monitors.
+"""
+
+
+def count_states(monitor: Monitor) -> int:
+    result = len(monitor.states) + sum(len(states) for states in monitor.states_indexed.values())
+    return result + sum(count_states(sub_monitor) for sub_monitor in monitor.monitors)
+
+
+def count_messages(monitor: Monitor) -> int:
+    return len(monitor.messages) + sum(count_messages(sub_monitor) for sub_monitor in monitor.monitors)
+
+
+class TupleLocks(Locks):
+    def key(self, event):
+        if isinstance(event, tuple):
+            return event[1]
+
+
+class Inner(Monitor):
+    def __init__(self):
+        super().__init__()
+        self.monitor_this(TupleLocks(), M4())
+
+
+class Outer(Monitor):
+    def __init__(self):
+        super().__init__()
+        self.monitor_this(Inner(), Releases())
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        set_debug(False)
+        events = []
+        for (nr, event) in enumerate(read_events() * 3):
+            events.append(event)
+            events.append(('acquire', nr % 7))
+            if nr % 3 == 0:
+                events.append(('release', (nr + 4) % 7))
+            if nr % 5 == 0:
+                events.append(('note', nr))
+        monitor = Outer()
+        inner = monitor.monitors[0]
+        for event in events:
+            monitor.eval(event)
+            self.assertEqual(monitor.number_of_states(), count_states(monitor))
+            self.assertEqual(inner.number_of_states(), count_states(inner))
+            self.assertEqual(monitor.get_message_count(), count_messages(monitor))
+        monitor.end()
+        self.assertEqual(monitor.get_message_count(), count_messages(monitor))
+        self.assertEqual(inner.get_message_count(), count_messages(inner))
+        self.assertTrue(monitor.errors_found())
+        self.assertEqual(len(monitor.get_all_messages()), monitor.get_message_count())
+        self.assertEqual(monitor.get_all_messages(), inner.get_all_messages() + monitor.monitors[1].get_all_messages())
+
+    def test2(self):
+        set_debug(False)
+        monitor = Locks()
+        monitor.eval_many([('acquire', 1), ('acquire', 2), ('release', 1)])
+        self.assertEqual(monitor.number_of_states(), 4)
+        self.assertTrue(monitor.contains_state(Locks.Locked(2)))
+        self.assertFalse(monitor.contains_state(Locks.Locked(1)))
+        self.assertTrue(monitor.exists(lambda state: isinstance(state, Locks.Locked) and state.lock == 2))
+        self.assertFalse(monitor.exists(lambda state: isinstance(state, Locks.Locked) and state.lock == 1))
+        self.assertEqual(len(monitor.get_all_states()), 2)
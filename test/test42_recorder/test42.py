@@ -0,0 +1,109 @@
+import os
+import csv
+import tempfile
+import importlib.util
+from pycontract import *
+import unittest
+import test.utest
+from test.test12_vpt_2022.test12 import M4
+from test.test33_async.test33 import read_events
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Recording the number of live states over time.
+"""
+
+
+@data
+class Open(Event):
+    time: int
+    session: int
+
+
+@data
+class Close(Event):
+    time: int
+    session: int
+
+
+class Sessions(Monitor):
+    @initial
+    class Always(AlwaysState):
+        def transition(self, event):
+            match event:
+                case Open(_, session):
+                    return Sessions.Active(session)
+
+    @data
+    class Active(HotState):
+        session: int
+
+        def transition(self, event):
+            match event:
+                case Close(_, self.session):
+                    return ok
+
+
+def sessions_trace():
+    trace = [Open(time, time) for time in range(0, 100, 2)]
+    trace += [Close(100 + time, time) for time in range(0, 100, 2)]
+    return trace
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        set_debug(False)
+        events = read_events()
+        monitor = M4()
+        recorder = StateRecorder(monitor, every_events=1)
+        monitor.verify(events)
+        recorder.detach()
+        self.assertNotIn('eval', monitor.__dict__)
+        self.assertEqual(len(events), 16)
+        self.assertEqual([events for (events, _, _, _) in recorder.samples], list(range(1, 17)) + [16])
+        self.assertEqual(recorder.columns(), ['M4.Always', 'M4.Close', 'M4.Dispatch', 'M4.Succeed'])
+        for row in recorder.rows():
+            self.assertEqual(row[2], sum(row[3:]))
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'states.csv')
+            recorder.write_csv(file)
+            with open(file) as f:
+                rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ['event', 'time', 'states', 'M4.Always', 'M4.Close', 'M4.Dispatch', 'M4.Succeed'])
+        self.assertEqual(len(rows), len(recorder.samples) + 1)
+
+    def test2(self):
+        set_debug(False)
+        monitor = Sessions()
+        recorder = StateRecorder(monitor, every_time=20, time_of=lambda event: event.time)
+        monitor.eval_many(sessions_trace())
+        recorder.detach()
+        times = [time for (_, time, _, _) in recorder.samples]
+        self.assertEqual(times, list(range(0, 200, 20)) + [198])
+        active = [counts.get('Sessions.Active', 0) for (_, _, _, counts) in recorder.samples]
+        self.assertEqual(active, [1, 11, 21, 31, 41, 49, 39, 29, 19, 9, 0])
+
+    @unittest.skipUnless(importlib.util.find_spec('numpy'), 'requires numpy')
+    def test3(self):
+        set_debug(False)
+        monitor = Sessions()
+        recorder = StateRecorder(monitor, every_events=10)
+        monitor.eval_many(sessions_trace())
+        recorder.detach()
+        (columns, array) = recorder.to_numpy()
+        self.assertEqual(columns, ['event', 'time', 'states', 'Sessions.Active', 'Sessions.Always'])
+        self.assertEqual(array.shape, (11, 5))
+        self.assertEqual(array[4, 3], 50)
+
+    @unittest.skipUnless(importlib.util.find_spec('matplotlib'), 'requires matplotlib')
+    def test4(self):
+        set_debug(False)
+        monitor = Sessions()
+        recorder = StateRecorder(monitor, every_time=10, time_of=lambda event: event.time)
+        monitor.eval_many(sessions_trace())
+        recorder.detach()
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'states.png')
+            recorder.plot(file, ['Sessions.Active'])
+            self.assertTrue(os.path.getsize(file) > 0)
@@ -0,0 +1,147 @@
+import os
+import sys
+import io
+import contextlib
+import tracemalloc
+from typing import Optional
+from pycontract import *
+import unittest
+import test.utest
+from pycontract_memory import deep_size, memory_report, format_memory_report
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Reporting the memory retained by monitors.
+"""
+
+
+class Commands(Monitor):
+    def key(self, event) -> Optional[object]:
+        return event['cmd']
+
+    @initial
+    class Always(AlwaysState):
+        def transition(self, event):
+            match event:
+                case {'name': 'dispatch', 'cmd': cmd}:
+                    return Commands.Dispatched(cmd, cmd * 100)
+
+    @data
+    class Dispatched(HotState):
+        cmd: str
+        payload: str
+
+        def transition(self, event):
+            match event:
+                case {'name': 'complete', 'cmd': self.cmd}:
+                    return ok
+
+
+class Obligations(Monitor):
+    def transition(self, event):
+        match event:
+            case {'name': 'dispatch', 'cmd': cmd}:
+                return self.DoCompleteLog(cmd)
+
+    @data
+    class DoCompleteLog(HotState):
+        cmd: str
+
+        @exhaustive
+        def transition(self, event):
+            match event:
+                case {'name': 'complete', 'cmd': self.cmd}:
+                    return done()
+                case {'name': 'log', 'cmd': self.cmd}:
+                    return done()
+
+
+class Both(Monitor):
+    def __init__(self):
+        super().__init__()
+        self.monitor_this(Commands(), Obligations())
+
+
+def dispatches(count: int):
+    return [{'name': 'dispatch', 'cmd': f'C{nr}'} for nr in range(count)]
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        set_debug(False)
+        seen = set()
+        payload = ['x' * 100, 'x' * 100]
+        size = deep_size(payload, seen)
+        self.assertGreater(size, 200)
+        self.assertEqual(deep_size(payload, seen), 0)
+        self.assertEqual(deep_size(Commands(), set()), 0)
+
+    def test2(self):
+        set_debug(False)
+        monitor = Commands()
+        monitor.verify(dispatches(20) + [{'name': 'complete', 'cmd': 'C0'}])
+        report = memory_report(monitor, sample=5, largest=3)
+        self.assertEqual(report['events'], 21)
+        entry = report['state_classes']['Commands.Dispatched']
+        self.assertEqual(entry['count'], 19)
+        self.assertGreater(entry['bytes'], 19 * 200)
+        self.assertEqual(report['state_classes']['Commands.Always']['count'], 1)
+        self.assertEqual(report['state_vectors']['slice_count'], 20)
+        vectors = [monitor.states] + list(monitor.states_indexed.values())
+        self.assertLessEqual(report['state_vectors']['main'] + report['state_vectors']['slices'],
+                             sum(entry['bytes'] for entry in report['state_classes'].values()) +
+                             sum(sys.getsizeof(list(states)) for states in vectors))
+        self.assertEqual(len(report['largest_slices']), 3)
+        self.assertEqual(report['largest_slices'][0]['states'], 2)
+        self.assertEqual(report['messages']['count'], 19)
+        self.assertGreater(report['total'], entry['bytes'])
+
+    def test3(self):
+        set_debug(False)
+        monitor = Both()
+        monitor.verify(dispatches(10) + [{'name': 'log', 'cmd': 'C1'}])
+        report = memory_report(monitor)
+        self.assertEqual(report['state_classes']['Obligations.DoCompleteLog']['count'], 10)
+        self.assertEqual(report['state_classes']['Commands.Dispatched']['count'], 10)
+        self.assertIn('MatchObligations', report['data_objects'])
+        self.assertEqual(report['messages']['count'], 20)
+        text = format_memory_report(report)
+        self.assertIn('states Commands.Dispatched', text)
+        self.assertIn('data MatchObligations', text)
+
+    def test4(self):
+        set_debug(False)
+        monitor = Commands()
+        reporter = MemoryReporter(monitor, every_events=5, trace=True, print_at_end=False)
+        monitor.verify(dispatches(10))
+        reporter.detach()
+        self.assertEqual([report['events'] for report in reporter.reports], [5, 10, 10])
+        self.assertLess(reporter.reports[0]['total'], reporter.reports[1]['total'])
+        self.assertGreater(reporter.reports[-1]['traced']['peak'], 0)
+        self.assertNotIn('eval', monitor.__dict__)
+        self.assertNotIn('end', monitor.__dict__)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test5(self):
+        set_debug(False)
+        monitor = Commands()
+        MemoryReporter(monitor)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            monitor.verify(dispatches(3))
+        self.assertIn('Memory of Commands after 3 events', output.getvalue())
+
+    def test6(self):
+        set_debug(False)
+        tracemalloc.start()
+        try:
+            monitor = Commands()
+            reporter = MemoryReporter(monitor, trace=True, print_at_end=False)
+            self.assertFalse(reporter.started_tracing)
+            monitor.verify(dispatches(3))
+            reporter.detach()
+            self.assertTrue(tracemalloc.is_tracing())
+            self.assertIn('traced', reporter.reports[-1])
+        finally:
+            tracemalloc.stop()
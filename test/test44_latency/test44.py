@@ -0,0 +1,131 @@
+import os
+import asyncio
+import random
+from pycontract import *
+import unittest
+import test.utest
+from test.test12_vpt_2022.test12 import M4
+from test.test33_async.test33 import read_events, telemetry
+from pycontract_stats import prometheus_text
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Latency histograms of event evaluation and queue waits.
+"""
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        set_debug(False)
+        histogram = LatencyHistogram()
+        for value in [0, 1, 31, 32, 33, 1000, 123456789, 2 ** 40 + 12345]:
+            index = histogram.index_of(value)
+            self.assertLessEqual(value, histogram.highest_value(index))
+            self.assertTrue(index == 0 or histogram.highest_value(index - 1) < value)
+            self.assertLessEqual(histogram.highest_value(index) - value, value / 32)
+        self.assertEqual(histogram.index_of(-5), 0)
+
+    def test2(self):
+        set_debug(False)
+        histogram = LatencyHistogram()
+        self.assertEqual(histogram.percentile(99), 0)
+        values = list(range(1, 100001))
+        random.Random(1).shuffle(values)
+        for value in values:
+            histogram.record(value)
+        self.assertEqual(histogram.count, 100000)
+        self.assertEqual(histogram.max, 100000)
+        for (percentile, expected) in [(50, 50000), (99, 99000), (99.9, 99900), (100, 100000)]:
+            actual = histogram.percentile(percentile)
+            self.assertGreaterEqual(actual, expected)
+            self.assertLessEqual(actual, expected * 1.04)
+        summary = histogram.to_dict()
+        self.assertEqual(list(summary), ['count', 'total', 'mean', 'max', 'p50', 'p99', 'p99.9'])
+        self.assertAlmostEqual(summary['mean'], 50000.5)
+        other = LatencyHistogram()
+        other.record(10 ** 9, 10)
+        histogram.merge(other)
+        self.assertEqual(histogram.count, 100010)
+        self.assertEqual(histogram.percentile(100), 10 ** 9)
+        histogram.reset()
+        self.assertEqual(histogram.count, 0)
+        self.assertEqual(sum(histogram.counts), 0)
+
+    def test3(self):
+        set_debug(False)
+        events = read_events()
+        monitor = M4()
+        timer = LatencyTimer(monitor)
+        monitor.verify(events)
+        print(timer)
+        self.assertEqual(timer.eval_latency.count, len(events))
+        self.assertEqual(timer.queue_wait.count, 0)
+        stats = monitor.stats()
+        self.assertEqual(stats['latency']['eval']['count'], len(events))
+        self.assertGreater(stats['latency']['eval']['p99.9'], 0)
+        self.assertLessEqual(stats['latency']['eval']['p50'], stats['latency']['eval']['p99'])
+        text = prometheus_text(dict(stats, events_per_second={}, reader_lag=None))
+        self.assertIn('# TYPE pycontract_eval_latency_seconds summary', text)
+        self.assertIn('pycontract_eval_latency_seconds{monitor="M4",quantile="0.999"}', text)
+        self.assertIn(f'pycontract_eval_latency_seconds_count{{monitor="M4"}} {len(events)}', text)
+        timer.detach()
+        self.assertNotIn('eval', monitor.__dict__)
+        self.assertNotIn('latency', monitor.stats())
+
+    def test4(self):
+        set_debug(False)
+        events = read_events()
+        m = M4()
+        m.verify(events)
+        monitor = M4()
+        timer = LatencyTimer(monitor)
+
+        async def main() -> AsyncMonitor:
+            async with AsyncMonitor(monitor, max_queue=4, batch_size=3, latency=timer) as async_monitor:
+                async for event in telemetry(events):
+                    await async_monitor.submit(event)
+            return async_monitor
+
+        async_monitor = asyncio.run(main())
+        self.assertEqual([message.text for message in async_monitor.messages], m.get_all_message_texts())
+        self.assertEqual(timer.queue_wait.count, len(events))
+        self.assertEqual(timer.eval_latency.count, len(events))
+
+    def test5(self):
+        set_debug(False)
+        events = read_events()
+        monitor = M4()
+        timer = LatencyTimer(monitor)
+        with PrefetchSource(iter(events), batch_size=10, latency=timer) as source:
+            monitor.verify(source)
+        self.assertEqual(timer.queue_wait.count, len(events))
+        self.assertGreater(timer.queue_wait.max, 0)
+
+    def test6(self):
+        set_debug(False)
+        events = read_events()
+        monitor = M4()
+        timer = LatencyTimer(monitor)
+        recorder = StateRecorder(monitor, every_events=5)
+        monitor.eval_many(events)
+        with self.assertRaisesRegex(RuntimeError, 'eval of M4 has been wrapped again'):
+            timer.detach()
+        self.assertEqual(monitor.eval, recorder.record)
+        self.assertEqual(monitor.stats, timer.stats)
+        recorder.detach()
+        self.assertEqual(monitor.eval, timer.eval)
+        timer.detach()
+        self.assertNotIn('eval', monitor.__dict__)
+        self.assertNotIn('stats', monitor.__dict__)
+        self.assertEqual(timer.eval_latency.count, len(events))
+        self.assertEqual(recorder.samples[-1][0], len(events))
+        profiler = Profiler()
+        profiler.attach(monitor)
+        reporter = MemoryReporter(monitor, print_at_end=False)
+        with self.assertRaisesRegex(RuntimeError, 'end of M4 has been wrapped again'):
+            profiler.detach()
+        reporter.detach()
+        self.assertIn('end', monitor.__dict__)
+        profiler.detach()
+        self.assertNotIn('end', monitor.__dict__)
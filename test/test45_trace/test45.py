@@ -0,0 +1,149 @@
+import os
+import io
+import tempfile
+import contextlib
+from typing import Optional
+from pycontract import *
+import unittest
+import test.utest
+from test.test12_vpt_2022.test12 import M4
+from test.test33_async.test33 import read_events
+from pycontract_trace import read_trace, main
+
+DIR = os.path.dirname(__file__) + '/'
+
+"""
+Tracing transitions into a ring buffer and a file.
+"""
+
+
+class Commands(Monitor):
+    def key(self, event) -> Optional[object]:
+        return event['cmd']
+
+    @initial
+    class Always(AlwaysState):
+        def transition(self, event):
+            match event:
+                case {'name': 'dispatch', 'cmd': cmd}:
+                    return Commands.Dispatched(cmd)
+
+    @data
+    class Dispatched(HotState):
+        cmd: str
+
+        def transition(self, event):
+            match event:
+                case {'name': 'complete', 'cmd': self.cmd}:
+                    return ok
+                case {'name': 'fail', 'cmd': self.cmd}:
+                    return error('failed')
+
+
+def commands():
+    trace = [{'name': 'dispatch', 'cmd': f'C{nr}'} for nr in range(5)]
+    trace += [{'name': 'complete', 'cmd': f'C{nr}'} for nr in range(4)]
+    trace += [{'name': 'fail', 'cmd': 'C4'}]
+    return trace
+
+
+class Test1(test.utest.Test):
+    def test1(self):
+        set_debug(False)
+        monitor = Commands()
+        tracer = Tracer()
+        tracer.attach(monitor)
+        monitor.verify(commands())
+        records = tracer.records()
+        self.assertEqual(len(records), 10)
+        self.assertEqual(records[0], {'event': 1, 'monitor': 'Commands', 'key': "'C0'", 'source': 'Always()',
+                                      'results': ["Dispatched('C0')", 'Always()'], 'classes': ['Always', 'Dispatched', 'Always']})
+        self.assertEqual(records[-1]['event'], 10)
+        self.assertEqual(records[-1]['classes'], ['Dispatched', 'ErrorState'])
+        tracer.close()
+        self.assertIsNone(monitor.tracer)
+
+    def test2(self):
+        set_debug(False)
+        monitor = Commands()
+        tracer = Tracer(trace_filter=TraceFilter(keys=['C2']))
+        tracer.attach(monitor)
+        monitor.verify(commands())
+        self.assertEqual([(record['event'], record['source']) for record in tracer.records()],
+                         [(3, 'Always()'), (8, "Dispatched('C2')")])
+        monitor = Commands()
+        tracer = Tracer(trace_filter=TraceFilter(events=(6, None), state_classes=[Commands.Dispatched]))
+        tracer.attach(monitor)
+        monitor.verify(commands())
+        self.assertEqual([record['event'] for record in tracer.records()], [6, 7, 8, 9, 10])
+        monitor = Commands()
+        tracer = Tracer(capacity=3, stays=True)
+        tracer.attach(monitor)
+        monitor.verify(commands())
+        self.assertEqual(len(tracer.records()), 3)
+        self.assertEqual(tracer.record_count, 15)
+
+    def test3(self):
+        set_debug(False)
+        events = read_events()
+        monitor = M4()
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'trace.bin')
+            tracer = Tracer(capacity=10, file=file)
+            tracer.attach(monitor)
+            monitor.verify(events)
+            tracer.close()
+            records = list(read_trace(file))
+            self.assertEqual(len(records), tracer.record_count)
+            self.assertEqual(records[-10:], tracer.records())
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                main([file, '--state', 'Succeed', '--first', '2'])
+            lines = output.getvalue().splitlines()
+            self.assertEqual(len(lines), len([record for record in records
+                                              if 'Succeed' in record['classes'] and record['event'] >= 2]))
+            self.assertTrue(all(' M4: ' in line for line in lines))
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                main([file, '--summary'])
+            self.assertIn('M4.Dispatch: ', output.getvalue())
+            with open(file, 'ab') as f:
+                f.write(b'\x10\x00\x00\x00[1,')
+            self.assertEqual(len(list(read_trace(file))), len(records))
+
+    def test4(self):
+        set_debug(False)
+        trace = [{'name': 'dispatch', 'cmd': 1}, {'name': 'dispatch', 'cmd': '1'}, {'name': 'complete', 'cmd': 1}]
+        monitor = Commands()
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'trace.bin')
+            tracer = Tracer(file=file, trace_filter=TraceFilter(keys=[1]))
+            tracer.attach(monitor)
+            monitor.verify(trace)
+            tracer.close()
+            self.assertEqual([(record['event'], record['key']) for record in tracer.records()], [(1, '1'), (3, '1')])
+            tracer = Tracer(file=file)
+            tracer.attach(Commands())
+            tracer.monitors[0].verify(trace)
+            tracer.close()
+            for (key, events) in [('1', ['1', '3']), ("'1'", ['2'])]:
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    main([file, '--key', key])
+                self.assertEqual([line.split()[0] for line in output.getvalue().splitlines()], events)
+
+    def test5(self):
+        monitor = Commands()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            set_debug(True)
+            try:
+                monitor.eval_many(commands()[:2])
+            finally:
+                set_debug(False)
+        self.assertEqual(output.getvalue().splitlines(), [
+            "Event 1 {'name': 'dispatch', 'cmd': 'C0'}",
+            "  Commands['C0']: Always() results in [Dispatched('C0'),  Always()]",
+            "Event 2 {'name': 'dispatch', 'cmd': 'C1'}",
+            "  Commands['C1']: Always() results in [Dispatched('C1'),  Always()]"
+        ])